@@ -21,6 +21,7 @@ from ec2mc.commands import aws_setup_cmd
 from ec2mc.commands import server_cmds
 from ec2mc.commands import servers_cmds
 from ec2mc.commands import address_cmds
+from ec2mc.commands import image_cmds
 from ec2mc.commands import user_cmds
 
 def main(args=None):
@@ -39,6 +40,7 @@ def main(args=None):
             server_cmds.Server,
             servers_cmds.Servers,
             address_cmds.Address,
+            image_cmds.Image,
             user_cmds.User
         ]
 
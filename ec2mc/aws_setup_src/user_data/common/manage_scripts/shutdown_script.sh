@@ -1,5 +1,26 @@
 #!/bin/bash
 
-# TODO: Learn for sure whether this leaves enough time to save the world
-runuser -l ec2-user -c 'screen -XS minecraft quit'
-sudo shutdown -h now
+# Seconds to wait for the server to save the world and exit
+STOP_TIMEOUT=120
+# Seconds to wait for a background OS update to finish
+UPDATE_TIMEOUT=1800
+
+SERVER_PID=$(pgrep -u ec2-user -f 'java .*nogui' | head -n 1)
+
+if [ -n "$SERVER_PID" ]; then
+    # Have the server save the world and stop, through its screen console
+    runuser -u ec2-user -- \
+        screen -S minecraft -p 0 -X stuff $'save-all\rstop\r'
+    # Block until the server exits (or the timeout passes)
+    timeout "$STOP_TIMEOUT" tail --pid="$SERVER_PID" -f /dev/null
+fi
+runuser -u ec2-user -- screen -XS minecraft quit > /dev/null 2>&1
+
+# Wait for any background OS update (see os_updates) to finish, and hold
+# its lock so that another doesn't start
+exec 9> /var/lock/ec2mc_os_update
+flock -w "$UPDATE_TIMEOUT" 9
+
+# Flush written world data to disk before halting
+sync
+shutdown -h now
@@ -1,4 +1,16 @@
 #!/bin/bash
 
+# Defaults, overridden by settings generated from the template's jvm key
+JVM_MEMORY=1024M
+JVM_FLAGS=()
+if [ -f /home/ec2-user/manage-scripts/jvm_settings.sh ]; then
+    . /home/ec2-user/manage-scripts/jvm_settings.sh
+fi
+# Heap size given as a percentage of the instance's RAM
+if [ -n "$JVM_MEMORY_PERCENT" ]; then
+    TOTAL_KB=$(awk '/^MemTotal:/ { print $2 }' /proc/meminfo)
+    JVM_MEMORY="$((TOTAL_KB * JVM_MEMORY_PERCENT / 100 / 1024))M"
+fi
+
 cd /home/ec2-user/minecraft/
-java -Xms1024M -Xmx1024M -jar server.jar nogui
+java -Xms$JVM_MEMORY -Xmx$JVM_MEMORY "${JVM_FLAGS[@]}" -jar server.jar nogui
@@ -1,61 +1,142 @@
+from botocore.exceptions import ClientError
+
 from ec2mc.utils import aws
 from ec2mc.utils import halt
 from ec2mc.utils.base_classes import CommandBase
 from ec2mc.utils.find import find_addresses
 from ec2mc.utils.find import find_instances
+from ec2mc.utils.threader import Threader
 from ec2mc.validate import validate_perms
 
 class AssociateAddress(CommandBase):
 
     def main(self, cmd_args):
-        """associate elastic IP address to an (other) instance
+        """associate elastic IP address(es) to (other) instance(s)
+
+        All pairs are validated before any are associated. Each region's
+        associations are made concurrently with other regions'.
 
         Args:
             cmd_args (namedtuple): See add_documentation method.
         """
-        address = find_addresses.main(cmd_args.ip)
-        ec2_client = aws.ec2_client(address['region'])
-
-        all_instances = find_instances.probe_regions()
-        try:
-            instance = next(instance for instance in all_instances
-                if instance['name'] == cmd_args.name)
-        except StopIteration:
-            halt.err(f"Instance named \"{cmd_args.name}\" not found.")
-
-        if instance['region'] != address['region']:
-            halt.err("Instance and address are in different regions.")
-        if 'instance_name' in address:
-            if instance['name'] == address['instance_name']:
-                halt.err("Address already associated with specified instance.")
-
-        if 'association_id' in address and cmd_args.force is False:
+        ip_names = self._parse_pairs(cmd_args)
+        addresses = find_addresses.find_many([ip for ip, _ in ip_names])
+        # Instance names are only unique within a region
+        all_instances = {(instance['region'], instance['name']): instance
+            for instance in find_instances.probe_regions()}
+
+        # (address, instance) pairs grouped by region
+        region_pairs = {}
+        for address, (_, instance_name) in zip(addresses, ip_names):
+            instance = self._validate_pair(
+                address, all_instances, instance_name, cmd_args.force)
+            region_pairs.setdefault(address['region'], []).append(
+                (address, instance))
+        instance_ids = [instance['id'] for pairs in region_pairs.values()
+            for _, instance in pairs]
+        if len(set(instance_ids)) < len(instance_ids):
+            halt.err("Each instance can only have one address associated.")
+
+        threader = Threader()
+        for region, pairs in region_pairs.items():
+            threader.add_thread(self._associate_pairs, (region, pairs))
+        ip_errors = {}
+        for region_errors in threader.get_results():
+            ip_errors.update(region_errors)
+
+        print("")
+        for ip, instance_name in ip_names:
+            if ip_errors[ip] is None:
+                print(f"Address {ip} associated with {instance_name}.")
+            else:
+                print(f"Address {ip} not associated with {instance_name}:")
+                print(f"  {ip_errors[ip]}")
+
+        if any(error is not None for error in ip_errors.values()):
+            halt.err("Not all addresses were associated.")
+
+
+    @staticmethod
+    def _parse_pairs(cmd_args):
+        """return (IP, instance name) pairs from positional args and -p"""
+        ip_names = []
+        if cmd_args.ip is not None:
+            if cmd_args.name is None:
+                halt.err("An instance name must follow the address's IP.")
+            ip_names.append((cmd_args.ip, cmd_args.name))
+        if cmd_args.pairs is not None:
+            ip_names.extend(tuple(pair) for pair in cmd_args.pairs)
+
+        if not ip_names:
+            halt.err("No addresses specified.",
+                "  Specify an IP and instance name, and/or use -p.")
+
+        ips = [ip for ip, _ in ip_names]
+        if len(set(ips)) < len(ips):
+            halt.err("Each address can only be associated once.")
+        return ip_names
+
+
+    @staticmethod
+    def _validate_pair(address, all_instances, instance_name, force):
+        """return named instance in address's region, halt if unusable
+
+        all_instances maps each instance's (region, name) to the instance.
+        """
+        instance = all_instances.get((address['region'], instance_name))
+        if instance is None:
+            if any(name == instance_name for _, name in all_instances):
+                halt.err(f"Instance {instance_name} and address "
+                    f"{address['ip']} are in different regions.")
+            halt.err(f"Instance named \"{instance_name}\" not found.")
+        if address.get('instance_id') == instance['id']:
+            halt.err(f"Address {address['ip']} already associated with "
+                f"{instance_name}.")
+        if 'association_id' in address and force is False:
             halt.err(f"Elastic IP address {address['ip']} currently in use.",
                 "  Append the -f argument to force disassociation.")
+        return instance
 
-        with aws.ClientErrorHalt():
-            if 'association_id' in address:
-                ec2_client.disassociate_address(
-                    AssociationId=address['association_id'])
-            ec2_client.associate_address(
-                AllocationId=address['allocation_id'],
-                InstanceId=instance['id']
-            )
 
-        print("")
-        print("Address associated with instance.")
+    @staticmethod
+    def _associate_pairs(region, pairs):
+        """associate region's addresses with their instances
+
+        Returns:
+            dict: Error message (str), or None if associated, for each IP.
+        """
+        ec2_client = aws.ec2_client(region)
+        ip_errors = {}
+        for address, instance in pairs:
+            try:
+                if 'association_id' in address:
+                    ec2_client.disassociate_address(
+                        AssociationId=address['association_id'])
+                ec2_client.associate_address(
+                    AllocationId=address['allocation_id'],
+                    InstanceId=instance['id']
+                )
+                ip_errors[address['ip']] = None
+            except ClientError as e:
+                ip_errors[address['ip']] = str(e)
+        return ip_errors
 
 
     @classmethod
     def add_documentation(cls, argparse_obj):
         cmd_parser = super().add_documentation(argparse_obj)
         cmd_parser.add_argument(
-            "ip", help="IP of elastic IP address to (re)associate")
+            "ip", nargs="?", help="IP of elastic IP address to (re)associate")
+        cmd_parser.add_argument(
+            "name", nargs="?",
+            help="name of instance to associate address with")
         cmd_parser.add_argument(
-            "name", help="name of instance to associate address with")
+            "-p", "--pair", dest="pairs", nargs=2, action="append",
+            metavar=("IP", "NAME"),
+            help="additional address IP and instance name to associate")
         cmd_parser.add_argument(
             "-f", "--force", action="store_true",
-            help="disassociate address if it is in use")
+            help="disassociate address(es) if in use")
 
 
     def blocked_actions(self, cmd_args):
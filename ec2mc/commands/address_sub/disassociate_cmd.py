@@ -1,36 +1,81 @@
+from botocore.exceptions import ClientError
+
 from ec2mc.utils import aws
 from ec2mc.utils import halt
 from ec2mc.utils.base_classes import CommandBase
 from ec2mc.utils.find import find_addresses
+from ec2mc.utils.threader import Threader
 from ec2mc.validate import validate_perms
 
 class DisassociateAddress(CommandBase):
 
     def main(self, cmd_args):
-        """disassociate elastic IP address from its instance
+        """disassociate elastic IP address(es) from their instance(s)
+
+        Each region's disassociations are made concurrently with other
+        regions'.
 
         Args:
             cmd_args (namedtuple): See add_documentation method.
         """
-        address = find_addresses.main(cmd_args.ip)
-        ec2_client = aws.ec2_client(address['region'])
+        addresses = find_addresses.find_many(cmd_args.ips)
 
-        if 'association_id' not in address:
-            halt.err("Elastic IP address not associated with anything.")
+        unassociated_ips = [address['ip'] for address in addresses
+            if 'association_id' not in address]
+        if unassociated_ips:
+            halt.err("Following elastic IP address(es) not associated with "
+                "anything:", *unassociated_ips)
 
-        with aws.ClientErrorHalt():
-            ec2_client.disassociate_address(
-                AssociationId=address['association_id'])
+        addresses_by_region = {}
+        for address in addresses:
+            addresses_by_region.setdefault(
+                address['region'], []).append(address)
+
+        threader = Threader()
+        for region, region_addresses in addresses_by_region.items():
+            threader.add_thread(self._disassociate_addresses,
+                (region, region_addresses))
+        ip_errors = {}
+        for region_errors in threader.get_results():
+            ip_errors.update(region_errors)
 
         print("")
-        print("Elastic IP address disassociated.")
+        for ip, error in ip_errors.items():
+            if error is None:
+                print(f"Elastic IP address {ip} disassociated.")
+            else:
+                print(f"Elastic IP address {ip} not disassociated:")
+                print(f"  {error}")
+
+        if any(error is not None for error in ip_errors.values()):
+            halt.err("Not all addresses were disassociated.")
+
+
+    @staticmethod
+    def _disassociate_addresses(region, addresses):
+        """disassociate region's addresses from their instances
+
+        Returns:
+            dict: Error message (str), or None if disassociated, for each IP.
+        """
+        ec2_client = aws.ec2_client(region)
+        ip_errors = {}
+        for address in addresses:
+            try:
+                ec2_client.disassociate_address(
+                    AssociationId=address['association_id'])
+                ip_errors[address['ip']] = None
+            except ClientError as e:
+                ip_errors[address['ip']] = str(e)
+        return ip_errors
 
 
     @classmethod
     def add_documentation(cls, argparse_obj):
         cmd_parser = super().add_documentation(argparse_obj)
         cmd_parser.add_argument(
-            "ip", help="IP of elastic IP address to disassociate")
+            "ips", nargs="+", metavar="ip",
+            help="IP(s) of elastic IP address(es) to disassociate")
 
 
     def blocked_actions(self, _):
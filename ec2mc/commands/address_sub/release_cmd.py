@@ -1,46 +1,105 @@
+from botocore.exceptions import ClientError
+
 from ec2mc.utils import aws
 from ec2mc.utils import halt
 from ec2mc.utils.base_classes import CommandBase
 from ec2mc.utils.find import find_addresses
+from ec2mc.utils.threader import Threader
 from ec2mc.validate import validate_perms
 
 class ReleaseAddress(CommandBase):
 
     def main(self, cmd_args):
-        """release elastic IP address (give up possession)
+        """release elastic IP address(es) (give up possession)
+
+        Each region's releases are made concurrently with other regions'.
 
         Args:
             cmd_args (namedtuple): See add_documentation method.
         """
-        address = find_addresses.main(cmd_args.ip)
-        ec2_client = aws.ec2_client(address['region'])
+        if cmd_args.ips and cmd_args.unassociated:
+            halt.err("Specify either IPs or --unassociated, not both.")
+
+        if cmd_args.unassociated:
+            addresses = [address for address
+                in find_addresses.probe_regions()
+                if 'association_id' not in address]
+            if not addresses:
+                halt.err("No unassociated namespace elastic IP addresses.")
+        elif cmd_args.ips:
+            addresses = find_addresses.find_many(cmd_args.ips)
+        else:
+            halt.err("No addresses specified.",
+                "  Specify IPs, or use the --unassociated argument.")
 
-        if 'association_id' in address and cmd_args.force is False:
-            halt.err(f"Elastic IP address {address['ip']} currently in use.",
+        in_use_ips = [address['ip'] for address in addresses
+            if 'association_id' in address]
+        if in_use_ips and cmd_args.force is False:
+            halt.err("Following elastic IP address(es) currently in use:",
+                *in_use_ips,
                 "  Append the -f argument to force disassociation.")
 
+        addresses_by_region = {}
+        for address in addresses:
+            addresses_by_region.setdefault(
+                address['region'], []).append(address)
+
+        threader = Threader()
+        for region, region_addresses in addresses_by_region.items():
+            threader.add_thread(self._release_addresses,
+                (region, region_addresses))
+        ip_errors = {}
+        for region_errors in threader.get_results():
+            ip_errors.update(region_errors)
+
         print("")
-        if 'association_id' in address:
-            ec2_client.disassociate_address(
-                AssociationId=address['association_id'])
-        ec2_client.release_address(
-            AllocationId=address['allocation_id'])
-
-        if 'association_id' in address:
-            print(f"Elastic IP address {address['ip']} "
-                "disassociated and released.")
-        else:
-            print(f"Elastic IP address {address['ip']} released.")
+        for ip, error in ip_errors.items():
+            if error is not None:
+                print(f"Elastic IP address {ip} not released:")
+                print(f"  {error}")
+            elif ip in in_use_ips:
+                print(f"Elastic IP address {ip} disassociated and released.")
+            else:
+                print(f"Elastic IP address {ip} released.")
+
+        if any(error is not None for error in ip_errors.values()):
+            halt.err("Not all addresses were released.")
+
+
+    @staticmethod
+    def _release_addresses(region, addresses):
+        """release region's addresses, disassociating any in use
+
+        Returns:
+            dict: Error message (str), or None if released, for each IP.
+        """
+        ec2_client = aws.ec2_client(region)
+        ip_errors = {}
+        for address in addresses:
+            try:
+                if 'association_id' in address:
+                    ec2_client.disassociate_address(
+                        AssociationId=address['association_id'])
+                ec2_client.release_address(
+                    AllocationId=address['allocation_id'])
+                ip_errors[address['ip']] = None
+            except ClientError as e:
+                ip_errors[address['ip']] = str(e)
+        return ip_errors
 
 
     @classmethod
     def add_documentation(cls, argparse_obj):
         cmd_parser = super().add_documentation(argparse_obj)
         cmd_parser.add_argument(
-            "ip", help="IP of elastic IP address to be released")
+            "ips", nargs="*", metavar="ip",
+            help="IP(s) of elastic IP address(es) to be released")
+        cmd_parser.add_argument(
+            "-u", "--unassociated", action="store_true",
+            help="release all namespace addresses not in use")
         cmd_parser.add_argument(
             "-f", "--force", action="store_true",
-            help="disassociate address if it is in use")
+            help="disassociate address(es) if in use")
 
 
     def blocked_actions(self, cmd_args):
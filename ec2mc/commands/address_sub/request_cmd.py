@@ -4,46 +4,81 @@ from ec2mc.utils import aws
 from ec2mc.utils import halt
 from ec2mc.utils.base_classes import CommandBase
 from ec2mc.utils.find import find_addresses
+from ec2mc.utils.threader import Threader
 from ec2mc.validate import validate_perms
 
 class RequestAddress(CommandBase):
 
-    def __init__(self, cmd_args):
-        self._ec2_client = aws.ec2_client(cmd_args.region)
-
-
     def main(self, cmd_args):
-        """attempt to allocate an elastic IP address from AWS
+        """attempt to allocate elastic IP address(es) from AWS
+
+        Addresses are tagged on allocation. When requesting multiple random
+        addresses, each region's allocations are made concurrently with
+        other regions'.
 
         Args:
             cmd_args (namedtuple): See add_documentation method.
         """
-        if cmd_args.ip is not None:
-            response = self._request_specific_address(
-                cmd_args.region, cmd_args.ip)
-        else:
-            response = self._request_random_address()
+        if cmd_args.count < 1:
+            halt.err("Number of addresses to request must be positive.")
 
-        aws.attach_tags(cmd_args.region, response['AllocationId'])
-        public_ip = response['PublicIp']
+        if cmd_args.ip is not None:
+            if cmd_args.count > 1:
+                halt.err("A specific IP can't be requested more than once.")
+            if cmd_args.regions is not None and len(cmd_args.regions) > 1:
+                halt.err("A specific IP can only be requested in one region.")
+            region = None
+            if cmd_args.regions is not None:
+                region = cmd_args.regions[0]
+            response = self._request_specific_address(region, cmd_args.ip)
+            print("")
+            print(f"Elastic IP address {response['PublicIp']} "
+                "successfully allocated.")
+            return
+
+        # aws.ec2_client validates regions (and defaults if None given)
+        ec2_clients = {ec2_client.meta.region_name: ec2_client
+            for ec2_client in (aws.ec2_client(region)
+            for region in (cmd_args.regions or [None]))}
+
+        threader = Threader()
+        for region, ec2_client in ec2_clients.items():
+            threader.add_thread(self._request_random_addresses,
+                (region, ec2_client, cmd_args.count))
+        region_results = threader.get_results(return_dict=True)
 
         print("")
-        print(f"Elastic IP address {public_ip} successfully allocated.")
-
-
-    def _request_specific_address(self, region, ipv4_ip):
+        failed = False
+        for region, (public_ips, error) in region_results.items():
+            print(f"{region}: {len(public_ips)} of {cmd_args.count} "
+                "address(es) allocated:")
+            for public_ip in public_ips:
+                print(f"  {public_ip}")
+            if error is not None:
+                failed = True
+                print(f"  {error}")
+
+        if failed:
+            halt.err("Not all elastic IP addresses were allocated.")
+
+
+    @staticmethod
+    def _request_specific_address(region, ipv4_ip):
         """request specific IPv4 elastic IP address from AWS"""
-        for address in find_addresses.probe_regions():
-            if address['ip'] == ipv4_ip:
-                if region is not None and region != address['region']:
-                    halt.err("You already possess this elastic IP address.",
-                        f"  It is located in the {address['region']} region.")
-                halt.err("You already possess this elastic IP address.")
+        ec2_client = aws.ec2_client(region)
+
+        address = find_addresses.lookup(ipv4_ip)
+        if address is not None:
+            if region is not None and region != address['region']:
+                halt.err("You already possess this elastic IP address.",
+                    f"  It is located in the {address['region']} region.")
+            halt.err("You already possess this elastic IP address.")
 
         try:
-            return self._ec2_client.allocate_address(
+            return ec2_client.allocate_address(
                 Domain="vpc",
-                Address=ipv4_ip
+                Address=ipv4_ip,
+                TagSpecifications=aws.tag_specifications("elastic-ip")
             )
         except ClientError as e:
             if e.response['Error']['Code'] == "InvalidParameterValue":
@@ -53,10 +88,25 @@ class RequestAddress(CommandBase):
             halt.err(str(e))
 
 
-    def _request_random_address(self):
-        """request random IPv4 elastic IP address from AWS"""
-        with aws.ClientErrorHalt():
-            return self._ec2_client.allocate_address(Domain="vpc")
+    @staticmethod
+    def _request_random_addresses(region, ec2_client, count):
+        """request random IPv4 elastic IP addresses in a region
+
+        Returns:
+            tuple:
+                list[str]: IPs of allocated addresses.
+                str/None: Error message if an allocation failed.
+        """
+        public_ips = []
+        try:
+            for _ in range(count):
+                public_ips.append(ec2_client.allocate_address(
+                    Domain="vpc",
+                    TagSpecifications=aws.tag_specifications("elastic-ip")
+                )['PublicIp'])
+        except ClientError as e:
+            return (public_ips, str(e))
+        return (public_ips, None)
 
 
     @classmethod
@@ -65,8 +115,11 @@ class RequestAddress(CommandBase):
         cmd_parser.add_argument(
             "ip", nargs="?", help="IP of elastic IP address to request")
         cmd_parser.add_argument(
-            "-r", dest="region", metavar="",
-            help="AWS region to place address in")
+            "-r", dest="regions", nargs="+", metavar="region",
+            help="AWS region(s) to place address(es) in")
+        cmd_parser.add_argument(
+            "-n", dest="count", type=int, default=1, metavar="",
+            help="number of random addresses to request per region")
 
 
     def blocked_actions(self, _):
@@ -1,6 +1,10 @@
+import traceback
+from threading import Event
+
 from ec2mc import consts
 from ec2mc.utils import aws
 from ec2mc.utils import halt
+from ec2mc.utils import iam_snapshot
 from ec2mc.utils import os2
 from ec2mc.utils.base_classes import CommandBase
 from ec2mc.utils.threader import Threader
@@ -10,6 +14,7 @@ from ec2mc.commands.aws_setup_sub import iam_policies
 from ec2mc.commands.aws_setup_sub import iam_groups
 from ec2mc.commands.aws_setup_sub import vpcs
 from ec2mc.commands.aws_setup_sub import ssh_key_pairs
+from ec2mc.commands.aws_setup_sub import artifact_stores
 
 class AWSSetup(CommandBase):
 
@@ -17,7 +22,8 @@ class AWSSetup(CommandBase):
         iam_policies.IAMPolicySetup,
         iam_groups.IAMGroupSetup,
         vpcs.VPCSetup,
-        ssh_key_pairs.SSHKeyPairSetup
+        ssh_key_pairs.SSHKeyPairSetup,
+        artifact_stores.ArtifactStoreSetup
     ]
 
     def main(self, cmd_args):
@@ -26,58 +32,107 @@ class AWSSetup(CommandBase):
         Args:
             cmd_args (namedtuple): See add_documentation method.
         """
+        # Don't reuse IAM state from a previous command in this process
+        iam_snapshot.reset_shared()
+
         if cmd_args.subcommand == "delete":
-            path_prefix = f"/{consts.NAMESPACE}/"
-            if not self._namespace_groups_empty(path_prefix):
+            snapshot = iam_snapshot.shared()
+            if any(snapshot.group_users(name) for name in snapshot.groups):
                 halt.err("IAM User(s) attached to namespace IAM group(s).")
-            if not self._namespace_policies_empty(path_prefix):
+            if any(snapshot.policy_users(name) for name in snapshot.policies):
                 halt.err("IAM User(s) attached to namespace IAM policy(s).")
             if not self._namespace_vpcs_empty():
                 halt.err("EC2 instance(s) found under namespace VPC(s).")
 
         # AWS setup JSON config dictionary
         config_aws_setup = os2.parse_json(consts.AWS_SETUP_JSON)
+        components = [component(config_aws_setup)
+            for component in self.aws_components]
 
-        for component in self.aws_components:
-            component = component(config_aws_setup)
-            component_info = component.check_component()
-            print("")
-            if cmd_args.subcommand == "check":
+        # Components' AWS states are independent, so check them all at once
+        threader = Threader()
+        for component in components:
+            threader.add_thread(self._guarded, (component.check_component,))
+        component_infos = threader.get_results()
+        if not all(succeeded for succeeded, _ in component_infos):
+            halt.stop()
+
+        if cmd_args.subcommand == "check":
+            for component, (_, component_info) in zip(
+                    components, component_infos):
+                print("")
                 component.notify_state(component_info)
-            elif cmd_args.subcommand == "upload":
-                component.upload_component(component_info)
-            elif cmd_args.subcommand == "delete":
-                component.delete_component()
+            return
+
+        print("")
+        # Set once a component has finished (or failed) uploading/deleting
+        finished = {type(component): Event() for component in components}
+        # Classes of components which failed, or whose dependencies failed
+        failed = set()
+        threader = Threader()
+        for component, (_, component_info) in zip(
+                components, component_infos):
+            threader.add_thread(self._run_component, (component,
+                cmd_args.subcommand, component_info, finished, failed))
+        threader.get_results()
+        # IAM state changed, so the shared snapshot is outdated
+        iam_snapshot.reset_shared()
+        if failed:
+            halt.stop()
 
 
-    @staticmethod
-    def _namespace_groups_empty(path_prefix):
-        """return False if any users attached to namespace groups"""
-        iam_client = aws.iam_client()
-        aws_groups = iam_client.list_groups(PathPrefix=path_prefix)['Groups']
-        for aws_group in aws_groups:
-            if iam_client.get_group(GroupName=aws_group['GroupName'])['Users']:
-                return False
-        return True
+    @classmethod
+    def _run_component(cls, component, subcommand, component_info,
+            finished, failed):
+        """upload/delete component once its dependencies have finished
+
+        Components without dependencies between them (e.g. IAM and the
+        regional EC2 setup) are uploaded/deleted concurrently.
+
+        Args:
+            component (ComponentSetup): aws_setup component to handle.
+            subcommand (str): Either "upload" or "delete".
+            component_info: What component's check_component returned.
+            finished (dict): threading.Event for each component class.
+            failed (set): Component classes that didn't finish successfully.
+        """
+        succeeded = False
+        try:
+            for dependency in component.dependencies:
+                finished[dependency].wait()
+            if failed.intersection(component.dependencies):
+                return
+
+            if subcommand == "upload":
+                succeeded, _ = cls._guarded(
+                    component.upload_component, component_info)
+            else:
+                succeeded, _ = cls._guarded(component.delete_component)
+        finally:
+            # Dependents must be released even if this component halted
+            if not succeeded:
+                failed.add(type(component))
+            finished[type(component)].set()
 
 
     @staticmethod
-    def _namespace_policies_empty(path_prefix):
-        """return False if any users attached to namespace policies"""
-        iam_client = aws.iam_client()
-        aws_policies = iam_client.list_policies(
-            Scope="Local",
-            OnlyAttached=True,
-            PathPrefix=path_prefix
-        )['Policies']
-        for aws_policy in aws_policies:
-            attached_users = iam_client.list_entities_for_policy(
-                PolicyArn=aws_policy['Arn'],
-                EntityFilter="User"
-            )['PolicyUsers']
-            if attached_users:
-                return False
-        return True
+    def _guarded(func, *args):
+        """call func, catching halt's SystemExit so other threads continue
+
+        Other exceptions (e.g. an unhandled ClientError) are also caught and
+        printed, so that a result is always returned for each component.
+
+        Returns:
+            tuple: Whether func returned normally, and what it returned.
+        """
+        try:
+            return (True, func(*args))
+        except SystemExit:
+            return (False, None)
+        except Exception:
+            traceback.print_exc()
+            return (False, None)
+
 
     @classmethod
     def _namespace_vpcs_empty(cls):
@@ -122,10 +177,7 @@ class AWSSetup(CommandBase):
         denied_actions = []
         if cmd_args.subcommand == "delete":
             denied_actions.extend(validate_perms.blocked(actions=[
-                "iam:ListGroups",
-                "iam:GetGroup",
-                "iam:ListPolicies",
-                "iam:ListEntitiesForPolicy",
+                "iam:GetAccountAuthorizationDetails",
                 "ec2:DescribeVpcs",
                 "ec2:DescribeInstances"
             ]))
@@ -0,0 +1,258 @@
+import hashlib
+import json
+from urllib.request import urlopen
+from botocore.exceptions import ClientError
+
+from ec2mc import consts
+from ec2mc.utils import aws
+from ec2mc.utils import halt
+from ec2mc.utils import user_data
+from ec2mc.utils.base_classes import ComponentSetup
+from ec2mc.utils.threader import Threader
+
+from ec2mc.commands.aws_setup_sub import vpcs
+
+class ArtifactStoreSetup(ComponentSetup):
+    # Buckets only allow downloads through namespace VPCs' S3 endpoints
+    dependencies = [vpcs.VPCSetup]
+
+    def __init__(self, _):
+        # Artifacts described by config's YAML instance templates
+        self._artifacts = user_data.template_artifacts()
+
+
+    def check_component(self):
+        """determine which regions need artifact store and/or artifacts
+
+        Returns:
+            dict: Artifact store status for each region.
+                Region name (dict):
+                    'Exists' (bool): Whether region's S3 bucket exists.
+                    'Missing' (list[str]): SHA-1(s) of artifact(s) missing
+                        from region's S3 bucket.
+        """
+        threader = Threader()
+        for region in consts.REGIONS:
+            threader.add_thread(self._region_store_state, (region,))
+        return threader.get_results(return_dict=True)
+
+
+    def notify_state(self, store_regions):
+        if not self._artifacts:
+            print("No artifacts described by instance templates.")
+            return
+
+        total_regions = len(consts.REGIONS)
+        existing = sum(state['Exists'] for state in store_regions.values())
+        print(f"Artifact store exists in {existing} of "
+            f"{total_regions} AWS regions.")
+
+        missing_regions = [region for region, state in store_regions.items()
+            if state['Missing']]
+        if missing_regions:
+            print(f"  Artifact(s) to be uploaded to {len(missing_regions)} "
+                f"of {total_regions} AWS regions.")
+
+
+    def upload_component(self, store_regions):
+        """create S3 bucket in each region, and upload missing artifacts
+
+        Each artifact is downloaded from its source URL once, verified
+        against its SHA-1 checksum, and cached in consts.ARTIFACT_DIR.
+        Each bucket's policy lets instances download artifacts through
+        their region's namespace VPC S3 endpoint, without credentials.
+
+        Args:
+            store_regions (dict): See what check_component returns.
+        """
+        if not self._artifacts:
+            print("No artifacts described by instance templates.")
+            return
+
+        missing_sha1s = {sha1 for state in store_regions.values()
+            for sha1 in state['Missing']}
+        for artifact in self._artifacts:
+            if artifact['sha1'] in missing_sha1s:
+                self._cache_artifact(artifact)
+
+        threader = Threader()
+        for region, state in store_regions.items():
+            threader.add_thread(self._upload_region_store, (region, state))
+        uploaded_regions = [region for region in threader.get_results()
+            if region is not None]
+
+        if uploaded_regions:
+            print(f"Artifact store updated in {len(uploaded_regions)} "
+                "AWS region(s).")
+        else:
+            print("Artifact store already up to date "
+                "in whitelisted region(s).")
+
+
+    def delete_component(self):
+        """empty and delete artifact store S3 bucket in each region"""
+        threader = Threader()
+        for region in consts.REGIONS:
+            threader.add_thread(self._delete_region_store, (region,))
+        deleted_stores = threader.get_results()
+
+        if any(deleted_stores):
+            print("Artifact store deleted from whitelisted AWS region(s).")
+        else:
+            print("No artifact stores to delete.")
+
+
+    def _region_store_state(self, region):
+        """return whether bucket exists, and which artifacts it's missing"""
+        stored_keys = self._bucket_keys(region)
+        if stored_keys is None:
+            return {
+                'Exists': False,
+                'Missing': [artifact['sha1'] for artifact in self._artifacts]
+            }
+        return {
+            'Exists': True,
+            'Missing': [artifact['sha1'] for artifact in self._artifacts
+                if artifact['sha1'] not in stored_keys]
+        }
+
+
+    def _upload_region_store(self, region, state):
+        """create region's bucket if needed, then upload missing artifacts
+
+        Returns:
+            str/None: Region, or None if its store was already up to date.
+        """
+        s3_client = aws.s3_client(region)
+        bucket = aws.artifact_bucket(region)
+        policy_updated = False
+        if not state['Exists']:
+            with aws.ClientErrorHalt():
+                if region == "us-east-1":
+                    s3_client.create_bucket(Bucket=bucket)
+                else:
+                    s3_client.create_bucket(Bucket=bucket,
+                        CreateBucketConfiguration={
+                            'LocationConstraint': region})
+
+        bucket_policy = self._bucket_policy(region, bucket)
+        if self._get_bucket_policy(region, bucket) != bucket_policy:
+            with aws.ClientErrorHalt():
+                s3_client.put_bucket_policy(
+                    Bucket=bucket, Policy=json.dumps(bucket_policy))
+            policy_updated = True
+
+        for sha1 in state['Missing']:
+            with (consts.ARTIFACT_DIR / sha1).open("rb") as artifact_file:
+                s3_client.put_object(
+                    Bucket=bucket, Key=sha1, Body=artifact_file)
+
+        if state['Exists'] and not state['Missing'] and not policy_updated:
+            return None
+        return region
+
+
+    @staticmethod
+    def _bucket_policy(region, bucket):
+        """return policy allowing downloads via namespace VPC S3 endpoint"""
+        vpc = aws.get_region_vpc(region)
+        vpc_endpoint = None
+        if vpc is not None:
+            vpc_endpoint = aws.get_vpc_s3_endpoint(region, vpc['VpcId'])
+        if vpc_endpoint is None:
+            halt.err(f"Namespace VPC S3 endpoint not found in {region}.")
+        return {
+            'Version': "2012-10-17",
+            'Statement': [{
+                'Sid': "NamespaceVPCArtifactDownloads",
+                'Effect': "Allow",
+                'Principal': "*",
+                'Action': "s3:GetObject",
+                'Resource': f"arn:aws:s3:::{bucket}/*",
+                'Condition': {'StringEquals': {
+                    'aws:SourceVpce': vpc_endpoint['VpcEndpointId']}}
+            }]
+        }
+
+
+    @staticmethod
+    def _get_bucket_policy(region, bucket):
+        """return bucket's policy, or None if it doesn't have one"""
+        try:
+            return json.loads(aws.s3_client(region).get_bucket_policy(
+                Bucket=bucket)['Policy'])
+        except ClientError as e:
+            if e.response['Error']['Code'] == "NoSuchBucketPolicy":
+                return None
+            halt.err(str(e))
+
+
+    def _delete_region_store(self, region):
+        """delete region's bucket and its contents, if bucket exists"""
+        stored_keys = self._bucket_keys(region)
+        if stored_keys is None:
+            return False
+
+        s3_client = aws.s3_client(region)
+        bucket = aws.artifact_bucket(region)
+        for key in stored_keys:
+            s3_client.delete_object(Bucket=bucket, Key=key)
+        s3_client.delete_bucket(Bucket=bucket)
+        return True
+
+
+    @staticmethod
+    def _bucket_keys(region):
+        """return object keys in region's bucket, or None if non-existent"""
+        s3_client = aws.s3_client(region)
+        paginator = s3_client.get_paginator("list_objects_v2")
+        try:
+            return {s3_object['Key']
+                for page in paginator.paginate(
+                    Bucket=aws.artifact_bucket(region))
+                for s3_object in page.get('Contents', [])}
+        except ClientError as e:
+            if e.response['Error']['Code'] == "NoSuchBucket":
+                return None
+            halt.err(str(e))
+
+
+    @staticmethod
+    def _cache_artifact(artifact):
+        """download artifact to consts.ARTIFACT_DIR, verifying its SHA-1"""
+        cache_path = consts.ARTIFACT_DIR / artifact['sha1']
+        if cache_path.is_file():
+            return
+        consts.ARTIFACT_DIR.mkdir(exist_ok=True)
+
+        print(f"Downloading {artifact['url']}...")
+        sha1_hash = hashlib.sha1()
+        temp_path = cache_path.with_suffix(".part")
+        with urlopen(artifact['url']) as response, \
+                temp_path.open("wb") as temp_file:
+            for chunk in iter(lambda: response.read(1 << 16), b""):
+                sha1_hash.update(chunk)
+                temp_file.write(chunk)
+
+        if sha1_hash.hexdigest() != artifact['sha1']:
+            temp_path.unlink()
+            halt.err(f"SHA-1 of {artifact['url']} doesn't match template.")
+        temp_path.rename(cache_path)
+
+
+    @classmethod
+    def blocked_actions(cls, sub_command):
+        cls.describe_actions = ["s3:ListBucket"]
+        cls.upload_actions = [
+            "ec2:DescribeVpcs",
+            "ec2:DescribeVpcEndpoints",
+            "s3:CreateBucket",
+            "s3:GetBucketPolicy",
+            "s3:PutBucketPolicy",
+            "s3:PutObject"
+        ]
+        cls.delete_actions = [
+            "s3:DeleteObject",
+            "s3:DeleteBucket"
+        ]
+        return super().blocked_actions(sub_command)
@@ -1,8 +1,17 @@
+from botocore.exceptions import ClientError
+
 from ec2mc import consts
 from ec2mc.utils import aws
+from ec2mc.utils import halt
+from ec2mc.utils import iam_snapshot
 from ec2mc.utils.base_classes import ComponentSetup
+from ec2mc.utils.threader import Threader
+
+from ec2mc.commands.aws_setup_sub import iam_policies
 
 class IAMGroupSetup(ComponentSetup):
+    # Groups' policies must exist before they can be attached
+    dependencies = [iam_policies.IAMPolicySetup]
 
     def __init__(self, config_aws_setup):
         self._iam_client = aws.iam_client()
@@ -29,27 +38,42 @@ class IAMGroupSetup(ComponentSetup):
             'UpToDate': []
         }
 
+        snapshot = iam_snapshot.shared()
+        # IAM groups already present on AWS, reused by delete
+        self._aws_group_names = list(snapshot.groups)
+
+        # See if AWS has groups not described by aws_setup.json
+        for aws_group_name in self._aws_group_names:
+            if aws_group_name not in self._iam_group_setup:
+                group_names['AWSExtra'].append(aws_group_name)
+
         # Check if group(s) described by aws_setup.json already on AWS
         for group_name in group_names['ToCreate'][:]:
-            for aws_group_name in self._get_iam_group_names():
-                if group_name == aws_group_name:
-                    # Group already exists on AWS, so next check if to update
-                    group_names['ToCreate'].remove(group_name)
-                    group_names['ToUpdate'].append(group_name)
-                    break
+            if group_name in self._aws_group_names:
+                # Group already exists on AWS, so next check if to update
+                group_names['ToCreate'].remove(group_name)
+                group_names['ToUpdate'].append(group_name)
+
+        # Namespace policy attachments of each namespace group on AWS
+        self._group_attachments = {group_name:
+            snapshot.group_policy_arns(group_name)
+            for group_name in self._aws_group_names}
+
+        # Policy(s) to attach to and detach from each group
+        self._attachment_diffs = {}
+        for group_name in self._iam_group_setup:
+            local_attachments = self._iam_group_setup[group_name]['Policies']
+            aws_attachments = self._group_attachments.get(group_name, {})
+            self._attachment_diffs[group_name] = {
+                'Attach': [policy_name for policy_name in local_attachments
+                    if policy_name not in aws_attachments],
+                'Detach': [policy_name for policy_name in aws_attachments
+                    if policy_name not in local_attachments]
+            }
 
         # Check if group(s) on AWS need policy attachment(s) updated
         for group_name in group_names['ToUpdate'][:]:
-            aws_group_policies = self._iam_client.list_attached_group_policies(
-                GroupName=group_name,
-                PathPrefix=self._path_prefix
-            )['AttachedPolicies']
-            aws_attachments = [policy['PolicyName']
-                for policy in aws_group_policies]
-
-            local_attachments = self._iam_group_setup[group_name]['Policies']
-
-            if set(aws_attachments) == set(local_attachments):
+            if not any(self._attachment_diffs[group_name].values()):
                 # AWS group has policies described in local setup
                 group_names['ToUpdate'].remove(group_name)
                 group_names['UpToDate'].append(group_name)
@@ -64,6 +88,9 @@ class IAMGroupSetup(ComponentSetup):
             print(f"IAM group {group} not found from AWS.")
         for group in group_names['ToUpdate']:
             print(f"IAM group {group} on AWS to be updated.")
+            attachment_diff = self._attachment_diffs[group]
+            print(f"  {len(attachment_diff['Attach'])} policy(s) to be "
+                f"attached, {len(attachment_diff['Detach'])} to be detached.")
         for group in group_names['UpToDate']:
             print(f"IAM group {group} on AWS is up to date.")
 
@@ -74,95 +101,163 @@ class IAMGroupSetup(ComponentSetup):
         Args:
             group_names (dict): See what check_component returns.
         """
+        threader = Threader(max_threads=aws.IAM_MAX_THREADS)
         for group_name in group_names['ToCreate']:
-            self._create_group(group_name)
-            print(f"IAM group {group_name} created on AWS.")
+            threader.add_thread(self._create_group, (group_name,))
+        # Error message (or None) of each group's first failed change
+        group_errors = threader.get_results(return_dict=True)
+
+        policy_arns = self._get_policy_arns()
+        threader = Threader(max_threads=aws.IAM_MAX_THREADS)
+        for group_name in group_names['ToCreate'] + group_names['ToUpdate']:
+            if group_errors.setdefault(group_name, None) is not None:
+                continue
+            attachment_diff = self._attachment_diffs[group_name]
+            for policy_name in attachment_diff['Attach']:
+                threader.add_thread(self._change_attachment,
+                    ((group_name, policy_arns[policy_name]), True))
+            for policy_name in attachment_diff['Detach']:
+                threader.add_thread(self._change_attachment, ((group_name,
+                    self._group_attachments[group_name][policy_name]), False))
+        for (group_name, _), error in threader.get_results(
+                return_dict=True).items():
+            if group_errors[group_name] is None:
+                group_errors[group_name] = error
 
+        for group_name in group_names['ToCreate']:
+            if group_errors[group_name] is None:
+                print(f"IAM group {group_name} created on AWS.")
+            else:
+                print(f"IAM group {group_name} not fully created on AWS:")
+                print(f"  {group_errors[group_name]}")
         for group_name in group_names['ToUpdate']:
-            self._update_group(group_name)
-            print(f"IAM group {group_name} on AWS updated.")
-
+            if group_errors[group_name] is None:
+                print(f"IAM group {group_name} on AWS updated.")
+            else:
+                print(f"IAM group {group_name} on AWS not fully updated:")
+                print(f"  {group_errors[group_name]}")
         for group_name in group_names['UpToDate']:
             print(f"IAM group {group_name} on AWS already up to date.")
 
+        if any(error is not None for error in group_errors.values()):
+            halt.err("Not all IAM groups were created/updated.")
+
 
     def delete_component(self):
         """remove policy(s) from group(s), then delete group(s)"""
-        aws_group_names = self._get_iam_group_names()
-        if not aws_group_names:
+        if not self._aws_group_names:
             print("No IAM groups on AWS to delete.")
 
-        for aws_group_name in aws_group_names:
-            self._delete_group(aws_group_name)
-            print(f"IAM group {aws_group_name} deleted from AWS.")
+        threader = Threader(max_threads=aws.IAM_MAX_THREADS)
+        for aws_group_name in self._aws_group_names:
+            threader.add_thread(self._delete_group, (aws_group_name,))
+        group_errors = threader.get_results(return_dict=True)
 
+        for aws_group_name in self._aws_group_names:
+            if group_errors[aws_group_name] is None:
+                print(f"IAM group {aws_group_name} deleted from AWS.")
+            else:
+                print(f"IAM group {aws_group_name} not deleted from AWS:")
+                print(f"  {group_errors[aws_group_name]}")
 
-    def _create_group(self, group_name):
-        """create new IAM group on AWS"""
-        self._iam_client.create_group(
-            Path=self._path_prefix,
-            GroupName=group_name
-        )
-        self._attach_group_policies(group_name)
+        if any(error is not None for error in group_errors.values()):
+            halt.err("Not all IAM groups were deleted.")
 
 
-    def _update_group(self, group_name):
-        """update IAM policy attachments for IAM group already on AWS"""
-        self._detach_group_policies(group_name)
-        self._attach_group_policies(group_name)
+    def _create_group(self, group_name):
+        """create new IAM group on AWS
+
+        Returns:
+            str/None: Error message, or None if group was created.
+        """
+        try:
+            self._iam_client.create_group(
+                Path=self._path_prefix,
+                GroupName=group_name
+            )
+        except ClientError as e:
+            return str(e)
+        return None
 
 
     def _delete_group(self, group_name):
-        """delete IAM group from AWS"""
-        self._detach_group_policies(group_name)
-        self._iam_client.delete_group(GroupName=group_name)
-
-
-    def _attach_group_policies(self, group_name):
-        """attach IAM policy(s) described in _iam_group_setup to group"""
-        policy_names = self._iam_group_setup[group_name]['Policies']
-        aws_policies = self._iam_client.list_policies(
-            Scope="Local",
-            OnlyAttached=False,
-            PathPrefix=self._path_prefix
-        )['Policies']
-
-        for policy_name in policy_names:
-            aws_policy_arn = next(aws_policy['Arn'] for aws_policy in
-                aws_policies if aws_policy['PolicyName'] == policy_name)
-            self._iam_client.attach_group_policy(
-                GroupName=group_name,
-                PolicyArn=aws_policy_arn
-            )
+        """detach IAM policy(s) from IAM group, then delete the group
+
+        Returns:
+            str/None: Error message, or None if group was deleted.
+        """
+        try:
+            # Listed again, as deleting namespace policies detaches them
+            for policy_arn in self._get_group_attachments(
+                    group_name).values():
+                self._detach_group_policy(group_name, policy_arn)
+            self._iam_client.delete_group(GroupName=group_name)
+        except ClientError as e:
+            return str(e)
+        return None
+
 
+    def _change_attachment(self, attachment, attach):
+        """attach IAM policy to (or detach from) IAM group
 
-    def _detach_group_policies(self, group_name):
-        """detach IAM policy(s) from IAM group"""
-        attached_policies = self._iam_client.list_attached_group_policies(
+        Args:
+            attachment (tuple): IAM group name and IAM policy ARN.
+            attach (bool): Attach policy if True, detach if False.
+
+        Returns:
+            str/None: Error message, or None if attachment was changed.
+        """
+        group_name, policy_arn = attachment
+        try:
+            if attach is True:
+                self._attach_group_policy(group_name, policy_arn)
+            else:
+                self._detach_group_policy(group_name, policy_arn)
+        except ClientError as e:
+            return str(e)
+        return None
+
+
+    def _attach_group_policy(self, group_name, policy_arn):
+        """attach IAM policy to IAM group"""
+        self._iam_client.attach_group_policy(
             GroupName=group_name,
-            PathPrefix=self._path_prefix
-        )['AttachedPolicies']
-        policy_arns = [policy['PolicyArn'] for policy in attached_policies]
-        for policy_arn in policy_arns:
-            self._iam_client.detach_group_policy(
-                GroupName=group_name,
-                PolicyArn=policy_arn
-            )
+            PolicyArn=policy_arn
+        )
+
+
+    def _detach_group_policy(self, group_name, policy_arn):
+        """detach IAM policy from IAM group"""
+        self._iam_client.detach_group_policy(
+            GroupName=group_name,
+            PolicyArn=policy_arn
+        )
 
 
-    def _get_iam_group_names(self):
-        """return name(s) of namespace IAM group(s) on AWS"""
-        aws_iam_groups = self._iam_client.list_groups(
-            PathPrefix=self._path_prefix)['Groups']
-        return [iam_group['GroupName'] for iam_group in aws_iam_groups]
+    def _get_group_attachments(self, group_name):
+        """return namespace IAM policy(s) attached to group, name to ARN"""
+        paginator = self._iam_client.get_paginator(
+            "list_attached_group_policies")
+        return {policy['PolicyName']: policy['PolicyArn']
+            for page in paginator.paginate(
+                GroupName=group_name, PathPrefix=self._path_prefix)
+            for policy in page['AttachedPolicies']}
+
+
+    def _get_policy_arns(self):
+        """return ARNs of namespace IAM policy(s) on AWS, keyed by name"""
+        paginator = self._iam_client.get_paginator("list_policies")
+        return {policy['PolicyName']: policy['Arn']
+            for page in paginator.paginate(
+                Scope="Local",
+                OnlyAttached=False,
+                PathPrefix=self._path_prefix
+            ) for policy in page['Policies']}
 
 
     @classmethod
     def blocked_actions(cls, sub_command):
-        cls.describe_actions = [
-            "iam:ListGroups",
-            "iam:ListAttachedGroupPolicies"
-        ]
+        cls.describe_actions = ["iam:GetAccountAuthorizationDetails"]
         cls.upload_actions = [
             "iam:CreateGroup",
             "iam:ListPolicies",
@@ -170,6 +265,7 @@ class IAMGroupSetup(ComponentSetup):
             "iam:DetachGroupPolicy"
         ]
         cls.delete_actions = [
+            "iam:ListAttachedGroupPolicies",
             "iam:DetachGroupPolicy",
             "iam:DeleteGroup"
         ]
@@ -1,10 +1,14 @@
 import json
-from deepdiff import DeepDiff
+from botocore.exceptions import ClientError
 
 from ec2mc import consts
 from ec2mc.utils import aws
+from ec2mc.utils import canonical
+from ec2mc.utils import halt
+from ec2mc.utils import iam_snapshot
 from ec2mc.utils import os2
 from ec2mc.utils.base_classes import ComponentSetup
+from ec2mc.utils.threader import Threader
 
 class IAMPolicySetup(ComponentSetup):
 
@@ -26,8 +30,12 @@ class IAMPolicySetup(ComponentSetup):
                 'ToUpdate': Policies on AWS not the same as local versions.
                 'UpToDate': Policies on AWS up to date with local versions.
         """
-        # IAM Policies already present on AWS
-        aws_policies = self._get_iam_policies()
+        # IAM Policies already present on AWS (with their default versions'
+        # documents), reused by upload and delete
+        self._aws_policies = list(iam_snapshot.shared().policies.values())
+        aws_policies = self._aws_policies
+        # Statements unique to local and AWS versions of outdated policies
+        self._policy_diffs = {}
 
         # Names of local policies described in aws_setup.json
         policy_names = {
@@ -55,21 +63,18 @@ class IAMPolicySetup(ComponentSetup):
         for local_policy in policy_names['ToUpdate'][:]:
             local_policy_document = os2.parse_json(
                 self._policy_dir / f"{local_policy}.json")
+            aws_policy_document = self._aws_policy(local_policy)['Document']
 
-            aws_policy_desc = next(aws_policy for aws_policy in aws_policies
-                if aws_policy['PolicyName'] == local_policy)
-            aws_policy_document = self._iam_client.get_policy_version(
-                PolicyArn=aws_policy_desc['Arn'],
-                VersionId=aws_policy_desc['DefaultVersionId']
-            )['PolicyVersion']['Document']
+            local_canonical = canonical.policy_document(local_policy_document)
+            aws_canonical = canonical.policy_document(aws_policy_document)
 
-            policy_differences = DeepDiff(
-                local_policy_document, aws_policy_document, ignore_order=True)
-
-            if not policy_differences:
+            if canonical.equal(local_canonical, aws_canonical):
                 # Local policy and AWS policy match, so no need to update
                 policy_names['ToUpdate'].remove(local_policy)
                 policy_names['UpToDate'].append(local_policy)
+            else:
+                self._policy_diffs[local_policy] = canonical.diff(
+                    local_canonical['Statement'], aws_canonical['Statement'])
 
         return policy_names
 
@@ -81,6 +86,9 @@ class IAMPolicySetup(ComponentSetup):
             print(f"IAM policy {policy} not found from AWS.")
         for policy in policy_names['ToUpdate']:
             print(f"IAM policy {policy} on AWS to be updated.")
+            local_only, aws_only = self._policy_diffs[policy]
+            print(f"  {len(local_only)} statement(s) to be added, "
+                f"{len(aws_only)} to be removed.")
         for policy in policy_names['UpToDate']:
             print(f"IAM policy {policy} on AWS is up to date.")
 
@@ -91,66 +99,116 @@ class IAMPolicySetup(ComponentSetup):
         Args:
             policy_names (dict): See what check_component returns.
         """
+        threader = Threader(max_threads=aws.IAM_MAX_THREADS)
         for local_policy in policy_names['ToCreate']:
-            self._create_policy(local_policy)
-            print(f"IAM policy {local_policy} created on AWS.")
+            threader.add_thread(self._create_policy, (local_policy,))
+        for local_policy in policy_names['ToUpdate']:
+            threader.add_thread(self._update_policy, (local_policy,))
+        policy_errors = threader.get_results(return_dict=True)
 
-        aws_policies = self._get_iam_policies()
+        for local_policy in policy_names['ToCreate']:
+            if policy_errors[local_policy] is None:
+                print(f"IAM policy {local_policy} created on AWS.")
+            else:
+                print(f"IAM policy {local_policy} not created on AWS:")
+                print(f"  {policy_errors[local_policy]}")
         for local_policy in policy_names['ToUpdate']:
-            self._update_policy(local_policy, aws_policies)
-            print(f"IAM policy {local_policy} on AWS updated.")
+            if policy_errors[local_policy] is None:
+                print(f"IAM policy {local_policy} on AWS updated.")
+            else:
+                print(f"IAM policy {local_policy} on AWS not updated:")
+                print(f"  {policy_errors[local_policy]}")
 
         for local_policy in policy_names['UpToDate']:
             print(f"IAM policy {local_policy} on AWS already up to date.")
 
+        if any(error is not None for error in policy_errors.values()):
+            halt.err("Not all IAM policies were created/updated.")
+
 
     def delete_component(self):
         """remove attachments, delete old versions, then delete policies"""
-        aws_policies = self._get_iam_policies()
-        if not aws_policies:
+        if not self._aws_policies:
             print("No IAM policies on AWS to delete.")
 
-        for aws_policy in aws_policies:
-            self._delete_policy(aws_policy['Arn'])
-            print(f"IAM policy {aws_policy['PolicyName']} deleted from AWS.")
+        threader = Threader(max_threads=aws.IAM_MAX_THREADS)
+        for aws_policy in self._aws_policies:
+            threader.add_thread(self._delete_policy, (aws_policy['Arn'],))
+        policy_errors = threader.get_results(return_dict=True)
+
+        for aws_policy in self._aws_policies:
+            policy_error = policy_errors[aws_policy['Arn']]
+            if policy_error is None:
+                print(f"IAM policy {aws_policy['PolicyName']} deleted from "
+                    "AWS.")
+            else:
+                print(f"IAM policy {aws_policy['PolicyName']} not deleted "
+                    "from AWS:")
+                print(f"  {policy_error}")
+
+        if any(error is not None for error in policy_errors.values()):
+            halt.err("Not all IAM policies were deleted.")
 
 
     def _create_policy(self, policy_name):
-        """create new IAM policy on AWS"""
+        """create new IAM policy on AWS, and add it to cached listing
+
+        Returns:
+            str/None: Error message, or None if policy was created.
+        """
         local_policy_document = os2.parse_json(
             self._policy_dir / f"{policy_name}.json")
         policy_description = self._iam_policy_setup[policy_name]
 
-        self._iam_client.create_policy(
-            PolicyName=policy_name,
-            Path=self._path_prefix,
-            PolicyDocument=json.dumps(local_policy_document),
-            Description=policy_description
-        )
+        try:
+            aws_policy = self._iam_client.create_policy(
+                PolicyName=policy_name,
+                Path=self._path_prefix,
+                PolicyDocument=json.dumps(local_policy_document),
+                Description=policy_description
+            )['Policy']
+        except ClientError as e:
+            return str(e)
+        self._aws_policies.append(aws_policy)
+        return None
+
 
+    def _update_policy(self, policy_name):
+        """update IAM policy that already exists on AWS
 
-    def _update_policy(self, policy_name, aws_policies):
-        """update IAM policy that already exists on AWS"""
+        Returns:
+            str/None: Error message, or None if policy was updated.
+        """
         local_policy_document = os2.parse_json(
             self._policy_dir / f"{policy_name}.json")
-
-        aws_policy = next(aws_policy for aws_policy in aws_policies
-            if aws_policy['PolicyName'] == policy_name)
-
-        # Delete beforehand to avoid error of 5 versions already existing
-        self._delete_old_policy_versions(aws_policy['Arn'])
-        self._iam_client.create_policy_version(
-            PolicyArn=aws_policy['Arn'],
-            PolicyDocument=json.dumps(local_policy_document),
-            SetAsDefault=True
-        )
+        aws_policy = self._aws_policy(policy_name)
+
+        try:
+            # Delete beforehand to avoid error of 5 versions already existing
+            self._delete_old_policy_versions(aws_policy['Arn'])
+            self._iam_client.create_policy_version(
+                PolicyArn=aws_policy['Arn'],
+                PolicyDocument=json.dumps(local_policy_document),
+                SetAsDefault=True
+            )
+        except ClientError as e:
+            return str(e)
+        return None
 
 
     def _delete_policy(self, policy_arn):
-        """delete IAM policy from AWS"""
-        self._remove_attachments(policy_arn)
-        self._delete_old_policy_versions(policy_arn)
-        self._iam_client.delete_policy(PolicyArn=policy_arn)
+        """delete IAM policy from AWS
+
+        Returns:
+            str/None: Error message, or None if policy was deleted.
+        """
+        try:
+            self._remove_attachments(policy_arn)
+            self._delete_old_policy_versions(policy_arn)
+            self._iam_client.delete_policy(PolicyArn=policy_arn)
+        except ClientError as e:
+            return str(e)
+        return None
 
 
     def _delete_old_policy_versions(self, policy_arn):
@@ -190,21 +248,17 @@ class IAMPolicySetup(ComponentSetup):
             )
 
 
-    def _get_iam_policies(self):
-        """return namespace IAM policy(s) on AWS"""
-        return self._iam_client.list_policies(
-            Scope="Local",
-            OnlyAttached=False,
-            PathPrefix=self._path_prefix
-        )['Policies']
+    def _aws_policy(self, policy_name):
+        """return IAM policy description from cached listing"""
+        return next(aws_policy for aws_policy in self._aws_policies
+            if aws_policy['PolicyName'] == policy_name)
 
 
     @classmethod
     def blocked_actions(cls, sub_command):
         cls.describe_actions = [
-            "iam:ListPolicies",
-            "iam:ListPolicyVersions",
-            "iam:GetPolicyVersion"
+            "iam:GetAccountAuthorizationDetails",
+            "iam:ListPolicyVersions"
         ]
         cls.upload_actions = [
             "iam:CreatePolicy",
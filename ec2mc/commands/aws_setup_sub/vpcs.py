@@ -1,7 +1,6 @@
-from deepdiff import DeepDiff
-
 from ec2mc import consts
 from ec2mc.utils import aws
+from ec2mc.utils import canonical
 from ec2mc.utils import halt
 from ec2mc.utils import os2
 from ec2mc.utils.base_classes import ComponentSetup
@@ -21,6 +20,7 @@ class VPCSetup(ComponentSetup):
             tuple:
                 dict: Which regions namespace VPC exists in.
                     'ToCreate' (list): AWS region(s) to create VPC in.
+                    'ToRepair' (list): AWS region(s) with incomplete VPC.
                     'Existing' (list): AWS region(s) already containing VPC.
                 dict: VPC security group status(es) for each region.
                     Name of security group (dict):
@@ -32,7 +32,8 @@ class VPCSetup(ComponentSetup):
 
         # Region(s) to create VPC in, and region(s) already containing VPC
         vpc_regions = {
-            'ToCreate': list(regions),
+            'ToCreate': [],
+            'ToRepair': [],
             'Existing': []
         }
 
@@ -43,50 +44,44 @@ class VPCSetup(ComponentSetup):
             'UpToDate': []
         } for sg_name in self._security_group_setup}
 
-        vpc_threader = Threader()
+        threader = Threader()
         for region in regions:
-            vpc_threader.add_thread(aws.get_region_vpc, (region,))
-        # VPCs already present in AWS regions
-        aws_vpcs = vpc_threader.get_results(return_dict=True)
+            threader.add_thread(self._region_topology, (region,))
+        # Namespace VPC topology of each region, reused by upload and delete
+        self._topologies = threader.get_results(return_dict=True)
 
-        # Check each region has VPC with correct Name tag value
         for region in regions:
-            if aws_vpcs[region] is not None:
-                if ({'Key': "Name", 'Value': consts.NAMESPACE}
-                        in aws_vpcs[region]['Tags']):
-                    vpc_regions['ToCreate'].remove(region)
-                    vpc_regions['Existing'].append(region)
-        # TODO: Detect and repair incomplete VPCs (missing subnets, etc.)
+            topology = self._topologies[region]
+            if topology['Vpc'] is None:
+                vpc_regions['ToCreate'].append(region)
+            elif self._missing_vpc_parts(topology):
+                vpc_regions['ToRepair'].append(region)
+            else:
+                vpc_regions['Existing'].append(region)
 
-        sg_threader = Threader()
-        for region in regions:
-            if aws_vpcs[region] is not None:
-                sg_threader.add_thread(aws.get_vpc_security_groups,
-                    (region, aws_vpcs[region]['VpcId']))
-        # VPC security groups already present in AWS regions
-        aws_sgs = sg_threader.get_results(return_dict=True)
+        # Rules unique to local and AWS versions of outdated SGs
+        self._sg_diffs = {}
 
         # Check each region for VPC SG(s) described by aws_setup.json
         for sg_name, sg_regions in sg_names.items():
+            local_sg_ingress = canonical.ip_permissions(
+                self._get_json_sg_ingress(sg_name))
             for region in regions:
-                if aws_vpcs[region] is not None:
-                    if any(aws_sg['GroupName'] == sg_name
-                            for aws_sg in aws_sgs[region]):
-                        sg_regions['ToCreate'].remove(region)
-                        sg_regions['ToUpdate'].append(region)
-
-                # Check if existing VPC SG needs to be updated
-                if region in sg_regions['ToUpdate']:
-                    local_sg_ingress = self._get_json_sg_ingress(sg_name)
-                    aws_sg_ingress = next(sg['IpPermissions'] for sg
-                        in aws_sgs[region] if sg['GroupName'] == sg_name)
-
-                    sg_ingress_diffs = DeepDiff(
-                        local_sg_ingress, aws_sg_ingress, ignore_order=True)
-
-                    if not sg_ingress_diffs:
-                        sg_regions['ToUpdate'].remove(region)
-                        sg_regions['UpToDate'].append(region)
+                aws_sg = next((sg for sg
+                    in self._topologies[region]['SecurityGroups']
+                    if sg['GroupName'] == sg_name), None)
+                if aws_sg is None:
+                    continue
+                sg_regions['ToCreate'].remove(region)
+
+                aws_sg_ingress = canonical.ip_permissions(
+                    aws_sg['IpPermissions'])
+                if canonical.equal(local_sg_ingress, aws_sg_ingress):
+                    sg_regions['UpToDate'].append(region)
+                else:
+                    sg_regions['ToUpdate'].append(region)
+                    self._sg_diffs[(sg_name, region)] = canonical.diff(
+                        local_sg_ingress, aws_sg_ingress)
 
         return (vpc_regions, sg_names)
 
@@ -95,9 +90,14 @@ class VPCSetup(ComponentSetup):
         vpc_regions, sg_names = vpc_and_sg_info
 
         total_regions = len(consts.REGIONS)
-        existing = len(vpc_regions['Existing'])
+        to_repair_num = len(vpc_regions['ToRepair'])
+        existing = len(vpc_regions['Existing']) + to_repair_num
         print(f"VPC {consts.NAMESPACE} exists in {existing} of "
             f"{total_regions} AWS regions.")
+        for region in vpc_regions['ToRepair']:
+            missing_parts = self._missing_vpc_parts(self._topologies[region])
+            print(f"  VPC in {region} to be repaired (missing "
+                f"{', '.join(missing_parts)}).")
 
         for sg_name, sg_regions in sg_names.items():
             to_update_num = len(sg_regions['ToUpdate'])
@@ -107,10 +107,14 @@ class VPCSetup(ComponentSetup):
             if to_update_num > 0:
                 print(f"  SG to be updated in {to_update_num} of "
                     f"{exists_num} AWS regions.")
+            for region in sg_regions['ToUpdate']:
+                local_only, aws_only = self._sg_diffs[(sg_name, region)]
+                print(f"    {region}: {len(local_only)} rule(s) to be "
+                    f"added, {len(aws_only)} to be removed.")
 
 
     def upload_component(self, vpc_and_sg_info):
-        """create VPC(s) and create/update SG(s) in AWS region(s)
+        """create/repair VPC(s) and create/update SG(s) in AWS region(s)
 
         Args:
             vpc_and_sg_info (dict): See what check_component returns.
@@ -119,24 +123,30 @@ class VPCSetup(ComponentSetup):
 
         vpc_threader = Threader()
         for region in vpc_regions['ToCreate']:
-            vpc_threader.add_thread(self._create_vpc, (region,))
-        vpc_threader.get_results()
+            vpc_threader.add_thread(self._create_vpc,
+                (region, self._topologies[region]))
+        for region in vpc_regions['ToRepair']:
+            vpc_threader.add_thread(self._complete_vpc,
+                (region, self._topologies[region]))
+        # IDs of created/repaired VPCs, along with complete existing VPCs
+        vpc_ids = vpc_threader.get_results(return_dict=True)
+        for region in vpc_regions['Existing']:
+            vpc_ids[region] = self._topologies[region]['Vpc']['VpcId']
 
         create_num = len(vpc_regions['ToCreate'])
+        repair_num = len(vpc_regions['ToRepair'])
         if create_num > 0:
             print(f"VPC {consts.NAMESPACE} created in {create_num} region(s).")
-        else:
+        if repair_num > 0:
+            print(f"VPC {consts.NAMESPACE} repaired in "
+                f"{repair_num} region(s).")
+        if create_num == 0 and repair_num == 0:
             print(f"VPC {consts.NAMESPACE} already present "
                 "in whitelisted region(s).")
 
-        vpc_ids = {}
-        threader = Threader()
         for region in consts.REGIONS:
-            threader.add_thread(aws.get_region_vpc, (region,))
-        for region, vpc in threader.get_results(return_dict=True).items():
-            if vpc is None:
+            if region not in vpc_ids:
                 halt.err(f"Namespace VPC not created in {region} region.")
-            vpc_ids[region] = vpc['VpcId']
 
         sg_threader = Threader()
         for sg_name, sg_regions in sg_names.items():
@@ -145,8 +155,11 @@ class VPCSetup(ComponentSetup):
                 sg_threader.add_thread(self._create_sg,
                     (region, sg_name, sg_desc, vpc_ids[region]))
             for region in sg_regions['ToUpdate']:
+                aws_sg = next(sg for sg
+                    in self._topologies[region]['SecurityGroups']
+                    if sg['GroupName'] == sg_name)
                 sg_threader.add_thread(self._update_sg,
-                    (region, sg_name, vpc_ids[region]))
+                    (region, sg_name, aws_sg))
         sg_threader.get_results()
 
         for sg_name, sg_regions in sg_names.items():
@@ -165,7 +178,8 @@ class VPCSetup(ComponentSetup):
         """delete VPC(s) and associated SG(s) from AWS"""
         threader = Threader()
         for region in consts.REGIONS:
-            threader.add_thread(self._delete_region_vpc, (region,))
+            threader.add_thread(self._delete_region_vpc,
+                (region, self._topologies[region]))
         deleted_vpcs = threader.get_results()
 
         if any(deleted_vpcs):
@@ -175,127 +189,255 @@ class VPCSetup(ComponentSetup):
             print("No VPCs to delete.")
 
 
-    @classmethod
-    def _create_vpc(cls, region):
-        """create VPC with subnet(s) in region and attach tags"""
-        ec2_client = aws.ec2_client(region)
-        vpc_id = ec2_client.create_vpc(
-            CidrBlock="172.31.0.0/16",
-            AmazonProvidedIpv6CidrBlock=False
-        )['Vpc']['VpcId']
-        aws.attach_tags(region, vpc_id, consts.NAMESPACE)
-        ec2_client.modify_vpc_attribute(
-            EnableDnsSupport={'Value': True},
-            VpcId=vpc_id
-        )
-        ec2_client.modify_vpc_attribute(
-            EnableDnsHostnames={'Value': True},
-            VpcId=vpc_id
-        )
+    @staticmethod
+    def _region_topology(region):
+        """describe namespace VPC of region, along with what's attached to it
 
-        route_table_id = cls._create_internet_gateway(region, vpc_id)
-        cls._create_vpc_subnets(region, vpc_id, route_table_id)
+        Requires ec2:DescribeVpcs, ec2:DescribeAvailabilityZones,
+        ec2:DescribeInternetGateways, ec2:DescribeRouteTables,
+        ec2:DescribeSubnets, ec2:DescribeSecurityGroups, and
+        ec2:DescribeVpcEndpoints permissions.
+
+        Returns:
+            dict: Snapshot of region's namespace VPC topology.
+                'Vpc' (dict/None): Namespace VPC, if it exists.
+                'AvailabilityZones' (list[dict]): Region's AZ(s).
+                'InternetGateways' (list[dict]): IGW(s) attached to VPC.
+                'MainRouteTable' (dict/None): VPC's main route table.
+                'Subnets' (list[dict]): VPC's subnet(s).
+                'SecurityGroups' (list[dict]): VPC's non-default SG(s).
+                'S3Endpoint' (dict/None): VPC's gateway endpoint to S3,
+                    which instances download artifacts through.
+        """
+        ec2_client = aws.ec2_client(region)
+        topology = {
+            'Vpc': aws.get_region_vpc(region),
+            'AvailabilityZones': ec2_client.describe_availability_zones(
+                )['AvailabilityZones'],
+            'InternetGateways': [],
+            'MainRouteTable': None,
+            'Subnets': [],
+            'SecurityGroups': [],
+            'S3Endpoint': None
+        }
+        if topology['Vpc'] is None:
+            return topology
+
+        vpc_filter = {'Name': "vpc-id", 'Values': [topology['Vpc']['VpcId']]}
+        topology['InternetGateways'] = ec2_client.describe_internet_gateways(
+            Filters=[{**vpc_filter, 'Name': "attachment.vpc-id"}]
+        )['InternetGateways']
+        main_route_tables = ec2_client.describe_route_tables(Filters=[
+            vpc_filter,
+            {'Name': "association.main", 'Values': ["true"]}
+        ])['RouteTables']
+        if main_route_tables:
+            topology['MainRouteTable'] = main_route_tables[0]
+        topology['Subnets'] = ec2_client.describe_subnets(
+            Filters=[vpc_filter])['Subnets']
+        topology['SecurityGroups'] = aws.get_vpc_security_groups(
+            region, topology['Vpc']['VpcId'])
+        topology['S3Endpoint'] = aws.get_vpc_s3_endpoint(
+            region, topology['Vpc']['VpcId'])
+        return topology
 
 
     @classmethod
-    def _delete_region_vpc(cls, region):
-        """delete VPC from AWS region with correct namespace tag"""
-        region_vpc = aws.get_region_vpc(region)
-        if region_vpc is not None:
-            cls._delete_vpc_sgs(region, region_vpc['VpcId'])
-            cls._delete_vpc_subnets(region, region_vpc['VpcId'])
-            cls._delete_vpc_internet_gateways(region, region_vpc['VpcId'])
-            aws.ec2_client(region).delete_vpc(VpcId=region_vpc['VpcId'])
-            return True
-        return False
+    def _missing_vpc_parts(cls, topology):
+        """return descriptions of what an existing VPC's topology lacks"""
+        missing_parts = []
+        if not topology['InternetGateways']:
+            missing_parts.append("internet gateway")
+        if cls._internet_route(topology) is None:
+            missing_parts.append("internet route")
+        if cls._missing_subnet_azs(topology):
+            missing_parts.append("subnet(s)")
+        if any(not subnet['MapPublicIpOnLaunch']
+                for subnet in topology['Subnets']):
+            missing_parts.append("subnet public IP mapping")
+        if not cls._s3_endpoint_routed(topology):
+            missing_parts.append("S3 endpoint")
+        return missing_parts
 
 
     @staticmethod
-    def _create_internet_gateway(region, vpc_id):
-        """create internet gateway, attach it to VPC, and configure route"""
-        ec2_client = aws.ec2_client(region)
-        ig_id = ec2_client.create_internet_gateway(
-            )['InternetGateway']['InternetGatewayId']
-        aws.attach_tags(region, ig_id, consts.NAMESPACE)
-        ec2_client.attach_internet_gateway(
-            InternetGatewayId=ig_id,
-            VpcId=vpc_id
-        )
+    def _s3_endpoint_routed(topology):
+        """return whether S3 endpoint exists and is in main route table"""
+        if topology['S3Endpoint'] is None:
+            return False
+        if topology['MainRouteTable'] is None:
+            return False
+        return (topology['MainRouteTable']['RouteTableId'] in
+            topology['S3Endpoint']['RouteTableIds'])
 
-        # VPC's automatically created main route table is used
-        rt_id = ec2_client.describe_route_tables(Filters=[
-            {'Name': "vpc-id", 'Values': [vpc_id]},
-            {'Name': "association.main", 'Values': ["true"]}
-        ])['RouteTables'][0]['RouteTableId']
-        aws.attach_tags(region, rt_id, consts.NAMESPACE)
-        ec2_client.create_route(
-            DestinationCidrBlock="0.0.0.0/0",
-            GatewayId=ig_id,
-            RouteTableId=rt_id
-        )
 
-        return rt_id
+    @staticmethod
+    def _internet_route(topology):
+        """return main route table's route to an attached IGW, if present"""
+        if topology['MainRouteTable'] is None:
+            return None
+        ig_ids = [gateway['InternetGatewayId']
+            for gateway in topology['InternetGateways']]
+        return next((route for route in topology['MainRouteTable']['Routes']
+            if route.get('DestinationCidrBlock') == "0.0.0.0/0" and
+            route.get('GatewayId') in ig_ids), None)
 
 
     @staticmethod
-    def _delete_vpc_internet_gateways(region, vpc_id):
-        """detach (and delete) internet gateway(s) attached (solely) to VPC"""
+    def _missing_subnet_azs(topology):
+        """return (AZ index, AZ name) of available AZs lacking a VPC subnet
+
+        Each AZ's index within the region determines its subnet's CIDR block.
+        """
+        subnet_azs = [subnet['AvailabilityZone']
+            for subnet in topology['Subnets']]
+        return [(index, az['ZoneName'])
+            for index, az in enumerate(topology['AvailabilityZones'])
+            if az['State'] == "available" and index * 16 < 256 and
+            az['ZoneName'] not in subnet_azs]
+
+
+    @classmethod
+    def _create_vpc(cls, region, topology):
+        """create tagged VPC with subnet(s) in region, and return ID"""
         ec2_client = aws.ec2_client(region)
-        gateways = ec2_client.describe_internet_gateways(Filters=[
-            {'Name': "attachment.vpc-id", 'Values': [vpc_id]}
-        ])['InternetGateways']
+        vpc = ec2_client.create_vpc(
+            CidrBlock="172.31.0.0/16",
+            AmazonProvidedIpv6CidrBlock=False,
+            TagSpecifications=aws.tag_specifications("vpc", consts.NAMESPACE)
+        )['Vpc']
+        ec2_client.modify_vpc_attribute(
+            EnableDnsSupport={'Value': True},
+            VpcId=vpc['VpcId']
+        )
+        ec2_client.modify_vpc_attribute(
+            EnableDnsHostnames={'Value': True},
+            VpcId=vpc['VpcId']
+        )
 
-        for gateway in gateways:
-            ec2_client.detach_internet_gateway(
-                InternetGatewayId=gateway['InternetGatewayId'],
-                VpcId=vpc_id
-            )
-            # Only delete gateway if attached solely to namespace VPC
-            if len(gateway['Attachments']) == 1:
-                ec2_client.delete_internet_gateway(
-                    InternetGatewayId=gateway['InternetGatewayId'])
+        # A new VPC lacks everything _complete_vpc creates
+        return cls._complete_vpc(region, {**topology, 'Vpc': vpc})
 
 
-    @staticmethod
-    def _create_vpc_subnets(region, vpc_id, rt_id):
-        """create VPC subnet in AWS region for each availability zone
+    @classmethod
+    def _complete_vpc(cls, region, topology):
+        """create what VPC's topology lacks, and return VPC's ID
 
         Args:
-            region (str): Region to create subnets in.
-            vpc_id (str): ID of VPC to create subnets under.
-            rt_id (str): ID of route table to attach subnets to.
+            region (str): Region the VPC resides in.
+            topology (dict): See what _region_topology returns.
         """
         ec2_client = aws.ec2_client(region)
-        azs = ec2_client.describe_availability_zones()['AvailabilityZones']
-        for index, az in enumerate(azs):
-            if az['State'] != "available":
-                continue
-            if index * 16 >= 256:
-                break
+        vpc_id = topology['Vpc']['VpcId']
+
+        internet_route = cls._internet_route(topology)
+        if topology['InternetGateways']:
+            ig_id = topology['InternetGateways'][0]['InternetGatewayId']
+        else:
+            ig_id = ec2_client.create_internet_gateway(
+                TagSpecifications=aws.tag_specifications(
+                    "internet-gateway", consts.NAMESPACE)
+            )['InternetGateway']['InternetGatewayId']
+            ec2_client.attach_internet_gateway(
+                InternetGatewayId=ig_id,
+                VpcId=vpc_id
+            )
+
+        # VPC's automatically created main route table is used
+        route_table = topology['MainRouteTable']
+        if route_table is None:
+            route_table = ec2_client.describe_route_tables(Filters=[
+                {'Name': "vpc-id", 'Values': [vpc_id]},
+                {'Name': "association.main", 'Values': ["true"]}
+            ])['RouteTables'][0]
+            # Created along with the VPC, so can't be tagged on creation
+            aws.attach_tags(region, route_table['RouteTableId'],
+                consts.NAMESPACE)
+        if internet_route is None:
+            # Existing default route would be to a gateway no longer attached
+            if any(route.get('DestinationCidrBlock') == "0.0.0.0/0"
+                    for route in route_table['Routes']):
+                ec2_client.replace_route(
+                    DestinationCidrBlock="0.0.0.0/0",
+                    GatewayId=ig_id,
+                    RouteTableId=route_table['RouteTableId']
+                )
+            else:
+                ec2_client.create_route(
+                    DestinationCidrBlock="0.0.0.0/0",
+                    GatewayId=ig_id,
+                    RouteTableId=route_table['RouteTableId']
+                )
+
+        for index, az_name in cls._missing_subnet_azs(topology):
             subnet_id = ec2_client.create_subnet(
-                AvailabilityZone=az['ZoneName'],
+                AvailabilityZone=az_name,
                 CidrBlock=f"172.31.{index*16}.0/20",
                 VpcId=vpc_id
             )['Subnet']['SubnetId']
-            ec2_client.modify_subnet_attribute(
-                MapPublicIpOnLaunch={'Value': True},
-                SubnetId=subnet_id
-            )
+            cls._map_public_ip(region, subnet_id)
             ec2_client.associate_route_table(
-                RouteTableId=rt_id,
+                RouteTableId=route_table['RouteTableId'],
                 SubnetId=subnet_id
             )
+        for subnet in topology['Subnets']:
+            if not subnet['MapPublicIpOnLaunch']:
+                cls._map_public_ip(region, subnet['SubnetId'])
+
+        if topology['S3Endpoint'] is None:
+            ec2_client.create_vpc_endpoint(
+                VpcEndpointType="Gateway",
+                VpcId=vpc_id,
+                ServiceName=f"com.amazonaws.{region}.s3",
+                RouteTableIds=[route_table['RouteTableId']],
+                TagSpecifications=aws.tag_specifications(
+                    "vpc-endpoint", consts.NAMESPACE)
+            )
+        elif not cls._s3_endpoint_routed(
+                {**topology, 'MainRouteTable': route_table}):
+            ec2_client.modify_vpc_endpoint(
+                VpcEndpointId=topology['S3Endpoint']['VpcEndpointId'],
+                AddRouteTableIds=[route_table['RouteTableId']]
+            )
+
+        return vpc_id
+
+
+    @staticmethod
+    def _map_public_ip(region, subnet_id):
+        """have instances launched in subnet be assigned public IPs"""
+        aws.ec2_client(region).modify_subnet_attribute(
+            MapPublicIpOnLaunch={'Value': True},
+            SubnetId=subnet_id
+        )
 
 
     @staticmethod
-    def _delete_vpc_subnets(region, vpc_id):
-        """delete VPC's subnet(s) from AWS region"""
+    def _delete_region_vpc(region, topology):
+        """delete namespace VPC and what's attached to it from AWS region"""
+        if topology['Vpc'] is None:
+            return False
+
         ec2_client = aws.ec2_client(region)
-        vpc_subnets = ec2_client.describe_subnets(Filters=[
-            {'Name': "vpc-id", 'Values': [vpc_id]}
-        ])['Subnets']
-        for vpc_subnet in vpc_subnets:
+        vpc_id = topology['Vpc']['VpcId']
+        if topology['S3Endpoint'] is not None:
+            ec2_client.delete_vpc_endpoints(VpcEndpointIds=[
+                topology['S3Endpoint']['VpcEndpointId']])
+        for aws_sg in topology['SecurityGroups']:
+            ec2_client.delete_security_group(GroupId=aws_sg['GroupId'])
+        for vpc_subnet in topology['Subnets']:
             ec2_client.delete_subnet(SubnetId=vpc_subnet['SubnetId'])
+        for gateway in topology['InternetGateways']:
+            ec2_client.detach_internet_gateway(
+                InternetGatewayId=gateway['InternetGatewayId'],
+                VpcId=vpc_id
+            )
+            # Only delete gateway if attached solely to namespace VPC
+            if len(gateway['Attachments']) == 1:
+                ec2_client.delete_internet_gateway(
+                    InternetGatewayId=gateway['InternetGatewayId'])
+        ec2_client.delete_vpc(VpcId=vpc_id)
+        return True
 
 
     @classmethod
@@ -305,9 +447,10 @@ class VPCSetup(ComponentSetup):
         sg_id = ec2_client.create_security_group(
             Description=sg_desc,
             GroupName=sg_name,
-            VpcId=vpc_id
+            VpcId=vpc_id,
+            TagSpecifications=aws.tag_specifications(
+                "security-group", sg_name)
         )['GroupId']
-        aws.attach_tags(region, sg_id, sg_name)
 
         local_sg_ingress = cls._get_json_sg_ingress(sg_name)
         if local_sg_ingress:
@@ -318,18 +461,13 @@ class VPCSetup(ComponentSetup):
 
 
     @classmethod
-    def _update_sg(cls, region, sg_name, vpc_id):
+    def _update_sg(cls, region, sg_name, aws_sg):
         """update VPC security group that already exists on AWS"""
         ec2_client = aws.ec2_client(region)
-        aws_sgs = aws.get_vpc_security_groups(region, vpc_id)
-
-        sg_id = next(sg['GroupId'] for sg in aws_sgs
-            if sg['GroupName'] == sg_name)
-        aws_sg_ingress = next(sg['IpPermissions'] for sg in aws_sgs
-            if sg['GroupName'] == sg_name)
+        sg_id = aws_sg['GroupId']
         ec2_client.revoke_security_group_ingress(
             GroupId=sg_id,
-            IpPermissions=aws_sg_ingress
+            IpPermissions=aws_sg['IpPermissions']
         )
 
         local_sg_ingress = cls._get_json_sg_ingress(sg_name)
@@ -340,15 +478,6 @@ class VPCSetup(ComponentSetup):
             )
 
 
-    @staticmethod
-    def _delete_vpc_sgs(region, vpc_id):
-        """delete VPC's security group(s) from AWS region"""
-        ec2_client = aws.ec2_client(region)
-        aws_sgs = aws.get_vpc_security_groups(region, vpc_id)
-        for aws_sg in aws_sgs:
-            ec2_client.delete_security_group(GroupId=aws_sg['GroupId'])
-
-
     @staticmethod
     def _get_json_sg_ingress(sg_name):
         """retrieve local security group ingress rule(s) dict"""
@@ -364,7 +493,8 @@ class VPCSetup(ComponentSetup):
             "ec2:DescribeSecurityGroups",
             "ec2:DescribeAvailabilityZones",
             "ec2:DescribeRouteTables",
-            "ec2:DescribeInternetGateways"
+            "ec2:DescribeInternetGateways",
+            "ec2:DescribeVpcEndpoints"
         ]
         cls.upload_actions = [
             "ec2:CreateVpc",
@@ -374,12 +504,15 @@ class VPCSetup(ComponentSetup):
             "ec2:AttachInternetGateway",
             "ec2:CreateRouteTable",
             "ec2:CreateRoute",
+            "ec2:ReplaceRoute",
             "ec2:CreateSubnet",
             "ec2:ModifySubnetAttribute",
             "ec2:AssociateRouteTable",
             "ec2:CreateSecurityGroup",
             "ec2:RevokeSecurityGroupIngress",
             "ec2:AuthorizeSecurityGroupIngress",
+            "ec2:CreateVpcEndpoint",
+            "ec2:ModifyVpcEndpoint",
             "ec2:CreateTags"
         ]
         cls.delete_actions = [
@@ -387,6 +520,7 @@ class VPCSetup(ComponentSetup):
             "ec2:DeleteSubnet",
             "ec2:DetachInternetGateway",
             "ec2:DeleteInternetGateway",
+            "ec2:DeleteVpcEndpoints",
             "ec2:DeleteVpc"
         ]
         return super().blocked_actions(sub_command)
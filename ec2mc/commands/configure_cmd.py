@@ -1,6 +1,8 @@
 from ec2mc import consts
 from ec2mc.utils import os2
 from ec2mc.utils.base_classes import CommandBase
+from ec2mc.utils.find import find_closest_region
+from ec2mc.validate import validate_config
 
 class Configure(CommandBase):
 
@@ -23,6 +25,13 @@ class Configure(CommandBase):
         elif cmd_args.subcommand == "use_handler":
             config_dict['use_handler'] = cmd_args.boolean
             print(f"IP handler usage set to {str(cmd_args.boolean)}.")
+        elif cmd_args.subcommand == "s3_endpoint":
+            if cmd_args.url is not None:
+                config_dict['s3_endpoint_url'] = cmd_args.url
+                print("S3 endpoint URL set.")
+            else:
+                config_dict.pop('s3_endpoint_url', None)
+                print("S3 endpoint URL cleared.")
 
         os2.save_json(config_dict, consts.CONFIG_JSON)
 
@@ -40,10 +49,28 @@ class Configure(CommandBase):
 
     @staticmethod
     def _set_region_whitelist(config_dict, regions):
-        """set regions for config's region whitelist"""
+        """set regions for config's region whitelist
+
+        Regions measured faster than every specified region are suggested.
+        Every known region is re-measured first if its measurement is
+        stale, as the background refresh only covers whitelisted regions.
+        """
         if regions:
             config_dict['region_whitelist'] = list(set(regions))
             print("Region whitelist set.")
+            known_regions = sorted(set(
+                validate_config.cached_region_names()) | set(
+                find_closest_region.cached_latencies(stale_ok=True) or {}))
+            if known_regions and not find_closest_region.is_fresh(
+                    known_regions):
+                print("  Measuring latency to each AWS region...")
+                find_closest_region.refresh(known_regions)
+            faster_regions = find_closest_region.suggest_whitelist(regions)
+            if faster_regions:
+                print("  Following region(s) measured to have lower "
+                    "latency from you:")
+                for region in faster_regions[:3]:
+                    print(f"    {region}")
         else:
             config_dict.pop('region_whitelist', None)
             print("Region whitelist cleared.")
@@ -75,3 +102,9 @@ class Configure(CommandBase):
         use_handler_parser.add_argument(
             "-f", "--false", dest="boolean", action="store_false",
             help="do not use the handler")
+
+        s3_endpoint_parser = subcommands.add_parser(
+            "s3_endpoint", help="use an S3-compatible stand-in for AWS S3")
+        s3_endpoint_parser.add_argument(
+            "url", nargs="?",
+            help="endpoint URL of the stand-in (leave empty to clear)")
@@ -0,0 +1,17 @@
+from ec2mc.utils.base_classes import ParentCommand
+
+from ec2mc.commands.image_sub import list_cmd
+from ec2mc.commands.image_sub import bake_cmd
+from ec2mc.commands.image_sub import delete_cmd
+
+class Image(ParentCommand):
+
+    _sub_commands = [
+        list_cmd.ListImages,
+        bake_cmd.BakeImage,
+        delete_cmd.DeleteImage
+    ]
+
+    def main(self, cmd_args):
+        """manage AMIs baked from instance templates"""
+        super().main(cmd_args)
@@ -0,0 +1,181 @@
+from time import time
+from botocore.exceptions import WaiterError
+
+from ec2mc import consts
+from ec2mc.utils import aws
+from ec2mc.utils import halt
+from ec2mc.utils import os2
+from ec2mc.utils import user_data
+from ec2mc.utils.base_classes import CommandBase
+from ec2mc.utils.find import find_images
+from ec2mc.validate import validate_perms
+
+class BakeImage(CommandBase):
+
+    def __init__(self, cmd_args):
+        self._ec2_client = aws.ec2_client(cmd_args.region)
+
+
+    def main(self, cmd_args):
+        """bake an AMI from an instance template for faster server creation
+
+        A temporary instance is created from the template, and powered off
+        once its first boot finishes (packages installed, server jar
+        downloaded, EULA accepted, etc.). An AMI is then created from the
+        instance, the instance terminated, and any previously baked AMI
+        for the template deregistered.
+
+        Args:
+            cmd_args (namedtuple): See add_documentation method.
+        """
+        template_yaml_files = os2.dir_files(consts.USER_DATA_DIR)
+        if f"{cmd_args.template}.yaml" not in template_yaml_files:
+            halt.err(f"Template {cmd_args.template} not found from config.")
+
+        region = cmd_args.region
+        if region is None:
+            region = consts.REGIONS[0]
+
+        inst_template = os2.parse_yaml(consts.USER_DATA_DIR /
+            f"{cmd_args.template}.yaml")['ec2mc_template_info']
+        old_images = [image for image in find_images.probe_regions([region])
+            if image['template'] == cmd_args.template]
+
+        run_kwargs = self._parse_run_kwargs(
+            region, cmd_args.template, inst_template)
+        self._run_instance(run_kwargs, dry_run=True)
+
+        print("")
+        if cmd_args.confirm is False:
+            print("IAM permissions and instance template validated.")
+            print("Append the -c argument to confirm AMI baking.")
+            return
+
+        instance_id = self._run_instance(run_kwargs, dry_run=False)
+        print(f"Baking instance {instance_id} created.")
+        print("  Waiting for its first boot to finish...")
+        self._wait(instance_id, "instance_stopped", "Baking instance")
+
+        image_id = self._ec2_client.create_image(
+            InstanceId=instance_id,
+            Name=f"{consts.NAMESPACE}_{cmd_args.template}_{int(time())}",
+            Description=f"ec2mc {cmd_args.template} template",
+            NoReboot=True,
+            TagSpecifications=aws.tag_specifications(
+                "image", cmd_args.template)
+        )['ImageId']
+        print(f"AMI {image_id} being created from baking instance...")
+        self._wait(image_id, "image_available", "AMI")
+
+        self._ec2_client.terminate_instances(InstanceIds=[instance_id])
+        print("  AMI available. Baking instance terminated.")
+
+        for old_image in old_images:
+            aws.deregister_image(old_image['region'],
+                old_image['id'], old_image['snapshot_ids'])
+            print(f"  Previously baked AMI {old_image['id']} deregistered.")
+
+
+    @staticmethod
+    def _parse_run_kwargs(region, template_name, instance_template):
+        """parse arguments for run_instances from YAML instance template
+
+        Returns:
+            dict: Keyword arguments needed for baking instance creation.
+                'ami_id' (str): ID of base AMI (see consts.AMI_NAME).
+                'device_name' (str): Device Name of base AMI's root volume.
+                'instance_type' (str): EC2 instance type to bake with.
+                'volume_size' (int): EC2 instance volume size (GiB).
+                'sg_ids' (list[str]): ID(s) of VPC SG(s) to assign.
+                'subnet_id' (str): ID of VPC subnet to assign.
+                'user_data' (str): Template's user_data for baking.
+        """
+        vpc_info = aws.get_region_vpc(region)
+        if vpc_info is None:
+            halt.err(f"VPC {consts.NAMESPACE} not found from AWS region.",
+                "  Have you uploaded the AWS setup?")
+        vpc_id = vpc_info['VpcId']
+
+        base_image = find_images.base_image(region)
+        return {
+            'ami_id': base_image['ImageId'],
+            'device_name': base_image['RootDeviceName'],
+            'instance_type': instance_template['instance_type'],
+            'volume_size': instance_template['volume_size'],
+            'sg_ids': aws.get_vpc_sg_ids(
+                region, vpc_id, instance_template['security_groups']),
+            'subnet_id': aws.get_vpc_first_subnet_id(region, vpc_id),
+            'user_data': user_data.main(
+                template_name, instance_template, region, bake=True)
+        }
+
+
+    def _run_instance(self, run_kwargs, *, dry_run):
+        """create baking instance and return its ID"""
+        with aws.ClientErrorHalt(allow=["DryRunOperation"]):
+            return self._ec2_client.run_instances(
+                DryRun=dry_run,
+                MinCount=1, MaxCount=1,
+                ImageId=run_kwargs['ami_id'],
+                InstanceType=run_kwargs['instance_type'],
+                BlockDeviceMappings=[{
+                    'DeviceName': run_kwargs['device_name'],
+                    'Ebs': {'VolumeSize': run_kwargs['volume_size']}
+                }],
+                TagSpecifications=[{
+                    'ResourceType': "instance",
+                    'Tags': [{'Key': "Namespace", 'Value': consts.NAMESPACE}]
+                }],
+                SecurityGroupIds=run_kwargs['sg_ids'],
+                SubnetId=run_kwargs['subnet_id'],
+                UserData=run_kwargs['user_data']
+            )['Instances'][0]['InstanceId']
+
+
+    def _wait(self, resource_id, waiter_name, resource_desc):
+        """block for up to 30 minutes until waiter succeeds"""
+        id_kwarg = "InstanceIds"
+        if waiter_name.startswith("image"):
+            id_kwarg = "ImageIds"
+        try:
+            self._ec2_client.get_waiter(waiter_name).wait(
+                **{id_kwarg: [resource_id]},
+                WaiterConfig={'Delay': 15, 'MaxAttempts': 120}
+            )
+        except WaiterError:
+            halt.err(f"{resource_desc} {resource_id} not ready after "
+                "waiting 30 minutes.")
+
+
+    @classmethod
+    def add_documentation(cls, argparse_obj):
+        cmd_parser = super().add_documentation(argparse_obj)
+        cmd_parser.add_argument(
+            "template", help="instance setup template in config to bake")
+        cmd_parser.add_argument(
+            "-c", "--confirm", action="store_true",
+            help="confirm AMI baking")
+        cmd_parser.add_argument(
+            "-r", dest="region", metavar="",
+            help="AWS region to bake the AMI in")
+
+
+    def blocked_actions(self, _):
+        denied_actions = validate_perms.blocked(actions=[
+            "ec2:DescribeVpcs",
+            "ec2:DescribeSubnets",
+            "ec2:DescribeSecurityGroups",
+            "ec2:DescribeImages",
+            "ec2:DescribeInstances",
+            "ec2:CreateImage",
+            "ec2:CreateTags",
+            "ec2:TerminateInstances",
+            "ec2:DeregisterImage",
+            "ec2:DeleteSnapshot"
+        ])
+        denied_actions.extend(validate_perms.blocked(
+            actions=["ec2:RunInstances"],
+            resources=["arn:aws:ec2:*:*:instance/*"],
+            context={'ec2:InstanceType': ["t2.nano"]}
+        ))
+        return denied_actions
@@ -0,0 +1,49 @@
+from ec2mc.utils import aws
+from ec2mc.utils import halt
+from ec2mc.utils.base_classes import CommandBase
+from ec2mc.utils.find import find_images
+from ec2mc.validate import validate_perms
+
+class DeleteImage(CommandBase):
+
+    def main(self, cmd_args):
+        """deregister a template's baked AMI(s) and delete their snapshots
+
+        Args:
+            cmd_args (namedtuple): See add_documentation method.
+        """
+        regions = None
+        if cmd_args.region is not None:
+            aws.ec2_client(cmd_args.region)  # Validates region
+            regions = [cmd_args.region]
+
+        template_images = [image for image
+            in find_images.probe_regions(regions)
+            if image['template'] == cmd_args.template]
+        if not template_images:
+            halt.err(f"No AMIs baked from the {cmd_args.template} "
+                "template found.")
+
+        print("")
+        for image in template_images:
+            aws.deregister_image(
+                image['region'], image['id'], image['snapshot_ids'])
+            print(f"AMI {image['id']} deregistered from {image['region']}.")
+
+
+    @classmethod
+    def add_documentation(cls, argparse_obj):
+        cmd_parser = super().add_documentation(argparse_obj)
+        cmd_parser.add_argument(
+            "template", help="name of template to delete baked AMI(s) for")
+        cmd_parser.add_argument(
+            "-r", dest="region", metavar="",
+            help="AWS region to delete AMI(s) from (default: all)")
+
+
+    def blocked_actions(self, _):
+        return validate_perms.blocked(actions=[
+            "ec2:DescribeImages",
+            "ec2:DeregisterImage",
+            "ec2:DeleteSnapshot"
+        ])
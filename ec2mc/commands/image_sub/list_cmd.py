@@ -0,0 +1,30 @@
+from ec2mc import consts
+from ec2mc.utils.base_classes import CommandBase
+from ec2mc.utils.find import find_images
+from ec2mc.validate import validate_perms
+
+class ListImages(CommandBase):
+
+    def main(self, _):
+        """list baked AMIs and the templates they were baked from"""
+        all_images = find_images.probe_regions()
+
+        print("")
+        if not all_images:
+            print("No namespace AMIs found.")
+
+        for region in consts.REGIONS:
+            region_images = [image for image in all_images
+                if image['region'] == region]
+            if not region_images:
+                continue
+
+            print(f"{region}: {len(region_images)} AMI(s) found:")
+            for image in region_images:
+                print(f"  {image['template']} ({image['id']})")
+                print(f"    State: {image['state']}")
+                print(f"    Created: {image['creation_date']}")
+
+
+    def blocked_actions(self, _):
+        return validate_perms.blocked(actions=["ec2:DescribeImages"])
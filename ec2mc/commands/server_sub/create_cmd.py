@@ -1,14 +1,13 @@
-from pathlib import PurePosixPath
-from time import sleep
-from ruamel import yaml
-
 from ec2mc import consts
 from ec2mc.utils import aws
 from ec2mc.utils import halt
 from ec2mc.utils import os2
 from ec2mc.utils import pem
+from ec2mc.utils import retry
+from ec2mc.utils import user_data
 from ec2mc.utils.base_classes import CommandBase
 from ec2mc.utils.find import find_addresses
+from ec2mc.utils.find import find_images
 from ec2mc.utils.find import find_instances
 from ec2mc.validate import validate_perms
 
@@ -41,23 +40,31 @@ class CreateServer(CommandBase):
                 cmd_args.use_ip, cmd_args.region, cmd_args.force)
 
         creation_kwargs = self._parse_creation_kwargs(cmd_args, inst_template)
-        user_data = self._process_user_data(cmd_args.template, inst_template)
-        self._create_instance(creation_kwargs, user_data, dry_run=True)
+        region = self._ec2_client.meta.region_name
+        instance_user_data = user_data.main(cmd_args.template, inst_template,
+            region, baked=creation_kwargs['baked'])
+        self._create_instance(
+            creation_kwargs, instance_user_data, dry_run=True)
 
         print("")
+        if creation_kwargs['baked'] is True:
+            print(f"Using baked AMI for the {cmd_args.template} template.")
         if cmd_args.confirm is False:
             print("IAM permissions and instance template validated.")
             print("Append the -c argument to confirm instance creation.")
             return
 
         instance = self._create_instance(
-            creation_kwargs, user_data, dry_run=False)
-        print("Instance created. It may take a few minutes to initialize.")
+            creation_kwargs, instance_user_data, dry_run=False)
+        if creation_kwargs['baked'] is True:
+            print("Instance created. It should be ready within a minute.")
+        else:
+            print("Instance created. It may take a few minutes to initialize.")
         if consts.USE_HANDLER is True:
             print("  Utilize IP handler with \"ec2mc servers check\".")
 
         if cmd_args.elastic_ip is True:
-            self._create_elastic_ip(cmd_args.region, instance['InstanceId'])
+            self._create_elastic_ip(instance['InstanceId'])
             print("New elastic IP associated with created instance.")
         elif cmd_args.use_ip is not None:
             self._reuse_elastic_ip(address, instance['InstanceId'])
@@ -71,7 +78,9 @@ class CreateServer(CommandBase):
             cmd_args (namedtuple):
                 region (str): AWS region to create instance in.
                 name (str): Tag value for instance tag key "Name".
+                template (str): Name of the YAML instance template.
                 tags (list): Additional instance tag key-value pair(s).
+                base_ami (bool): Ignore template's baked AMI if it exists.
             instance_template (dict):
                 'instance_type' (str): EC2 instance type to create.
                 'volume_size' (int): EC2 instance volume size (GiB).
@@ -82,6 +91,7 @@ class CreateServer(CommandBase):
             dict: Keyword arguments needed for instance creation.
                 'ami_id' (str): EC2 image ID (determines instance OS).
                 'device_name' (str): Device Name for operating system (?).
+                'baked' (bool): Whether AMI is the template's baked AMI.
                 'instance_type' (str): EC2 instance type to create.
                 'volume_size' (int): EC2 instance size (GiB).
                 'tags' (list[dict]): All instance tag key-value pair(s).
@@ -94,15 +104,23 @@ class CreateServer(CommandBase):
             'volume_size': instance_template['volume_size']
         }
 
-        aws_images = self._ec2_client.describe_images(Filters=[
-            {'Name': "name", 'Values': [consts.AMI_NAME]}
-        ])['Images']
-        if not aws_images:
-            halt.err("AMI name specified by script is invalid.")
-        creation_kwargs.update({
-            'ami_id': aws_images[0]['ImageId'],
-            'device_name': aws_images[0]['RootDeviceName']
-        })
+        baked_image = None
+        if cmd_args.base_ami is False:
+            baked_image = find_images.template_image(
+                cmd_args.region, cmd_args.template)
+        if baked_image is not None:
+            creation_kwargs.update({
+                'ami_id': baked_image['id'],
+                'device_name': baked_image['device_name'],
+                'baked': True
+            })
+        else:
+            aws_image = find_images.base_image(cmd_args.region)
+            creation_kwargs.update({
+                'ami_id': aws_image['ImageId'],
+                'device_name': aws_image['RootDeviceName'],
+                'baked': False
+            })
 
         vpc_info = aws.get_region_vpc(cmd_args.region)
         if vpc_info is None:
@@ -113,77 +131,20 @@ class CreateServer(CommandBase):
         creation_kwargs.update({
             'tags': self._parse_tags(cmd_args, instance_template),
             'key_name': self._validate_ec2_key_pair(),
-            'sg_ids': self._template_security_groups(
+            'sg_ids': aws.get_vpc_sg_ids(
                 cmd_args.region, vpc_id, instance_template['security_groups']),
-            'subnet_id': self._first_subnet_id(vpc_id)
+            'subnet_id': aws.get_vpc_first_subnet_id(cmd_args.region, vpc_id)
         })
 
         return creation_kwargs
 
 
-    @classmethod
-    def _process_user_data(cls, template_name, template):
-        """add template files to user_data's write_files
-
-        Args:
-            template_name (str): Name of the YAML instance template.
-            template (dict):
-                'write_directories' (str): Info on template subdirectory(s) to
-                    copy files from to user_data's write_files.
-
-        Returns:
-            str: YAML file string to initialize instance on first boot.
-        """
-        user_data = os2.parse_yaml(
-            consts.USER_DATA_DIR / f"{template_name}.yaml")
-
-        if 'write_directories' in template:
-            write_files = cls._write_files_gen(template['write_directories'])
-            if write_files:
-                user_data.setdefault('write_files', []).extend(write_files)
-
-        # Halt if write_files contains any duplicate paths
-        if 'write_files' in user_data:
-            write_file_paths = [write_file['path'] for write_file
-                in user_data['write_files']]
-            if len(write_file_paths) != len(set(write_file_paths)):
-                halt.err("Duplicate template write_files paths.")
-
-        # Make user_data valid cloud-config by removing additional setup info
-        del user_data['ec2mc_template_info']
-        user_data_str = yaml.dump(user_data, Dumper=yaml.RoundTripDumper)
-
-        return f"#cloud-config\n{user_data_str}"
-
-
-    @staticmethod
-    def _write_files_gen(write_dirs):
-        """fill out write_files list from specified directory(s)"""
-        write_files = []
-        for write_dir in write_dirs:
-            dir_path = consts.USER_DATA_DIR.joinpath(*write_dir['local_dir'])
-            for dir_file in os2.recursive_dir_files(dir_path):
-                file_path = dir_path / dir_file
-                # Convert Windows line endings to Unix line endings
-                file_bytes = file_path.read_bytes().replace(b"\r\n", b"\n")
-                write_files.append({
-                    'content': file_bytes,
-                    'path': str(PurePosixPath(
-                        write_dir['instance_dir'], dir_file))
-                })
-                if 'owner' in write_dir:
-                    write_files[-1]['owner'] = write_dir['owner']
-                if 'chmod' in write_dir:
-                    write_files[-1]['permissions'] = write_dir['chmod']
-        return write_files
-
-
     def _create_instance(self, creation_kwargs, user_data, *, dry_run):
         """create EC2 instance and initialize with user_data
 
         Args:
             creation_kwargs (dict): See what _parse_creation_kwargs returns.
-            user_data (str): See what _process_user_data returns.
+            user_data (str): See what user_data:main returns.
             dry_run (bool): If True, only test if IAM user is allowed to.
         """
         with aws.ClientErrorHalt(allow=["DryRunOperation"]):
@@ -207,13 +168,14 @@ class CreateServer(CommandBase):
             )['Instances'][0]
 
 
-    def _create_elastic_ip(self, region, instance_id):
+    def _create_elastic_ip(self, instance_id):
         """allocate new elastic IP address, and associate with instance"""
         with aws.ClientErrorHalt():
             allocation_id = self._ec2_client.allocate_address(
-                Domain="vpc")['AllocationId']
+                Domain="vpc",
+                TagSpecifications=aws.tag_specifications("elastic-ip")
+            )['AllocationId']
 
-        aws.attach_tags(region, allocation_id)
         self._associate_elastic_ip(instance_id, allocation_id)
 
 
@@ -226,17 +188,19 @@ class CreateServer(CommandBase):
 
 
     def _associate_elastic_ip(self, instance_id, allocation_id):
-        """attempt to assign elastic IP to instance for 60 seconds"""
-        for _ in range(60):
-            with aws.ClientErrorHalt(allow=["InvalidInstanceID"]):
-                self._ec2_client.associate_address(
+        """attempt to assign elastic IP to instance for 60 seconds
+
+        Retried while the new instance isn't yet in an associable state.
+        """
+        try:
+            with aws.ClientErrorHalt():
+                retry.call(lambda: self._ec2_client.associate_address(
                     AllocationId=allocation_id,
                     InstanceId=instance_id,
                     AllowReassociation=False
-                )
-                break
-            sleep(1)
-        else:
+                ), codes=["InvalidInstanceID(\\..*)?"],
+                    label="AssociateAddress")
+        except retry.DeadlineExceeded:
             halt.err("Couldn't assign elastic IP to instance.")
 
 
@@ -322,29 +286,6 @@ class CreateServer(CommandBase):
         return instance_tags
 
 
-    @staticmethod
-    def _template_security_groups(region, vpc_id, security_groups):
-        """return VPC security group ID(s)"""
-        vpc_sgs = aws.get_vpc_security_groups(region, vpc_id)
-        vpc_sg_names = [sg['GroupName'] for sg in vpc_sgs]
-        if not set(security_groups).issubset(set(vpc_sg_names)):
-            halt.err("Following template SG(s) not found from AWS:",
-                *(set(security_groups) - set(vpc_sg_names)))
-        return [sg['GroupId'] for sg in vpc_sgs
-            if sg['GroupName'] in security_groups]
-
-
-    def _first_subnet_id(self, vpc_id):
-        """return ID of VPC's first subnet (alphabetically ordered)"""
-        vpc_subnets = self._ec2_client.describe_subnets(Filters=[
-            {'Name': "vpc-id", 'Values': [vpc_id]}
-        ])['Subnets']
-        if not vpc_subnets:
-            halt.err(f"VPC {consts.NAMESPACE} in AWS region has no subnets.")
-        vpc_subnets.sort(key=lambda k: k['AvailabilityZone'])
-        return vpc_subnets[0]['SubnetId']
-
-
     def _validate_ec2_key_pair(self):
         """validate EC2 key pair exists, and matches local RSA key file"""
         ec2_key_pairs = self._ec2_client.describe_key_pairs(Filters=[
@@ -390,6 +331,9 @@ class CreateServer(CommandBase):
         cmd_parser.add_argument(
             "-f", "--force", action="store_true",
             help="disassociate possessed elastic IP address if it is in use")
+        cmd_parser.add_argument(
+            "--base_ami", action="store_true",
+            help="ignore template's baked AMI (see \"ec2mc image bake\")")
 
 
     def blocked_actions(self, cmd_args):
@@ -1,6 +1,10 @@
+from time import monotonic
+
 from ec2mc.utils import handle_ip
+from ec2mc.utils import mc_ping
 from ec2mc.utils.base_classes import CommandBase
 from ec2mc.utils.find import find_instances
+from ec2mc.utils.threader import Threader
 from ec2mc.validate import validate_perms
 
 class CheckServers(CommandBase):
@@ -8,11 +12,18 @@ class CheckServers(CommandBase):
     def main(self, cmd_args):
         """check instance status(es)
 
+        If --joinable is set, running instances' Minecraft servers are
+        pinged concurrently until each accepts players, or until the timeout
+        passes.
+
         Args:
-            cmd_args (namedtuple): See find_instances:add_argparse_args
+            cmd_args (namedtuple): See add_documentation method.
         """
         instances = find_instances.main(cmd_args)
 
+        threader = Threader()
+        checked_at = monotonic()
+        joinable_checks = []
         for instance in instances:
             print("")
             print(f"Checking {instance['name']} ({instance['id']})...")
@@ -25,11 +36,29 @@ class CheckServers(CommandBase):
                 print(f"  Instance IP: {instance_ip}")
                 handle_ip.main(instance, instance_ip)
 
+                if cmd_args.joinable is True:
+                    threader.add_thread(mc_ping.wait_until_joinable,
+                        (instance_ip, checked_at + cmd_args.joinable_timeout))
+                    joinable_checks.append((instance, instance_ip))
+
+        if not joinable_checks:
+            return
+
+        print("")
+        print("Waiting for Minecraft server(s) to accept players...")
+        statuses = threader.get_results(return_dict=True)
+        for instance, instance_ip in joinable_checks:
+            print("")
+            print(f"{instance['name']} ({instance_ip}):")
+            mc_ping.print_joinable(statuses[instance_ip],
+                checked_at, cmd_args.joinable_timeout)
+
 
     @classmethod
     def add_documentation(cls, argparse_obj):
         cmd_parser = super().add_documentation(argparse_obj)
         find_instances.add_argparse_args(cmd_parser)
+        mc_ping.add_argparse_args(cmd_parser)
 
 
     def blocked_actions(self, _):
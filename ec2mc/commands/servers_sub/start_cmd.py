@@ -1,9 +1,12 @@
+from time import monotonic
 from botocore.exceptions import WaiterError
 
 from ec2mc.utils import aws
 from ec2mc.utils import handle_ip
+from ec2mc.utils import mc_ping
 from ec2mc.utils.base_classes import CommandBase
 from ec2mc.utils.find import find_instances
+from ec2mc.utils.threader import Threader
 from ec2mc.validate import validate_perms
 
 class StartServers(CommandBase):
@@ -11,11 +14,18 @@ class StartServers(CommandBase):
     def main(self, cmd_args):
         """start stopped instance(s)
 
+        If --joinable is set, each running instance's Minecraft server is
+        pinged (concurrently with the other instances') until it accepts
+        players, or until the timeout passes since the instance was started.
+
         Args:
-            cmd_args (namedtuple): See find_instances:add_argparse_args
+            cmd_args (namedtuple): See add_documentation method.
         """
         instances = find_instances.main(cmd_args)
 
+        threader = Threader()
+        started_at = {}
+        joinable_checks = []
         for instance in instances:
             print("")
             print(f"Attempting to start {instance['name']} "
@@ -31,6 +41,7 @@ class StartServers(CommandBase):
                 print("  Cannot start an instance from a transitional state.")
                 continue
 
+            started_at[instance['id']] = monotonic()
             if instance_state == "stopped":
                 print("  Starting instance...")
                 ec2_client.start_instances(InstanceIds=[instance['id']])
@@ -55,11 +66,31 @@ class StartServers(CommandBase):
             print(f"  Instance IP: {instance_ip}")
             handle_ip.main(instance, instance_ip)
 
+            if cmd_args.joinable is True:
+                threader.add_thread(mc_ping.wait_until_joinable, (
+                    instance_ip,
+                    started_at[instance['id']] + cmd_args.joinable_timeout
+                ))
+                joinable_checks.append((instance, instance_ip))
+
+        if not joinable_checks:
+            return
+
+        print("")
+        print("Waiting for Minecraft server(s) to accept players...")
+        statuses = threader.get_results(return_dict=True)
+        for instance, instance_ip in joinable_checks:
+            print("")
+            print(f"{instance['name']} ({instance_ip}):")
+            mc_ping.print_joinable(statuses[instance_ip],
+                started_at[instance['id']], cmd_args.joinable_timeout)
+
 
     @classmethod
     def add_documentation(cls, argparse_obj):
         cmd_parser = super().add_documentation(argparse_obj)
         find_instances.add_argparse_args(cmd_parser)
+        mc_ping.add_argparse_args(cmd_parser)
 
 
     def blocked_actions(self, _):
@@ -3,6 +3,7 @@ from ec2mc.utils.base_classes import ParentCommand
 from ec2mc.commands.user_sub import list_cmd
 from ec2mc.commands.user_sub import be_cmd
 from ec2mc.commands.user_sub import create_cmd
+from ec2mc.commands.user_sub import batch_create_cmd
 from ec2mc.commands.user_sub import set_group_cmd
 from ec2mc.commands.user_sub import rotate_key_cmd
 from ec2mc.commands.user_sub import delete_cmd
@@ -13,6 +14,7 @@ class User(ParentCommand):
         list_cmd.ListUsers,
         be_cmd.BeUser,
         create_cmd.CreateUser,
+        batch_create_cmd.BatchCreateUsers,
         set_group_cmd.SetUserGroup,
         rotate_key_cmd.RotateUserKey,
         delete_cmd.DeleteUser
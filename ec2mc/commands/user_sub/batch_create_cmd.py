@@ -0,0 +1,187 @@
+import csv
+from pathlib import Path
+from botocore.exceptions import ClientError
+
+from ec2mc import consts
+from ec2mc.utils import aws
+from ec2mc.utils import halt
+from ec2mc.utils import os2
+from ec2mc.utils.base_classes import CommandBase
+from ec2mc.utils.iam_snapshot import IAMSnapshot
+from ec2mc.utils.threader import Threader
+from ec2mc.validate import validate_perms
+
+class BatchCreateUsers(CommandBase):
+
+    def __init__(self, cmd_args):
+        self._iam_client = aws.iam_client()
+
+
+    def main(self, cmd_args):
+        """create multiple IAM users under IAM groups at once
+
+        IAM users (and their access keys) are created concurrently, then
+        all new access keys are waited on together. Every created access
+        key is backed up, and a zipped configuration is created for each
+        user, even if the key didn't become usable while waiting.
+
+        Args:
+            cmd_args (namedtuple): See add_documentation method.
+        """
+        user_groups = self._parse_user_groups(cmd_args)
+        self._validate_user_groups(user_groups)
+
+        print("")
+        print(f"Creating {len(user_groups)} IAM user(s)...")
+
+        threader = Threader(max_threads=aws.IAM_MAX_THREADS)
+        for user_name, group_name in user_groups:
+            threader.add_thread(self._create_user, (user_name, group_name))
+        # Either new access key (dict) or error message (str) for each user
+        user_results = threader.get_results(return_dict=True)
+        created_keys = {user_name: new_key
+            for user_name, new_key in user_results.items()
+            if isinstance(new_key, dict)}
+
+        # Each wait uses the new key's own credentials, so isn't IAM limited
+        threader = Threader()
+        for user_name, new_key in created_keys.items():
+            threader.add_thread(self._wait_for_key, (user_name, new_key))
+        # Error message (str) for each user whose key didn't become usable
+        key_errors = {user_name: key_error for user_name, key_error
+            in threader.get_results(return_dict=True).items()
+            if key_error is not None}
+
+        if created_keys:
+            # Back up new IAM users' access keys in config file
+            config_dict = os2.parse_json(consts.CONFIG_JSON)
+            for new_key in created_keys.values():
+                config_dict.setdefault('backup_keys', {}).update(new_key)
+            os2.save_json(config_dict, consts.CONFIG_JSON)
+
+            for user_name, new_key in created_keys.items():
+                os2.create_configuration_zip(
+                    user_name, new_key, cmd_args.ssh_key)
+
+        print(f"{len(created_keys)} of {len(user_groups)} IAM user(s) "
+            "created on AWS:")
+        for user_name, group_name in user_groups:
+            if user_name not in created_keys:
+                print(f"  {user_name} ({group_name}): "
+                    f"{user_results[user_name]}")
+            elif user_name in key_errors:
+                print(f"  {user_name} ({group_name}): Zipped configuration "
+                    f"created in config. {key_errors[user_name]}")
+            else:
+                print(f"  {user_name} ({group_name}): Zipped configuration "
+                    "created in config.")
+
+        if len(created_keys) < len(user_groups):
+            halt.err("Not all IAM users were created successfully.")
+        if key_errors:
+            halt.err("Not all new access keys became usable.",
+                "  Their users' zipped configurations may work shortly.")
+
+
+    @staticmethod
+    def _parse_user_groups(cmd_args):
+        """return (user name, group name) pairs from CSV file and/or args
+
+        CSV rows are "user_name,group_name". Blank rows and rows starting
+        with "#" are skipped.
+        """
+        user_groups = []
+        if cmd_args.csv_file is not None:
+            csv_path = Path(cmd_args.csv_file)
+            if not csv_path.is_file():
+                halt.err(f"{csv_path} not found.")
+            with csv_path.open(encoding="utf-8", newline="") as csv_file:
+                for row_num, row in enumerate(csv.reader(csv_file), 1):
+                    row = [cell.strip() for cell in row]
+                    if not any(row) or row[0].startswith("#"):
+                        continue
+                    if len(row) != 2 or not all(row):
+                        halt.err(f"Row {row_num} of {csv_path.name} must be "
+                            "\"user_name,group_name\".")
+                    user_groups.append(tuple(row))
+        if cmd_args.user is not None:
+            user_groups.extend(tuple(pair) for pair in cmd_args.user)
+
+        if not user_groups:
+            halt.err("No IAM users specified.",
+                "  Specify users with a CSV file and/or the -u argument.")
+        return user_groups
+
+
+    @staticmethod
+    def _validate_user_groups(user_groups):
+        """halt if any names duplicated/taken, or any groups nonexistent"""
+        user_names = [user_name.lower() for user_name, _ in user_groups]
+        duplicate_names = {name for name in user_names
+            if user_names.count(name) > 1}
+        if duplicate_names:
+            halt.err("IAM user names must be unique (case insensitive):",
+                *sorted(duplicate_names))
+
+        snapshot = IAMSnapshot()
+        existing_names = [user_name for user_name, _ in user_groups
+            if snapshot.user_name(user_name) is not None]
+        if existing_names:
+            halt.err("Following IAM user(s) already exist:", *existing_names)
+
+        missing_groups = {group_name for _, group_name in user_groups
+            if group_name not in snapshot.groups}
+        if missing_groups:
+            halt.err("Following IAM group(s) not found from AWS:",
+                *sorted(missing_groups))
+
+
+    def _create_user(self, user_name, group_name):
+        """create IAM user in group, and return access key or error message"""
+        try:
+            self._iam_client.create_user(
+                Path=f"/{consts.NAMESPACE}/", UserName=user_name)
+            self._iam_client.add_user_to_group(
+                GroupName=group_name,
+                UserName=user_name
+            )
+            new_key = self._iam_client.create_access_key(
+                UserName=user_name)['AccessKey']
+        except ClientError as e:
+            return str(e)
+        return {new_key['AccessKeyId']: new_key['SecretAccessKey']}
+
+
+    @staticmethod
+    def _wait_for_key(user_name, new_key):
+        """return error message if user's access key doesn't become usable"""
+        try:
+            if not aws.access_key_usable(new_key):
+                return "Access key not usable even after waiting 1 minute."
+        except ClientError as e:
+            return str(e)
+        return None
+
+
+    @classmethod
+    def add_documentation(cls, argparse_obj):
+        cmd_parser = super().add_documentation(argparse_obj)
+        cmd_parser.add_argument(
+            "csv_file", nargs="?",
+            help="CSV file with \"user_name,group_name\" rows")
+        cmd_parser.add_argument(
+            "-u", "--user", nargs=2, action="append",
+            metavar=("NAME", "GROUP"),
+            help="IAM user to create, and IAM group to assign it to")
+        cmd_parser.add_argument(
+            "-k", "--ssh_key", action="store_true",
+            help="copy RSA private key to new users' zipped configurations")
+
+
+    def blocked_actions(self, _):
+        return validate_perms.blocked(actions=[
+            "iam:GetAccountAuthorizationDetails",
+            "iam:CreateUser",
+            "iam:AddUserToGroup",
+            "iam:CreateAccessKey"
+        ])
@@ -1,5 +1,3 @@
-from time import sleep
-import boto3
 from botocore.exceptions import ClientError
 
 from ec2mc import consts
@@ -37,7 +35,9 @@ class CreateUser(CommandBase):
         new_key = iam_client.create_access_key(
             UserName=cmd_args.name)['AccessKey']
         new_key = {new_key['AccessKeyId']: new_key['SecretAccessKey']}
-        self._access_key_usable_waiter(new_key)
+        with aws.ClientErrorHalt():
+            if not aws.access_key_usable(new_key):
+                halt.err("Access key not usable even after waiting 1 minute.")
 
         config_dict = os2.parse_json(consts.CONFIG_JSON)
         if 'backup_keys' not in config_dict:
@@ -59,23 +59,6 @@ class CreateUser(CommandBase):
             print("  User's zipped configuration created in config.")
 
 
-    @staticmethod
-    def _access_key_usable_waiter(new_key):
-        """waiter for IAM user access key usability (not perfect)"""
-        iam_client = boto3.client("iam",
-            aws_access_key_id=next(iter(new_key)),
-            aws_secret_access_key=next(iter(new_key.values()))
-        )
-        for _ in range(60):
-            with aws.ClientErrorHalt(allow=["InvalidClientTokenId"]):
-                # New IAM user is assumed to have the iam:GetUser permission.
-                iam_client.get_user()
-                break
-            sleep(1)
-        else:
-            halt.err("Access key not usable even after waiting 1 minute.")
-
-
     @classmethod
     def add_documentation(cls, argparse_obj):
         cmd_parser = super().add_documentation(argparse_obj)
@@ -3,6 +3,7 @@ from ec2mc.utils import aws
 from ec2mc.utils import halt
 from ec2mc.utils import os2
 from ec2mc.utils.base_classes import CommandBase
+from ec2mc.utils.iam_snapshot import IAMSnapshot
 from ec2mc.validate import validate_perms
 
 class DeleteUser(CommandBase):
@@ -13,17 +14,22 @@ class DeleteUser(CommandBase):
 
     def main(self, cmd_args):
         """delete an existing IAM user from AWS"""
-        path_prefix = f"/{consts.NAMESPACE}/"
         user_name = cmd_args.name
 
         # IAM user names cannot differ only by case
         if user_name.lower() == consts.IAM_NAME.lower():
             halt.err("You cannot delete yourself.")
 
-        user_name = aws.validate_user_exists(path_prefix, user_name)
+        snapshot = IAMSnapshot()
+        user_name = snapshot.user_name(cmd_args.name)
+        if user_name is None:
+            halt.err(f"IAM user \"{cmd_args.name}\" not found from AWS.")
+
         self._delete_user_access_keys(user_name)
-        self._remove_user_from_groups(user_name)
-        self._detach_user_from_policies(user_name)
+        self._remove_user_from_groups(
+            user_name, snapshot.user_groups(user_name))
+        self._detach_user_from_policies(
+            user_name, snapshot.user_policy_arns(user_name))
         self._iam_client.delete_user(UserName=user_name)
 
         print("")
@@ -54,25 +60,21 @@ class DeleteUser(CommandBase):
                 os2.save_json(config_dict, consts.CONFIG_JSON)
 
 
-    def _remove_user_from_groups(self, user_name):
+    def _remove_user_from_groups(self, user_name, group_names):
         """remove IAM user from IAM groups"""
-        user_groups = self._iam_client.list_groups_for_user(
-            UserName=user_name)['Groups']
-        for user_group in user_groups:
+        for group_name in group_names:
             self._iam_client.remove_user_from_group(
-                GroupName=user_group['GroupName'],
+                GroupName=group_name,
                 UserName=user_name
             )
 
 
-    def _detach_user_from_policies(self, user_name):
+    def _detach_user_from_policies(self, user_name, policy_arns):
         """detach IAM user from IAM policies"""
-        user_policies = self._iam_client.list_attached_user_policies(
-            UserName=user_name)['AttachedPolicies']
-        for user_policy in user_policies:
+        for policy_arn in policy_arns:
             self._iam_client.detach_user_policy(
                 UserName=user_name,
-                PolicyArn=user_policy['PolicyArn']
+                PolicyArn=policy_arn
             )
 
 
@@ -85,12 +87,10 @@ class DeleteUser(CommandBase):
 
     def blocked_actions(self, _):
         return validate_perms.blocked(actions=[
-            "iam:ListUsers",
+            "iam:GetAccountAuthorizationDetails",
             "iam:ListAccessKeys",
             "iam:DeleteAccessKey",
-            "iam:ListGroupsForUser",
             "iam:RemoveUserFromGroup",
-            "iam:ListAttachedUserPolicies",
             "iam:DetachUserPolicy",
             "iam:DeleteUser"
         ])
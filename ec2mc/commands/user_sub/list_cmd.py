@@ -1,36 +1,54 @@
-from ec2mc import consts
-from ec2mc.utils import aws
+import json
+
 from ec2mc.utils import halt
 from ec2mc.utils.base_classes import CommandBase
+from ec2mc.utils.iam_snapshot import IAMSnapshot
 from ec2mc.validate import validate_perms
 
 class ListUsers(CommandBase):
 
     def main(self, cmd_args):
-        """list IAM groups and their IAM users"""
-        iam_client = aws.iam_client()
-        path_prefix = f"/{consts.NAMESPACE}/"
+        """list IAM groups and their IAM users
+
+        Group memberships are read from a single paginated IAM snapshot,
+        rather than from a get_group call per group.
 
-        iam_group_names = [iam_group['GroupName'] for iam_group
-            in iam_client.list_groups(PathPrefix=path_prefix)['Groups']]
+        Args:
+            cmd_args (namedtuple): See add_documentation method.
+        """
+        snapshot = IAMSnapshot()
+
+        iam_group_names = sorted(snapshot.groups)
         if not iam_group_names:
             halt.err("No namespace IAM groups found from AWS.",
                 "  Have you uploaded the AWS setup?")
 
+        group_users = {group_name: sorted(snapshot.group_users(group_name))
+            for group_name in iam_group_names}
+
+        if cmd_args.json:
+            print(json.dumps(group_users, indent=4))
+            return
+
         print("")
         print(f"{len(iam_group_names)} IAM group(s) found from AWS:")
-        for group_name in iam_group_names:
-            group_users = iam_client.get_group(GroupName=group_name)['Users']
-            if group_users:
-                print(f"{group_name}: {len(group_users)} user(s) in group:")
-                for group_user in group_users:
-                    print(f"  {group_user['UserName']}")
+        for group_name, user_names in group_users.items():
+            if user_names:
+                print(f"{group_name}: {len(user_names)} user(s) in group:")
+                for user_name in user_names:
+                    print(f"  {user_name}")
             else:
                 print(f"{group_name}: 0 users in group.")
 
 
+    @classmethod
+    def add_documentation(cls, argparse_obj):
+        cmd_parser = super().add_documentation(argparse_obj)
+        cmd_parser.add_argument(
+            "-j", "--json", action="store_true",
+            help="print groups and their users as JSON")
+
+
     def blocked_actions(self, _):
-        return validate_perms.blocked(actions=[
-            "iam:ListGroups",
-            "iam:GetGroup"
-        ])
+        return validate_perms.blocked(
+            actions=["iam:GetAccountAuthorizationDetails"])
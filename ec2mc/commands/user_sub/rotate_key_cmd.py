@@ -1,7 +1,12 @@
+from botocore.exceptions import ClientError
+
 from ec2mc import consts
 from ec2mc.utils import aws
+from ec2mc.utils import halt
 from ec2mc.utils import os2
 from ec2mc.utils.base_classes import CommandBase
+from ec2mc.utils.iam_snapshot import IAMSnapshot
+from ec2mc.utils.threader import Threader
 from ec2mc.validate import validate_perms
 
 class RotateUserKey(CommandBase):
@@ -11,61 +16,139 @@ class RotateUserKey(CommandBase):
 
 
     def main(self, cmd_args):
-        """delete IAM user's access key(s) and create a new one"""
-        path_prefix = f"/{consts.NAMESPACE}/"
-        user_name = aws.validate_user_exists(path_prefix, cmd_args.name)
-
-        old_access_keys = self._iam_client.list_access_keys(
-            UserName=user_name)['AccessKeyMetadata']
-        old_key_ids = [key['AccessKeyId'] for key in old_access_keys]
-
-        new_key = self._rotate_user_key(old_key_ids, user_name)
-        self._update_config_dict(new_key, old_key_ids)
+        """delete IAM user(s)' access key(s) and create new one(s)
+
+        Multiple users' keys are rotated concurrently. If your own user is
+        included, its key is rotated last, as the other rotations are made
+        using it.
+
+        Args:
+            cmd_args (namedtuple): See add_documentation method.
+        """
+        user_names = self._select_users(cmd_args)
+        own_name = next((user_name for user_name in user_names
+            if user_name.lower() == consts.IAM_NAME.lower()), None)
+
+        threader = Threader(max_threads=aws.IAM_MAX_THREADS)
+        for user_name in user_names:
+            if user_name != own_name:
+                threader.add_thread(self._rotate_user_key, (user_name,))
+        # Either (new key, old key IDs) (tuple) or error message (str)
+        user_results = threader.get_results(return_dict=True)
+        if own_name is not None:
+            user_results[own_name] = self._rotate_user_key(own_name)
+
+        rotated_users = {user_name: result
+            for user_name, result in user_results.items()
+            if isinstance(result, tuple)}
+        if rotated_users:
+            self._update_config_dict(rotated_users.values())
 
         print("")
-        print(f"{user_name}'s access key rotated.")
+        for user_name in user_names:
+            if user_name in rotated_users:
+                new_key, _ = rotated_users[user_name]
+                os2.create_configuration_zip(
+                    user_name, new_key, cmd_args.ssh_key)
+                print(f"{user_name}'s access key rotated.")
+                print("  User's updated zipped configuration created "
+                    "in config.")
+            else:
+                print(f"{user_name}'s access key not rotated:")
+                print(f"  {user_results[user_name]}")
+
+        if len(rotated_users) < len(user_names):
+            halt.err("Not all IAM users' access keys were rotated.")
 
-        os2.create_configuration_zip(user_name, new_key, cmd_args.ssh_key)
-        print("  User's updated zipped configuration created in config.")
 
-
-    def _rotate_user_key(self, old_key_ids, user_name):
-        """rotate IAM user's access key"""
-        for key_id in old_key_ids:
-            if key_id != consts.KEY_ID:
+    @staticmethod
+    def _select_users(cmd_args):
+        """return exact names of IAM users specified by arguments"""
+        if cmd_args.names and (cmd_args.all or cmd_args.group is not None):
+            halt.err("Specify either IAM user names or --all/-g, not both.")
+        if not cmd_args.names and not cmd_args.all and cmd_args.group is None:
+            halt.err("No IAM users specified.",
+                "  Specify user names, or use the --all or -g argument.")
+
+        snapshot = IAMSnapshot()
+        if cmd_args.all:
+            user_names = sorted(snapshot.users)
+        elif cmd_args.group is not None:
+            if cmd_args.group not in snapshot.groups:
+                halt.err(f"IAM group \"{cmd_args.group}\" not found from AWS.")
+            # Users outside of the namespace aren't managed by ec2mc
+            user_names = sorted(user_name for user_name
+                in snapshot.group_users(cmd_args.group)
+                if user_name in snapshot.users)
+        else:
+            user_names = []
+            for name in cmd_args.names:
+                user_name = snapshot.user_name(name)
+                if user_name is None:
+                    halt.err(f"IAM user \"{name}\" not found from AWS.")
+                if user_name not in user_names:
+                    user_names.append(user_name)
+
+        if not user_names:
+            halt.err("No namespace IAM users to rotate access keys for.")
+        return user_names
+
+
+    def _rotate_user_key(self, user_name):
+        """rotate IAM user's access key
+
+        Returns:
+            tuple/str: New access key and old access key IDs, or error
+                message if rotation failed.
+        """
+        try:
+            old_access_keys = self._iam_client.list_access_keys(
+                UserName=user_name)['AccessKeyMetadata']
+            old_key_ids = [key['AccessKeyId'] for key in old_access_keys]
+
+            for key_id in old_key_ids:
+                if key_id != consts.KEY_ID:
+                    self._iam_client.delete_access_key(
+                        UserName=user_name,
+                        AccessKeyId=key_id
+                    )
+
+            new_key = self._iam_client.create_access_key(
+                UserName=user_name)['AccessKey']
+            new_key = {new_key['AccessKeyId']: new_key['SecretAccessKey']}
+
+            if consts.KEY_ID in old_key_ids:
                 self._iam_client.delete_access_key(
                     UserName=user_name,
-                    AccessKeyId=key_id
+                    AccessKeyId=consts.KEY_ID
                 )
+        except ClientError as e:
+            return str(e)
 
-        new_key = self._iam_client.create_access_key(
-            UserName=user_name)['AccessKey']
-        new_key = {new_key['AccessKeyId']: new_key['SecretAccessKey']}
-
-        if consts.KEY_ID in old_key_ids:
-            self._iam_client.delete_access_key(
-                UserName=user_name,
-                AccessKeyId=consts.KEY_ID
-            )
-
-        return new_key
+        return (new_key, old_key_ids)
 
 
     @staticmethod
-    def _update_config_dict(new_key, old_key_ids):
-        """remove old access keys and place new one in config"""
+    def _update_config_dict(rotated_keys):
+        """remove old access keys and place new ones in config
+
+        Args:
+            rotated_keys (list[tuple]): New access key (dict) and old access
+                key IDs (list[str]) for each user.
+        """
         config_dict = os2.parse_json(consts.CONFIG_JSON)
 
-        if 'backup_keys' in config_dict:
-            for old_key_id in old_key_ids:
-                config_dict['backup_keys'].pop(old_key_id, None)
-            if not config_dict['backup_keys']:
-                del config_dict['backup_keys']
+        for new_key, old_key_ids in rotated_keys:
+            if 'backup_keys' in config_dict:
+                for old_key_id in old_key_ids:
+                    config_dict['backup_keys'].pop(old_key_id, None)
+                if not config_dict['backup_keys']:
+                    del config_dict['backup_keys']
 
-        if next(iter(config_dict['access_key'])) in old_key_ids:
-            config_dict['access_key'] = new_key
-        else:
-            config_dict.setdefault('backup_keys', {}).update(new_key)
+            if next(iter(config_dict['access_key'])) in old_key_ids:
+                config_dict['access_key'] = new_key
+            else:
+                config_dict.setdefault('backup_keys', {}).update(new_key)
 
         os2.save_json(config_dict, consts.CONFIG_JSON)
 
@@ -74,15 +157,23 @@ class RotateUserKey(CommandBase):
     def add_documentation(cls, argparse_obj):
         cmd_parser = super().add_documentation(argparse_obj)
         cmd_parser.add_argument(
-            "name", help="name of IAM user to rotate keys for")
+            "names", nargs="*", metavar="name",
+            help="name(s) of IAM user(s) to rotate keys for")
+        cmd_group = cmd_parser.add_mutually_exclusive_group()
+        cmd_group.add_argument(
+            "-a", "--all", action="store_true",
+            help="rotate keys for all namespace IAM users")
+        cmd_group.add_argument(
+            "-g", dest="group", metavar="",
+            help="rotate keys for IAM users in specified IAM group")
         cmd_parser.add_argument(
             "-k", "--ssh_key", action="store_true",
-            help="copy RSA private key to user's zipped configuration")
+            help="copy RSA private key to users' zipped configurations")
 
 
     def blocked_actions(self, _):
         return validate_perms.blocked(actions=[
-            "iam:ListUsers",
+            "iam:GetAccountAuthorizationDetails",
             "iam:ListAccessKeys",
             "iam:CreateAccessKey",
             "iam:DeleteAccessKey"
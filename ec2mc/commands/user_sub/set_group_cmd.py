@@ -1,7 +1,7 @@
-from ec2mc import consts
 from ec2mc.utils import aws
 from ec2mc.utils import halt
 from ec2mc.utils.base_classes import CommandBase
+from ec2mc.utils.iam_snapshot import IAMSnapshot
 from ec2mc.validate import validate_perms
 
 class SetUserGroup(CommandBase):
@@ -9,12 +9,16 @@ class SetUserGroup(CommandBase):
     def main(self, cmd_args):
         """change what IAM group an IAM user is a part of"""
         iam_client = aws.iam_client()
-        path_prefix = f"/{consts.NAMESPACE}/"
-        user_name = aws.validate_user_exists(path_prefix, cmd_args.name)
-        group_name = aws.validate_group_exists(path_prefix, cmd_args.group)
+        snapshot = IAMSnapshot()
 
-        old_group_names = [old_group['GroupName'] for old_group
-            in iam_client.list_groups_for_user(UserName=user_name)['Groups']]
+        user_name = snapshot.user_name(cmd_args.name)
+        if user_name is None:
+            halt.err(f"IAM user \"{cmd_args.name}\" not found from AWS.")
+        group_name = cmd_args.group
+        if group_name not in snapshot.groups:
+            halt.err(f"IAM group \"{group_name}\" not found from AWS.")
+
+        old_group_names = snapshot.user_groups(user_name)
         if group_name in old_group_names and len(old_group_names) == 1:
             halt.err(f"{user_name} is already in the {group_name} IAM group.")
 
@@ -45,9 +49,7 @@ class SetUserGroup(CommandBase):
 
     def blocked_actions(self, _):
         return validate_perms.blocked(actions=[
-            "iam:ListUsers",
-            "iam:ListGroups",
-            "iam:ListGroupsForUser",
+            "iam:GetAccountAuthorizationDetails",
             "iam:RemoveUserFromGroup",
             "iam:AddUserToGroup"
         ])
@@ -4,7 +4,7 @@ Variables with "Set in..." comments are set once elsewhere.
 """
 
 from pathlib import Path
-from typing import Tuple
+from typing import Optional, Tuple
 
 # Path of script's distribution's inner ec2mc directory.
 DIST_DIR = Path(__file__).parent
@@ -13,6 +13,12 @@ DIST_DIR = Path(__file__).parent
 CONFIG_DIR = Path().home() / ".ec2mc"
 # JSON file path for script user's configuration.
 CONFIG_JSON = CONFIG_DIR / "config.json"
+# JSON file caching measured latencies to AWS regions' EC2 endpoints.
+REGION_LATENCY_JSON = CONFIG_DIR / "region_latency.json"
+# JSON file caching names of all AWS regions (from ec2:DescribeRegions).
+REGION_LIST_JSON = CONFIG_DIR / "regions.json"
+# JSON file indexing elastic IP addresses' regions and allocation IDs by IP.
+ADDRESS_INDEX_JSON = CONFIG_DIR / "address_index.json"
 # PEM/PPK files containing RSA private key for SSHing into instances.
 # Set in ec2mc.validate.validate_setup:main (namespace used as file name)
 RSA_KEY_PEM: Path
@@ -25,12 +31,17 @@ AWS_SETUP_JSON = AWS_SETUP_DIR / "aws_setup.json"
 
 # Directory for ec2mc to find YAML instance templates
 USER_DATA_DIR = AWS_SETUP_DIR / "user_data"
+# Directory for ec2mc to cache downloaded template artifacts (e.g. jars)
+ARTIFACT_DIR = CONFIG_DIR / "artifacts"
 # Directory for ec2mc to find IP handlers for checked/started instances
 IP_HANDLER_DIR = AWS_SETUP_DIR / "ip_handlers"
 
 # Use IP handler script described by an instance's IpHandler tag.
 # Set in ec2mc.validate.validate_config:main
 USE_HANDLER: bool
+# Endpoint URL of an S3-compatible stand-in to use instead of AWS S3.
+# Set in ec2mc.validate.validate_config:main
+S3_ENDPOINT_URL: Optional[str]
 
 # IAM user data needed for AWS programmatic access.
 # Set in ec2mc.validate.validate_config:_validate_user
@@ -49,6 +60,7 @@ IAM_NAME: str
 - Namespace tag of:
   - Created instances.
   - Allocated elastic IP addresses.
+- Prefix of artifact store S3 bucket created in each region.
 """
 # Set in ec2mc.validate.validate_setup:main
 NAMESPACE: str
@@ -62,6 +74,7 @@ CONFIG_PERMS = 0o600
 PK_PERMS = 0o400
 
 # Tuple of regions found with ec2:GetRegions (filtered through whitelist)
+# Ordered fastest first by measurements in REGION_LATENCY_JSON
 # Set in ec2mc.validate.validate_config:_validate_region_whitelist
 REGIONS: Tuple[str]
 
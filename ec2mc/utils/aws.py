@@ -1,13 +1,17 @@
 """miscellaneous functions that directly/indirectly interact with AWS"""
 
-import re
-from time import sleep
 from typing import Dict, List, Optional
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 from ec2mc import consts
 from ec2mc.utils import halt
+from ec2mc.utils import retry
+
+# IAM's API is throttled per account, so IAM calls are threaded sparingly
+IAM_MAX_THREADS = 4
+
 
 def ec2_client(region: Optional[str]):
     """wrapper for ec2_client_no_validate which validates specified region"""
@@ -32,13 +36,78 @@ def ec2_client_no_validate(region: str):
 
 
 def iam_client():
-    """create and return IAM client using IAM user access key"""
+    """create and return IAM client using IAM user access key
+
+    Adaptive retry mode backs off client-side when IAM throttles requests,
+    which concurrent IAM calls (see IAM_MAX_THREADS) are prone to trigger.
+    """
     return boto3.client("iam",
         aws_access_key_id=consts.KEY_ID,
-        aws_secret_access_key=consts.KEY_SECRET
+        aws_secret_access_key=consts.KEY_SECRET,
+        config=Config(retries={'max_attempts': 10, 'mode': "adaptive"})
+    )
+
+
+def s3_client(region: str):
+    """create and return S3 client using IAM user access key and a region
+
+    If consts.S3_ENDPOINT_URL is set (e.g. to a local S3 stand-in), it is
+    used instead of the region's S3 endpoint, with path-style addressing.
+    """
+    endpoint_url = consts.S3_ENDPOINT_URL
+    addressing_style = "path"
+    if endpoint_url is None:
+        endpoint_url = f"https://s3.{region}.amazonaws.com"
+        addressing_style = "virtual"
+    return boto3.client("s3",
+        aws_access_key_id=consts.KEY_ID,
+        aws_secret_access_key=consts.KEY_SECRET,
+        region_name=region,
+        endpoint_url=endpoint_url,
+        config=Config(
+            signature_version="s3v4",
+            s3={'addressing_style': addressing_style}
+        )
     )
 
 
+def artifact_bucket(region: str) -> str:
+    """return name of region's namespace artifact store S3 bucket
+
+    S3 bucket names are global, so the AWS account ID is included.
+    """
+    account_id = consts.IAM_ARN.split(":")[4]
+    namespace = consts.NAMESPACE.lower().replace("_", "-")
+    return f"{namespace}-artifacts-{account_id}-{region}"
+
+
+def artifact_url(region: str, sha1: str) -> str:
+    """return unsigned URL of artifact in region's artifact store
+
+    The store's bucket policy only allows downloads through the namespace
+    VPC's S3 endpoint (see get_vpc_s3_endpoint), so no credentials needed.
+    """
+    bucket = artifact_bucket(region)
+    if consts.S3_ENDPOINT_URL is not None:
+        return f"{consts.S3_ENDPOINT_URL.rstrip('/')}/{bucket}/{sha1}"
+    return f"https://{bucket}.s3.{region}.amazonaws.com/{sha1}"
+
+
+def get_vpc_s3_endpoint(region: str, vpc_id: str) -> Optional[Dict]:
+    """get VPC's gateway endpoint to region's S3, if it exists
+
+    Requires ec2:DescribeVpcEndpoints permission.
+    """
+    vpc_endpoints = ec2_client(region).describe_vpc_endpoints(Filters=[
+        {'Name': "vpc-id", 'Values': [vpc_id]},
+        {'Name': "service-name", 'Values': [f"com.amazonaws.{region}.s3"]},
+        {'Name': "vpc-endpoint-state", 'Values': ["pending", "available"]}
+    ])['VpcEndpoints']
+    if not vpc_endpoints:
+        return None
+    return vpc_endpoints[0]
+
+
 def get_region_vpc(region: str) -> Optional[Dict]:
     """get VPC from region with name of aws_setup's namespace
 
@@ -66,7 +135,60 @@ def get_vpc_security_groups(region: str, vpc_id: str) -> List[Dict]:
     return [sg for sg in aws_sgs if sg['GroupName'] != "default"]
 
 
-# TODO: Attach tag(s) on resource (e.g. VPC) creation when it becomes supported
+def get_vpc_sg_ids(
+    region: str, vpc_id: str, sg_names: List[str]
+) -> List[str]:
+    """return IDs of named security groups in specified VPC
+
+    Requires ec2:DescribeSecurityGroups permission.
+    """
+    vpc_sgs = get_vpc_security_groups(region, vpc_id)
+    vpc_sg_names = [sg['GroupName'] for sg in vpc_sgs]
+    if not set(sg_names).issubset(set(vpc_sg_names)):
+        halt.err("Following template SG(s) not found from AWS:",
+            *(set(sg_names) - set(vpc_sg_names)))
+    return [sg['GroupId'] for sg in vpc_sgs if sg['GroupName'] in sg_names]
+
+
+def get_vpc_first_subnet_id(region: str, vpc_id: str) -> str:
+    """return ID of VPC's first subnet (alphabetically ordered)
+
+    Requires ec2:DescribeSubnets permission.
+    """
+    vpc_subnets = ec2_client(region).describe_subnets(Filters=[
+        {'Name': "vpc-id", 'Values': [vpc_id]}
+    ])['Subnets']
+    if not vpc_subnets:
+        halt.err(f"VPC {consts.NAMESPACE} in AWS region has no subnets.")
+    vpc_subnets.sort(key=lambda k: k['AvailabilityZone'])
+    return vpc_subnets[0]['SubnetId']
+
+
+def deregister_image(
+    region: str, image_id: str, snapshot_ids: List[str]
+) -> None:
+    """deregister AMI and delete the EBS snapshot(s) backing it
+
+    Requires ec2:DeregisterImage and ec2:DeleteSnapshot permissions.
+    """
+    _ec2_client = ec2_client(region)
+    _ec2_client.deregister_image(ImageId=image_id)
+    for snapshot_id in snapshot_ids:
+        _ec2_client.delete_snapshot(SnapshotId=snapshot_id)
+
+
+def tag_specifications(
+    resource_type: str, name_tag: Optional[str] = None
+) -> List[Dict]:
+    """return TagSpecifications to tag resource (w/ Namespace) on creation
+
+    Args:
+        resource_type (str): EC2 resource type (e.g. "elastic-ip").
+        name_tag (str): A tag value to assign to the tag key "Name".
+    """
+    return [{'ResourceType': resource_type, 'Tags': _new_tags(name_tag)}]
+
+
 def attach_tags(
     region: str, resource_id: str, name_tag: Optional[str] = None
 ) -> None:
@@ -74,33 +196,38 @@ def attach_tags(
 
     Requires ec2:CreateTags permission.
 
-    The functionality of blocking until the resource exists is relied upon.
+    For resources that can't be tagged on creation (e.g. a VPC's main route
+    table). Prefer passing tag_specifications to the create call instead.
 
-    To account for newly created resources, NotFound exceptions are checked
-    for and passed in a loop attempting to create tag(s). Why not use waiters?
-    Because waiters don't work reliably (in my experience), that's why.
+    The functionality of blocking until the resource exists is relied upon.
+    To account for newly created resources, NotFound exceptions are retried
+    (see retry.call). Why not use waiters? Because waiters don't work
+    reliably (in my experience), that's why.
 
     Args:
         region (str): AWS region the resource resides in.
         resource_id (str): The ID of the resource.
         name_tag (str): A tag value to assign to the tag key "Name".
     """
-    new_tags = [{'Key': "Namespace", 'Value': consts.NAMESPACE}]
-    if name_tag is not None:
-        new_tags.append({'Key': "Name", 'Value': name_tag})
+    new_tags = _new_tags(name_tag)
 
     _ec2_client = ec2_client(region)
-    not_found_regex = re.compile("Invalid[a-zA-Z]*\\.NotFound")
-    for _ in range(60):
-        try:
-            _ec2_client.create_tags(Resources=[resource_id], Tags=new_tags)
-            break
-        except ClientError as e:
-            if not_found_regex.search(e.response['Error']['Code']) is None:
-                halt.err(f"Exception when tagging {resource_id}:", str(e))
-            sleep(1)
-    else:
+    try:
+        retry.call(lambda: _ec2_client.create_tags(
+            Resources=[resource_id], Tags=new_tags),
+            codes=["Invalid[a-zA-Z]*\\.NotFound"], label="CreateTags")
+    except retry.DeadlineExceeded:
         halt.err(f"Can't find {resource_id} a minute after its creation.")
+    except ClientError as e:
+        halt.err(f"Exception when tagging {resource_id}:", str(e))
+
+
+def _new_tags(name_tag: Optional[str]) -> List[Dict]:
+    """return Namespace tag, and Name tag if name_tag given"""
+    new_tags = [{'Key': "Namespace", 'Value': consts.NAMESPACE}]
+    if name_tag is not None:
+        new_tags.append({'Key': "Name", 'Value': name_tag})
+    return new_tags
 
 
 def validate_user_exists(path_prefix: str, user_name: str) -> str:
@@ -127,6 +254,29 @@ def validate_group_exists(path_prefix: str, group_name: str) -> str:
     halt.err(f"IAM group \"{group_name}\" not found from AWS.")
 
 
+def access_key_usable(new_key: Dict[str, str], timeout: int = 60) -> bool:
+    """block until IAM access key is usable, and return whether it became so
+
+    New access keys take several seconds to propagate, so iam:GetUser is
+    retried (see retry.call) using the new key until timeout seconds pass.
+    The key's IAM user is assumed to have the iam:GetUser permission.
+
+    Raises:
+        ClientError: If GetUser fails for any reason other than the key
+            not being recognized (yet).
+    """
+    key_client = boto3.client("iam",
+        aws_access_key_id=next(iter(new_key)),
+        aws_secret_access_key=next(iter(new_key.values()))
+    )
+    try:
+        retry.call(key_client.get_user, codes=["InvalidClientTokenId"],
+            timeout=timeout, base_delay=0.5, label="GetUser")
+    except retry.DeadlineExceeded:
+        return False
+    return True
+
+
 def access_key_owner(access_key_id: str) -> Optional[str]:
     """get name of IAM user who owns access key (or None if key invalid)
 
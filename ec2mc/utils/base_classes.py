@@ -87,6 +87,8 @@ class ComponentSetup(ABC):
     describe_actions: List[str]
     upload_actions: List[str]
     delete_actions: List[str]
+    # Components that must be uploaded/deleted before this one
+    dependencies: List[Type["ComponentSetup"]] = []
 
     def __init__(self, config_aws_setup):
         pass
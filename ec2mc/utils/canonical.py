@@ -0,0 +1,122 @@
+"""normalize IAM policy documents and SG rules for cheap comparison
+
+AWS returns documents equivalent to, but not necessarily equal to, what was
+uploaded (reordered lists, single values unwrapped from lists, SG rules
+merged by port range, etc.). Canonical forms are sorted, deduplicated, and
+have defaults filled in, so that equivalent documents hash the same.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Tuple
+
+# IAM policy statement keys whose values may be either a string or a list
+_POLICY_LIST_KEYS = (
+    "Action", "NotAction", "Resource", "NotResource"
+)
+# SG rule protocol numbers AWS describes by name
+_PROTOCOL_NAMES = {"1": "icmp", "6": "tcp", "17": "udp", "58": "icmpv6"}
+# SG rule source list keys, and the key identifying each source
+_SG_SOURCE_KEYS = (
+    ("IpRanges", "CidrIp"),
+    ("Ipv6Ranges", "CidrIpv6"),
+    ("PrefixListIds", "PrefixListId"),
+    ("UserIdGroupPairs", "GroupId")
+)
+
+
+def policy_document(document: Dict) -> Dict:
+    """return canonical form of IAM policy document
+
+    Statements are deduplicated and sorted, and statement values which may
+    be either a string or a list (e.g. "Action") are made sorted lists.
+    """
+    statements = document.get('Statement', [])
+    if isinstance(statements, dict):
+        statements = [statements]
+    return {
+        'Version': document.get('Version', "2008-10-17"),
+        'Statement': _sorted_unique(
+            [_policy_statement(statement) for statement in statements])
+    }
+
+
+def _policy_statement(statement: Dict) -> Dict:
+    """return canonical form of IAM policy statement"""
+    canonical = {}
+    for key, value in statement.items():
+        if key in _POLICY_LIST_KEYS:
+            canonical[key] = _sorted_unique(_as_list(value))
+        elif key == "Condition":
+            canonical[key] = {operator: {
+                condition_key: _sorted_unique(_as_list(condition_value))
+                for condition_key, condition_value in conditions.items()
+            } for operator, conditions in value.items()}
+        else:
+            canonical[key] = value
+    return canonical
+
+
+def ip_permissions(permissions: List[Dict]) -> List[Dict]:
+    """return canonical form of SG IpPermissions as one rule per source
+
+    AWS merges rules sharing a protocol and port range, so each rule is
+    split into single-source rules before being deduplicated and sorted.
+    Omitted ports (e.g. for protocol "-1") are filled in as -1.
+    """
+    rules = []
+    for permission in permissions:
+        protocol = str(permission['IpProtocol']).lower()
+        base_rule = {
+            'IpProtocol': _PROTOCOL_NAMES.get(protocol, protocol),
+            'FromPort': permission.get('FromPort', -1),
+            'ToPort': permission.get('ToPort', -1)
+        }
+        for list_key, id_key in _SG_SOURCE_KEYS:
+            for source in permission.get(list_key, []):
+                rules.append({**base_rule, 'Source': {
+                    list_key: source[id_key],
+                    'Description': source.get('Description', "")
+                }})
+    return _sorted_unique(rules)
+
+
+def digest(canonical: Any) -> str:
+    """return SHA-256 hex digest of canonical form's JSON representation"""
+    return hashlib.sha256(_dumps(canonical).encode("utf-8")).hexdigest()
+
+
+def equal(local: Any, remote: Any) -> bool:
+    """return whether two canonical forms hash the same"""
+    return digest(local) == digest(remote)
+
+
+def diff(local: List, remote: List) -> Tuple[List, List]:
+    """return items of canonical lists unique to local, and unique to remote
+
+    Meant only for displaying differences, after equal returns False.
+    """
+    local_items = {_dumps(item): item for item in local}
+    remote_items = {_dumps(item): item for item in remote}
+    return (
+        [item for key, item in local_items.items() if key not in remote_items],
+        [item for key, item in remote_items.items() if key not in local_items]
+    )
+
+
+def _as_list(value: Any) -> List:
+    """wrap value in list if it isn't already one"""
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+def _sorted_unique(items: List) -> List:
+    """deduplicate and sort items by their JSON representations"""
+    return [item for _, item in sorted(
+        {_dumps(item): item for item in items}.items())]
+
+
+def _dumps(obj: Any) -> str:
+    """return compact JSON representation with keys sorted"""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"))
@@ -1,7 +1,11 @@
+import json
+from queue import Queue
+from threading import Thread
+
 from ec2mc import consts
 from ec2mc.utils import aws
 from ec2mc.utils import halt
-from ec2mc.utils.find import find_instances
+from ec2mc.utils import os2
 from ec2mc.utils.threader import Threader
 
 def main(elastic_ip_address):
@@ -11,40 +15,239 @@ def main(elastic_ip_address):
 
     Halts if address with IP not found. This functionality is relied upon.
     """
-    try:
-        return next(address for address in probe_regions()
-            if address['ip'] == elastic_ip_address)
-    except StopIteration:
+    address = lookup(elastic_ip_address)
+    if address is None:
         halt.err("You do not possess the specified elastic IP address.")
+    return address
+
+
+def find_many(elastic_ip_addresses):
+    """return elastic IP addresses with specified IPs, in the given order
+
+    Requires ec2:DescribeInstances and ec2:DescribeAddresses permissions.
+
+    A single IP is looked up directly (see lookup), while multiple IPs are
+    found with a single scan of all whitelisted regions. Halts if any
+    address not found.
+    """
+    elastic_ip_addresses = list(dict.fromkeys(elastic_ip_addresses))
+    if len(elastic_ip_addresses) == 1:
+        return [main(elastic_ip_addresses[0])]
+
+    all_addresses = {address['ip']: address for address in probe_regions()}
+    missing_ips = [ip for ip in elastic_ip_addresses
+        if ip not in all_addresses]
+    if missing_ips:
+        halt.err("You do not possess following elastic IP address(es):",
+            *missing_ips)
+    return [all_addresses[ip] for ip in elastic_ip_addresses]
+
+
+def lookup(elastic_ip_address):
+    """return elastic IP address with specified IP, or None if not found
+
+    Requires ec2:DescribeInstances and ec2:DescribeAddresses permissions.
+
+    Rather than scanning every address and instance, the region recorded
+    for the IP in consts.ADDRESS_INDEX_JSON is queried first. Otherwise,
+    all whitelisted regions are queried for the IP at once, and the first
+    hit is returned.
+    """
+    address_index = _load_index()
+    indexed_region = address_index.get(elastic_ip_address, {}).get('region')
+
+    address = None
+    if indexed_region in consts.REGIONS:
+        address = _first_hit([indexed_region], elastic_ip_address)
+    if address is None:
+        address = _first_hit([region for region in consts.REGIONS
+            if region != indexed_region], elastic_ip_address)
+
+    if address is None:
+        address_index.pop(elastic_ip_address, None)
+    else:
+        if 'instance_id' in address:
+            instance_name = _probe_instance_names(
+                address['region'], [address['instance_id']]).get(
+                (address['region'], address['instance_id']))
+            if instance_name is not None:
+                address['instance_name'] = instance_name
+        address_index[elastic_ip_address] = {
+            'region': address['region'],
+            'allocation_id': address['allocation_id']
+        }
+    _save_index(address_index)
+    return address
 
 
 def probe_regions():
     """return elastic IP addresses from whitelisted regions
 
     Requires ec2:DescribeInstances and ec2:DescribeAddresses permissions.
-    """
-    all_instances = find_instances.probe_regions()
 
+    Each region's instances and addresses are described in the same
+    concurrent pass, then addresses are joined to their instances' names.
+    """
     threader = Threader()
     for region in consts.REGIONS:
-        threader.add_thread(_probe_region, (region, all_instances))
-    region_addresses = threader.get_results(return_dict=True)
+        threader.add_thread(_probe_part, ((region, "instances"),))
+        threader.add_thread(_probe_part, ((region, "addresses"),))
+    results = threader.get_results(return_dict=True)
+
+    failed_regions = sorted({region for region in consts.REGIONS
+        for kind in ("instances", "addresses")
+        if (region, kind) not in results})
+    if failed_regions:
+        halt.err("Following region(s) could not be probed:",
+            *failed_regions)
+
+    # Instance names keyed by (region, instance ID)
+    instance_names = {}
+    for region in consts.REGIONS:
+        instance_names.update(results[(region, "instances")])
+
+    all_addresses = []
+    for region in consts.REGIONS:
+        for address in results[(region, "addresses")]:
+            instance_key = (region, address.get('instance_id'))
+            if instance_key in instance_names:
+                address['instance_name'] = instance_names[instance_key]
+            all_addresses.append({'region': region, **address})
+
+    # Whitelisted regions' index entries replaced by what was just found
+    address_index = {ip: entry for ip, entry in _load_index().items()
+        if entry['region'] not in consts.REGIONS}
+    for address in all_addresses:
+        address_index[address['ip']] = {
+            'region': address['region'],
+            'allocation_id': address['allocation_id']
+        }
+    _save_index(address_index)
+
+    return all_addresses
 
-    return [{'region': region, **address}
-        for region, addresses in region_addresses.items()
-        for address in addresses]
 
+def _probe_part(probe_key):
+    """return region's instance names or addresses, for probe_regions
 
-def _probe_region(region, instances):
+    Args:
+        probe_key (tuple): Region, and either "instances" or "addresses".
+            Used by Threader to key the results.
+    """
+    region, kind = probe_key
+    if kind == "instances":
+        return _probe_instance_names(region)
+    return _probe_addresses(region)
+
+
+def _first_hit(regions, elastic_ip_address):
+    """query regions for IP at once, returning on the first hit
+
+    Returns:
+        dict/None: Address (with 'region' key) with IP, or None if no
+            region has it. If no region has it and any query raised (or
+            halted), the first exception is re-raised.
+    """
+    hits = Queue()
+    for region in regions:
+        Thread(target=_queue_probe, args=(hits, region, elastic_ip_address),
+            daemon=True).start()
+
+    errors = []
+    for _ in regions:
+        region, result = hits.get()
+        if isinstance(result, BaseException):
+            errors.append(result)
+        elif result:
+            return {'region': region, **result[0]}
+    if errors:
+        raise errors[0]
+    return None
+
+
+def _queue_probe(hits, region, elastic_ip_address):
+    """put region's address(es) with IP (or raised exception) into queue
+
+    BaseException is caught, so that halt's SystemExit is queued too
+    instead of leaving _first_hit waiting on the queue forever.
+    """
+    try:
+        hits.put((region, _probe_addresses(region, elastic_ip_address)))
+    except BaseException as e:
+        hits.put((region, e))
+
+
+def _load_index():
+    """return local IP to (region, allocation ID) index of addresses"""
+    if not consts.ADDRESS_INDEX_JSON.is_file():
+        return {}
+    try:
+        return json.loads(
+            consts.ADDRESS_INDEX_JSON.read_text(encoding="utf-8"))
+    except ValueError:
+        return {}
+
+
+def _save_index(address_index):
+    """save local IP to (region, allocation ID) index of addresses"""
+    os2.save_json(dict(sorted(address_index.items())),
+        consts.ADDRESS_INDEX_JSON)
+
+
+def _probe_instance_names(region, instance_ids=None):
+    """return names of region's non-terminated namespace instances
+
+    Requires ec2:DescribeInstances permission.
+
+    Args:
+        region (str): AWS region to probe.
+        instance_ids (list[str]): Only describe instances with these IDs.
+
+    Returns:
+        dict: Instance names (str) keyed by (region, instance ID) tuples.
+    """
+    instance_filter = [
+        {'Name': "tag:Namespace", 'Values': [consts.NAMESPACE]},
+        {'Name': "tag-key", 'Values': ["Name"]}
+    ]
+    if instance_ids is not None:
+        instance_filter.append(
+            {'Name': "instance-id", 'Values': instance_ids})
+    reservations = aws.ec2_client(region).describe_instances(
+        Filters=instance_filter)['Reservations']
+
+    return {(region, instance['InstanceId']): tag['Value']
+        for reservation in reservations
+        for instance in reservation['Instances']
+        if instance['State']['Name'] not in ("shutting-down", "terminated")
+        for tag in instance['Tags'] if tag['Key'] == "Name"}
+
+
+def _probe_addresses(region, elastic_ip_address=None):
     """return elastic IP addresses in region
 
     Requires ec2:DescribeAddresses permission.
+
+    Args:
+        region (str): AWS region to probe.
+        elastic_ip_address (str): Only describe address with this IP.
+
+    Returns:
+        list[dict]: Region's namespace addresses, sorted by IP.
+            'allocation_id' (str): Allocation ID of address.
+            'ip' (str): Public IP of address.
+            'association_id' (str): Association ID, if associated.
+            'instance_id' (str): ID of instance, if associated.
     """
-    ec2_client = aws.ec2_client(region)
-    addresses = ec2_client.describe_addresses(Filters=[
+    address_filter = [
         {'Name': "domain", 'Values': ["vpc"]},
         {'Name': "tag:Namespace", 'Values': [consts.NAMESPACE]}
-    ])['Addresses']
+    ]
+    if elastic_ip_address is not None:
+        address_filter.append(
+            {'Name': "public-ip", 'Values': [elastic_ip_address]})
+    addresses = aws.ec2_client(region).describe_addresses(
+        Filters=address_filter)['Addresses']
 
     region_addresses = []
     for address in addresses:
@@ -55,11 +258,7 @@ def _probe_region(region, instances):
         if 'AssociationId' in address:
             address_info['association_id'] = address['AssociationId']
         if 'InstanceId' in address:
-            for instance in instances:
-                if (instance['id'] == address['InstanceId'] and
-                        instance['region'] == region):
-                    address_info['instance_name'] = instance['name']
-                    break
+            address_info['instance_id'] = address['InstanceId']
         region_addresses.append(address_info)
 
     return sorted(region_addresses, key=lambda k: k['ip'])
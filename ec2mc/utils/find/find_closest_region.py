@@ -1,34 +1,330 @@
+import json
+import socket
+import ssl
+from statistics import median
+from threading import Thread
+from time import time
 from timeit import default_timer as timer
-from typing import List
+from typing import Dict, List, Optional, Tuple
+from botocore.exceptions import BotoCoreError, ClientError
 
+from ec2mc import consts
 from ec2mc.utils import aws
+from ec2mc.utils import halt
+from ec2mc.utils import os2
 from ec2mc.utils.threader import Threader
 
+# Seconds for which persisted latency measurements are reused
+LATENCY_TTL = 7 * 24 * 60 * 60
+# Connection probes made to each region, then to each remaining candidate
+INITIAL_PROBES = 3
+EXTRA_PROBES = 4
+# Maximum number of extra probe rounds among candidates
+MAX_ROUNDS = 2
+# Regions slower than this multiple of the fastest region are eliminated
+ELIMINATION_RATIO = 1.5
+# Timed ec2:DescribeRegions requests made to each final candidate
+REQUEST_PROBES = 3
+# Seconds before an unresponsive endpoint probe is given up on
+PROBE_TIMEOUT = 3
+
+
 def main(regions: List[str]) -> str:
-    """repeatedly use ec2:DescribeRegions action to estimate closest region"""
-    ping_num = 50
+    """estimate closest region by probing regions' EC2 endpoints
+
+    Requires ec2:DescribeRegions permission.
+    """
+    latencies = region_latencies(regions)
+    return min(regions, key=lambda region: _rank_key(latencies[region]))
+
+
+def region_latencies(
+    regions: List[str], *, refresh: bool = False
+) -> Dict[str, Dict]:
+    """return latency measurements of regions, measuring if not cached
+
+    Measurements are persisted to consts.REGION_LATENCY_JSON, and reused
+    for LATENCY_TTL seconds if they cover all specified regions. If no
+    region is reachable, older measurements are used instead.
+
+    Returns:
+        dict: Latency measurements for each region (None if unmeasured).
+            Region name (dict):
+                'connect' (float/None): Median TCP connect time (seconds).
+                'tls' (float/None): Median TLS handshake time (seconds).
+                'request' (float/None): Median DescribeRegions request time
+                    (seconds), only measured for final candidates.
+                'measured_at' (float): Unix time of the measurement.
+    """
+    if not refresh and is_fresh(regions):
+        return cached_latencies()
+
+    latencies = _measure_and_save(regions)
+    if latencies is None:
+        cached = cached_latencies(stale_ok=True)
+        if cached is not None and set(regions).issubset(cached):
+            return cached
+        halt.err("No AWS region's EC2 endpoint could be reached.",
+            "  Check your internet connection.")
+    return latencies
+
+
+def cached_latencies(
+    *, stale_ok: bool = False
+) -> Optional[Dict[str, Dict]]:
+    """return persisted latency measurements, or None if missing/invalid
+
+    Args:
+        stale_ok (bool): Include measurements older than LATENCY_TTL too.
+            Old measurements are still better than none for ordering.
+
+    Returns:
+        dict/None: Persisted measurements of each region (see
+            region_latencies), leaving out stale regions unless stale_ok.
+    """
+    if not consts.REGION_LATENCY_JSON.is_file():
+        return None
+    try:
+        latency_cache = json.loads(
+            consts.REGION_LATENCY_JSON.read_text(encoding="utf-8"))
+        return {region: latency
+            for region, latency in latency_cache['regions'].items()
+            if stale_ok or time() - latency['measured_at'] <= LATENCY_TTL}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def is_fresh(regions: List[str]) -> bool:
+    """return whether persisted measurements of regions are all fresh"""
+    cached = cached_latencies()
+    return cached is not None and set(regions).issubset(cached)
+
+
+def refresh(regions: List[str]) -> bool:
+    """re-measure and persist latencies of regions (see _measure_and_save)
+
+    Returns:
+        bool: Whether any region was reachable (and so anything persisted).
+    """
+    return _measure_and_save(regions) is not None
+
+
+def refresh_in_background(regions: List[str]) -> Optional[Thread]:
+    """re-measure region latencies in a thread if cache is stale/partial
+
+    The thread is a daemon, so the script doesn't wait for it to finish
+    before exiting. Measurements are then only persisted if the command
+    ran long enough. Nothing is printed by the thread.
+
+    Returns:
+        Thread/None: Started thread, or None if cache is still fresh.
+    """
+    if is_fresh(regions):
+        return None
+    thread = Thread(target=refresh, args=(regions,), daemon=True)
+    thread.start()
+    return thread
+
+
+def by_latency(regions: List[str]) -> List[str]:
+    """return regions ordered fastest first by persisted measurements
+
+    Unmeasured regions are placed last, keeping their given order.
+    """
+    latencies = cached_latencies(stale_ok=True) or {}
+    return sorted(regions, key=lambda region: _handshake(
+        latencies.get(region, {'connect': None})))
+
+
+def closest_measured(default: str) -> str:
+    """return region with lowest persisted handshake time, else default
+
+    Used for region-agnostic calls (e.g. ec2:DescribeRegions).
+    """
+    latencies = cached_latencies(stale_ok=True)
+    if not latencies:
+        return default
+    closest = min(latencies, key=lambda region: _handshake(
+        latencies[region]))
+    if latencies[closest]['connect'] is None:
+        return default
+    return closest
+
+
+def suggest_whitelist(whitelist: List[str]) -> List[str]:
+    """return measured regions faster than every whitelisted region
+
+    Returns:
+        list[str]: Regions with lower persisted handshake time than the
+            fastest whitelisted region, fastest first. Empty if nothing
+            measured.
+    """
+    latencies = cached_latencies(stale_ok=True)
+    if not latencies:
+        return []
+    fastest_listed = min((_handshake(latencies[region])
+        for region in whitelist if region in latencies),
+        default=float("inf"))
+    return sorted((region for region in latencies
+        if region not in whitelist and
+        _handshake(latencies[region]) < fastest_listed),
+        key=lambda region: _handshake(latencies[region]))
+
+
+def _measure_and_save(regions: List[str]) -> Optional[Dict[str, Dict]]:
+    """measure regions and merge into persisted latencies
+
+    Nothing is persisted if no region is reachable. Otherwise, the new
+    measurements replace persisted ones, except that a region unreachable
+    this time keeps its previous successful measurement (and that
+    measurement's age). Persisted regions not measured this time are kept.
+
+    Returns:
+        dict/None: This run's measurements of regions (see
+            region_latencies), or None if no region was reachable.
+    """
+    latencies = _measure(regions)
+    if all(latency['connect'] is None for latency in latencies.values()):
+        return None
+    measured_at = time()
+    for latency in latencies.values():
+        latency['measured_at'] = measured_at
+
+    merged_latencies = cached_latencies(stale_ok=True) or {}
+    for region, latency in latencies.items():
+        previous = merged_latencies.get(region)
+        if (latency['connect'] is None and
+                previous is not None and previous['connect'] is not None):
+            continue
+        merged_latencies[region] = latency
+    os2.save_json({'regions': merged_latencies}, consts.REGION_LATENCY_JSON)
+    return latencies
+
+
+def _measure(regions: List[str]) -> Dict[str, Dict]:
+    """adaptively probe regions, concentrating samples on close candidates
+
+    Each region's endpoint gets a few connection probes. Regions clearly
+    slower than the fastest are eliminated, and remaining candidates get
+    more probes, for up to MAX_ROUNDS rounds. Final candidates then have
+    full API requests timed.
+    """
+    samples = {region: [] for region in regions}
+    candidates = list(regions)
+    probe_num = INITIAL_PROBES
+
+    for _ in range(MAX_ROUNDS + 1):
+        threader = Threader()
+        for region in candidates:
+            threader.add_thread(_probe_endpoint, (region, probe_num))
+        for region, region_samples in threader.get_results(
+                return_dict=True).items():
+            samples[region].extend(region_samples)
+
+        handshakes = {region: _median_handshake(samples[region])
+            for region in candidates}
+        reachable = [handshake for handshake in handshakes.values()
+            if handshake is not None]
+        if not reachable:
+            candidates = []
+            break
+        fastest = min(reachable)
+        candidates = [region for region in candidates
+            if handshakes[region] is not None and
+            handshakes[region] <= fastest * ELIMINATION_RATIO]
+        if len(candidates) == 1:
+            break
+        probe_num = EXTRA_PROBES
 
     threader = Threader()
+    for region in candidates:
+        threader.add_thread(_time_requests, (region,))
+    request_times = threader.get_results(return_dict=True)
+
+    latencies = {}
     for region in regions:
-        ec2_client = aws.ec2_client_no_validate(region)
-        for _ in range(ping_num):
-            threader.add_thread(_get_region_latency, (ec2_client,))
-    latencies = threader.get_results()
-
-    latencies_for_regions = []
-    for i, region in enumerate(regions):
-        region_latencies = sorted(latencies[i*ping_num:(i+1)*ping_num])
-        region_latencies = region_latencies[ping_num//5:-ping_num//5]
-        region_latency = sum(region_latencies) / len(region_latencies)
-        latencies_for_regions.append((region, region_latency))
-
-    latencies_for_regions.sort(key=lambda tup: tup[1])
-    return latencies_for_regions[0][0]
-
-
-def _get_region_latency(ec2_client) -> float:
-    """get AWS region endpoint latency"""
-    start_time = timer()
-    ec2_client.describe_regions()
-    end_time = timer()
-    return end_time - start_time
+        completed = [sample for sample in samples[region]
+            if sample is not None]
+        latencies[region] = {
+            'connect': median(c for c, _ in completed) if completed else None,
+            'tls': median(t for _, t in completed) if completed else None,
+            'request': request_times.get(region)
+        }
+    return latencies
+
+
+def _probe_endpoint(
+    region: str, probe_num: int
+) -> List[Optional[Tuple[float, float]]]:
+    """time TCP connects and TLS handshakes to region's EC2 endpoint
+
+    DNS is resolved beforehand, so that it isn't included in the timings.
+
+    Returns:
+        list[tuple/None]: TCP connect and TLS handshake times (seconds) of
+            each probe, or None for each probe that failed.
+    """
+    host = f"ec2.{region}.amazonaws.com"
+    try:
+        address = socket.getaddrinfo(
+            host, 443, type=socket.SOCK_STREAM)[0][4][:2]
+    except OSError:
+        return [None] * probe_num
+
+    tls_context = ssl.create_default_context()
+    samples = []
+    for _ in range(probe_num):
+        try:
+            start_time = timer()
+            with socket.create_connection(
+                    address, timeout=PROBE_TIMEOUT) as sock:
+                connect_time = timer()
+                with tls_context.wrap_socket(sock, server_hostname=host):
+                    handshake_time = timer()
+            samples.append(
+                (connect_time - start_time, handshake_time - connect_time))
+        except OSError:
+            # Don't wait out further timeouts of an unresponsive endpoint
+            return samples + [None] * (probe_num - len(samples))
+    return samples
+
+
+def _time_requests(region: str) -> Optional[float]:
+    """return median time of ec2:DescribeRegions requests made to region
+
+    Returns None if a request fails.
+    """
+    ec2_client = aws.ec2_client_no_validate(region)
+    request_times = []
+    for _ in range(REQUEST_PROBES):
+        start_time = timer()
+        try:
+            ec2_client.describe_regions()
+        except (BotoCoreError, ClientError):
+            return None
+        request_times.append(timer() - start_time)
+    # The first request includes the client's own connection setup
+    return median(request_times[1:])
+
+
+def _median_handshake(samples) -> Optional[float]:
+    """return median TCP connect plus TLS handshake time of samples"""
+    completed = [sum(sample) for sample in samples if sample is not None]
+    if not completed:
+        return None
+    return median(completed)
+
+
+def _handshake(latency: Dict) -> float:
+    """return TCP connect plus TLS handshake time, inf if unmeasured"""
+    if latency['connect'] is None:
+        return float("inf")
+    return latency['connect'] + latency['tls']
+
+
+def _rank_key(latency: Dict) -> Tuple[float, float]:
+    """sort key ranking regions by request time, then connection time"""
+    request = latency['request']
+    if request is None:
+        request = float("inf")
+    return (request, _handshake(latency))
@@ -0,0 +1,86 @@
+from ec2mc import consts
+from ec2mc.utils import aws
+from ec2mc.utils import halt
+from ec2mc.utils.threader import Threader
+
+def base_image(region):
+    """return the Amazon Linux 2 AMI described by consts.AMI_NAME
+
+    Requires ec2:DescribeImages permission.
+    """
+    aws_images = aws.ec2_client(region).describe_images(Filters=[
+        {'Name': "name", 'Values': [consts.AMI_NAME]}
+    ])['Images']
+    if not aws_images:
+        halt.err("AMI name specified by script is invalid.")
+    return aws_images[0]
+
+
+def template_image(region, template_name):
+    """return newest available baked AMI for template, or None if none
+
+    Requires ec2:DescribeImages permission.
+    """
+    template_images = [image for image in _probe_region(region)
+        if image['template'] == template_name and
+        image['state'] == "available"]
+    if not template_images:
+        return None
+    return max(template_images, key=lambda k: k['creation_date'])
+
+
+def probe_regions(regions=None):
+    """return namespace baked AMIs from whitelisted regions
+
+    Requires ec2:DescribeImages permission.
+    """
+    if regions is None:
+        regions = consts.REGIONS
+
+    threader = Threader()
+    for region in regions:
+        threader.add_thread(_probe_region, (region,))
+    region_images = threader.get_results(return_dict=True)
+
+    return [{'region': region, **image}
+        for region, images in region_images.items()
+        for image in images]
+
+
+def _probe_region(region):
+    """return namespace baked AMIs in region
+
+    Requires ec2:DescribeImages permission.
+
+    Returns:
+        list[dict]: Baked AMI(s) found in region.
+            'id' (str): ID of AMI.
+            'template' (str): Tag value for AMI tag key "Name".
+            'state' (str): State of AMI (e.g. "pending", "available").
+            'creation_date' (str): ISO 8601 timestamp of AMI creation.
+            'device_name' (str): Device name of AMI's root volume.
+            'snapshot_ids' (list[str]): ID(s) of AMI's EBS snapshot(s).
+    """
+    images = aws.ec2_client(region).describe_images(
+        Owners=["self"],
+        Filters=[{'Name': "tag:Namespace", 'Values': [consts.NAMESPACE]}]
+    )['Images']
+
+    region_images = []
+    for image in images:
+        image_tags = {tag['Key']: tag['Value']
+            for tag in image.get('Tags', [])}
+        if 'Name' not in image_tags:
+            continue
+        region_images.append({
+            'id': image['ImageId'],
+            'template': image_tags['Name'],
+            'state': image['State'],
+            'creation_date': image['CreationDate'],
+            'device_name': image['RootDeviceName'],
+            'snapshot_ids': [device['Ebs']['SnapshotId'] for device
+                in image['BlockDeviceMappings'] if 'Ebs' in device]
+        })
+
+    return sorted(region_images,
+        key=lambda k: (k['template'], k['creation_date']))
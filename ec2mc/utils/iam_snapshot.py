@@ -0,0 +1,127 @@
+"""index namespace IAM users, groups, and policies in a few API calls"""
+
+import json
+from threading import Lock
+from typing import Dict, List, Optional
+from urllib.parse import unquote
+
+from ec2mc import consts
+from ec2mc.utils import aws
+
+# Snapshot shared by everything within a single ec2mc command (see shared)
+_shared_snapshot = None
+_shared_lock = Lock()
+
+
+class IAMSnapshot:
+    """in-memory index of namespace IAM users, groups, and policies
+
+    Built from paginated iam:GetAccountAuthorizationDetails, replacing
+    per-entity listings (list_groups, get_group, list_groups_for_user,
+    list_entities_for_policy, etc.). Access keys aren't included.
+
+    Group and policy memberships include users outside of the namespace
+    (e.g. the user that uploaded the AWS setup), as such users still
+    prevent groups and policies from being deleted.
+
+    Attributes:
+        users (dict): Namespace IAM user details, keyed by user name.
+        groups (dict): Namespace IAM group details, keyed by group name.
+        policies (dict): Namespace IAM customer managed policy details,
+            keyed by policy name. 'Document' holds default version's
+            policy document.
+    """
+
+    def __init__(self):
+        self._path_prefix = f"/{consts.NAMESPACE}/"
+        self.users = {}
+        self.groups = {}
+        self.policies = {}
+        # Details of all IAM users, namespace or not, keyed by user name
+        self._all_users = {}
+
+        paginator = aws.iam_client().get_paginator(
+            "get_account_authorization_details")
+        for page in paginator.paginate(
+                Filter=["User", "Group", "LocalManagedPolicy"]):
+            for user in page['UserDetailList']:
+                self._all_users[user['UserName']] = user
+                if user['Path'].startswith(self._path_prefix):
+                    self.users[user['UserName']] = user
+            for group in page['GroupDetailList']:
+                if group['Path'].startswith(self._path_prefix):
+                    self.groups[group['GroupName']] = group
+            for policy in page['Policies']:
+                if policy['Path'].startswith(self._path_prefix):
+                    policy['Document'] = self._default_document(policy)
+                    self.policies[policy['PolicyName']] = policy
+
+
+    def user_name(self, user_name: str) -> Optional[str]:
+        """return exact name of namespace user (case insensitive), or None"""
+        return next((name for name in self.users
+            if name.lower() == user_name.lower()), None)
+
+
+    def user_groups(self, user_name: str) -> List[str]:
+        """return name(s) of all IAM group(s) user is in"""
+        return list(self.users[user_name]['GroupList'])
+
+
+    def user_policy_arns(self, user_name: str) -> List[str]:
+        """return ARN(s) of managed policy(s) attached directly to user"""
+        return [policy['PolicyArn'] for policy
+            in self.users[user_name]['AttachedManagedPolicies']]
+
+
+    def group_users(self, group_name: str) -> List[str]:
+        """return name(s) of all user(s) in IAM group, namespace or not"""
+        return [name for name, user in self._all_users.items()
+            if group_name in user['GroupList']]
+
+
+    def group_policy_arns(self, group_name: str) -> Dict[str, str]:
+        """return namespace policy(s) attached to group, name to ARN"""
+        return {policy['PolicyName']: policy['PolicyArn'] for policy
+            in self.groups[group_name]['AttachedManagedPolicies']
+            if f":policy{self._path_prefix}" in policy['PolicyArn']}
+
+
+    def policy_users(self, policy_name: str) -> List[str]:
+        """return name(s) of all user(s) policy is attached to directly"""
+        policy_arn = self.policies[policy_name]['Arn']
+        return [name for name, user in self._all_users.items()
+            if any(policy['PolicyArn'] == policy_arn
+                for policy in user['AttachedManagedPolicies'])]
+
+
+    @staticmethod
+    def _default_document(policy):
+        """return policy's default version's document as a dict"""
+        document = next(version['Document'] for version
+            in policy['PolicyVersionList'] if version['IsDefaultVersion'])
+        # Documents are URL-encoded JSON if not already decoded by botocore
+        if isinstance(document, str):
+            document = json.loads(unquote(document))
+        return document
+
+
+def shared() -> IAMSnapshot:
+    """return snapshot shared by this process, loading it on first call
+
+    For commands whose components each need IAM state before any of them
+    make changes (e.g. aws_setup's prechecks and component checks). Such
+    commands must call reset_shared when starting, and after changing IAM.
+    """
+    global _shared_snapshot
+    with _shared_lock:
+        if _shared_snapshot is None:
+            _shared_snapshot = IAMSnapshot()
+        return _shared_snapshot
+
+
+def reset_shared() -> None:
+    """discard shared snapshot, so that the next shared call reloads it"""
+    global _shared_snapshot
+    with _shared_lock:
+        _shared_snapshot = None
@@ -0,0 +1,200 @@
+"""query Minecraft servers using the server list ping protocol"""
+
+import json
+import socket
+import struct
+from time import monotonic
+from time import sleep
+
+# Port Minecraft servers listen on by default (see server.properties)
+DEFAULT_PORT = 25565
+# Seconds that each ping may take before it is considered failed
+PING_TIMEOUT = 3
+# Seconds between pings when waiting for a server to become joinable
+POLL_INTERVAL = 2
+# Default seconds to wait for servers to become joinable (see --joinable)
+JOINABLE_TIMEOUT = 300
+# Handshake protocol version used by clients that only want server status
+STATUS_PROTOCOL = -1
+
+
+def status(host, port=DEFAULT_PORT, *, timeout=PING_TIMEOUT):
+    """return Minecraft server's status, as shown in the client server list
+
+    Args:
+        host (str): IP or hostname of the server.
+        port (int): Port the server listens on.
+        timeout (float): Seconds to wait for connecting and each response.
+
+    Returns:
+        dict: Status of the server.
+            'version' (str): Minecraft version the server runs.
+            'players_online' (int): Number of players online.
+            'players_max' (int): Maximum number of players.
+            'latency' (float): Round trip time of a ping, in milliseconds.
+
+    Raises:
+        OSError: If the server can't be connected to, or stops responding.
+        ValueError: If the server's response is malformed.
+    """
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall(_packet(0x00,
+            _varint(STATUS_PROTOCOL) +
+            _string(host) +
+            struct.pack(">H", port) +
+            _varint(1)))
+        sock.sendall(_packet(0x00, b""))
+        packet_id, payload = _read_packet(sock)
+        if packet_id != 0x00:
+            raise ValueError(f"Unexpected packet ID {packet_id}.")
+        response = json.loads(_read_string(payload))
+
+        ping_time = monotonic()
+        sock.sendall(_packet(0x01, struct.pack(">q", 0)))
+        packet_id, _ = _read_packet(sock)
+        latency = (monotonic() - ping_time) * 1000
+        if packet_id != 0x01:
+            raise ValueError(f"Unexpected packet ID {packet_id}.")
+
+    try:
+        return {
+            'version': response['version']['name'],
+            'players_online': response['players']['online'],
+            'players_max': response['players']['max'],
+            'latency': latency
+        }
+    except (KeyError, TypeError):
+        raise ValueError("Server status missing version or player info.")
+
+
+def wait_until_joinable(host, deadline, port=DEFAULT_PORT, *,
+        interval=POLL_INTERVAL):
+    """ping server until it responds, or until deadline passes
+
+    Args:
+        host (str): IP or hostname of the server.
+        deadline (float): time.monotonic time to stop pinging at.
+        port (int): Port the server listens on.
+        interval (float): Seconds between the starts of consecutive pings.
+
+    Returns:
+        dict/None: Status of the server (see status), or None if the server
+            didn't respond before deadline.
+            'ready_at' (float): time.monotonic time the server responded.
+    """
+    while True:
+        attempt_time = monotonic()
+        timeout = min(PING_TIMEOUT, deadline - attempt_time)
+        if timeout <= 0:
+            return None
+        try:
+            server_status = status(host, port, timeout=timeout)
+            server_status['ready_at'] = monotonic()
+            return server_status
+        except (OSError, ValueError):
+            pass
+        sleep(max(min(attempt_time + interval, deadline) - monotonic(), 0))
+
+
+def print_joinable(server_status, since, timeout):
+    """print server's status, and how long it took to become joinable
+
+    Args:
+        server_status (dict/None): See what wait_until_joinable returns.
+        since (float): time.monotonic time to measure time-to-joinable from.
+        timeout (float): Seconds waited for the server, if it didn't respond.
+    """
+    if server_status is None:
+        print(f"  Server not joinable after waiting {timeout} seconds.")
+        return
+    print(f"  Server joinable after "
+        f"{server_status['ready_at'] - since:.0f} seconds.")
+    print(f"    Version: {server_status['version']}")
+    print(f"    Players: {server_status['players_online']}/"
+        f"{server_status['players_max']}")
+    print(f"    Latency: {server_status['latency']:.0f} ms")
+
+
+def add_argparse_args(cmd_parser):
+    """add joinable server wait arguments to a command's argparse parser"""
+    cmd_parser.add_argument(
+        "-j", "--joinable", action="store_true",
+        help=("Wait for the Minecraft server(s) to accept players, then "
+            "report version, player count, and latency."))
+    cmd_parser.add_argument(
+        "--joinable_timeout", type=int, default=JOINABLE_TIMEOUT,
+        metavar="", help=("Seconds to wait for each server to become "
+            f"joinable. Defaults to {JOINABLE_TIMEOUT}."))
+
+
+def _packet(packet_id, data):
+    """return packet with ID and data, prefixed with its length"""
+    body = _varint(packet_id) + data
+    return _varint(len(body)) + body
+
+
+def _varint(value):
+    """return int encoded as a VarInt (negative ints as unsigned 32-bit)"""
+    value &= 0xFFFFFFFF
+    encoded = b""
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            encoded += bytes([byte | 0x80])
+        else:
+            return encoded + bytes([byte])
+
+
+def _string(text):
+    """return string encoded as UTF-8, prefixed with its length"""
+    encoded = text.encode("utf-8")
+    return _varint(len(encoded)) + encoded
+
+
+def _read_packet(sock):
+    """read packet from socket, and return its ID and remaining payload"""
+    length = _read_varint(lambda: _recv_exact(sock, 1)[0])
+    payload = iter(_recv_exact(sock, length))
+    packet_id = _read_varint(lambda: _next_byte(payload))
+    return packet_id, bytes(payload)
+
+
+def _read_string(payload):
+    """decode length-prefixed UTF-8 string from payload"""
+    data = iter(payload)
+    length = _read_varint(lambda: _next_byte(data))
+    encoded = bytes(data)
+    if len(encoded) < length:
+        raise ValueError("String shorter than its length prefix.")
+    return encoded[:length].decode("utf-8")
+
+
+def _read_varint(read_byte):
+    """decode VarInt, getting each of its bytes by calling read_byte"""
+    value = 0
+    for index in range(5):
+        byte = read_byte()
+        value |= (byte & 0x7F) << (7 * index)
+        if not byte & 0x80:
+            return value
+    raise ValueError("VarInt longer than 5 bytes.")
+
+
+def _next_byte(data):
+    """return next byte of data iterator"""
+    try:
+        return next(data)
+    except StopIteration:
+        raise ValueError("Packet shorter than expected.")
+
+
+def _recv_exact(sock, length):
+    """receive exactly length bytes from socket"""
+    received = b""
+    while len(received) < length:
+        chunk = sock.recv(length - len(received))
+        if not chunk:
+            raise ConnectionError("Connection closed by server.")
+        received += chunk
+    return received
@@ -3,8 +3,8 @@
 import os
 from pathlib import Path
 from typing import Dict, List, Union
-import shutil
 import json
+import zipfile
 import jsonschema
 from jsonschema.exceptions import ValidationError
 from ruamel import yaml
@@ -79,30 +79,46 @@ def parse_yaml(file_path: Path) -> Union[Dict, List]:
 def create_configuration_zip(
     user_name: str, new_key: Dict[str, str], give_ssh_key: bool
 ) -> None:
-    """create zipped config folder containing new IAM user access key"""
-    temp_dir = consts.CONFIG_DIR / ".ec2mc"
-    if temp_dir.is_dir():
-        shutil.rmtree(temp_dir, onerror=del_readonly)
-    temp_dir.mkdir()
+    """create zipped config folder containing new IAM user access key
 
+    Files are streamed straight from the config directory into the archive
+    (under a top-level .ec2mc directory) in sorted order, rather than first
+    being copied to a temporary directory.
+
+    Args:
+        user_name (str): Name of IAM user the configuration is for.
+        new_key (dict): IAM user's access key ID and secret.
+        give_ssh_key (bool): Include RSA private key file(s) in archive.
+    """
     new_config_dict = {
         'access_key': new_key,
         'region_whitelist': consts.REGIONS
     }
-    shutil.copytree(consts.AWS_SETUP_DIR, temp_dir / "aws_setup")
-    save_json(new_config_dict, temp_dir / "config.json")
 
+    # Archive path for each file to be archived (None for config.json)
+    archive_files = [(Path(".ec2mc", "config.json"), None)]
+    archive_files.extend(
+        (Path(".ec2mc", "aws_setup", setup_file),
+            consts.AWS_SETUP_DIR / setup_file)
+        for setup_file in recursive_dir_files(consts.AWS_SETUP_DIR))
     if give_ssh_key is True:
-        if consts.RSA_KEY_PEM.is_file():
-            pem_base = consts.RSA_KEY_PEM.name
-            shutil.copy(consts.RSA_KEY_PEM, temp_dir / pem_base)
-        if consts.RSA_KEY_PPK.is_file():
-            ppk_base = consts.RSA_KEY_PPK.name
-            shutil.copy(consts.RSA_KEY_PPK, temp_dir / ppk_base)
-
-    out_zip = consts.CONFIG_DIR / f"{user_name}_config"
-    shutil.make_archive(out_zip, "zip", consts.CONFIG_DIR, ".ec2mc")
-    shutil.rmtree(temp_dir, onerror=del_readonly)
+        for key_file in (consts.RSA_KEY_PEM, consts.RSA_KEY_PPK):
+            if key_file.is_file():
+                archive_files.append((Path(".ec2mc", key_file.name), key_file))
+    archive_files.sort(key=lambda archive_file: archive_file[0].parts)
+
+    out_zip = consts.CONFIG_DIR / f"{user_name}_config.zip"
+    temp_zip = out_zip.with_suffix(".zip.part")
+    with zipfile.ZipFile(
+            temp_zip, "w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+        for archive_path, file_path in archive_files:
+            if file_path is None:
+                zip_file.writestr(archive_path.as_posix(), json.dumps(
+                    new_config_dict, ensure_ascii=False, indent=4))
+            else:
+                zip_file.write(file_path, archive_path.as_posix())
+    temp_zip.chmod(consts.CONFIG_PERMS)
+    temp_zip.replace(out_zip)
 
 
 def del_readonly(action, name, exc):
@@ -0,0 +1,117 @@
+"""retry AWS calls with exponential backoff, jitter, and a total deadline"""
+
+import re
+from random import uniform
+from threading import Lock
+from time import monotonic
+from time import sleep
+from typing import Callable, Dict, Iterable, TypeVar
+from botocore.exceptions import ClientError
+
+T = TypeVar("T")
+
+# Attempt totals of retried calls, keyed by label (see metrics)
+_metrics = {}
+_metrics_lock = Lock()
+
+
+class DeadlineExceeded(Exception):
+    """retryable error still being raised once a call's deadline passed
+
+    Attributes:
+        error (ClientError): Last error raised by the retried call.
+        attempts (int): Number of attempts made.
+    """
+
+    def __init__(self, error: ClientError, attempts: int):
+        super().__init__(
+            f"{attempts} attempt(s) failed, last with: {error}")
+        self.error = error
+        self.attempts = attempts
+
+
+def call(
+    func: Callable[[], T],
+    *,
+    codes: Iterable[str],
+    timeout: float = 60,
+    base_delay: float = 0.25,
+    max_delay: float = 8,
+    label: str = "unlabeled"
+) -> T:
+    """call func, retrying it while it raises retryable ClientErrors
+
+    Waits between attempts grow exponentially from base_delay (capped at
+    max_delay), with equal jitter so that concurrent callers spread out.
+    The final wait is cut short so that no attempt starts after timeout.
+
+    Args:
+        func (function): Function to call, without arguments.
+        codes (list[str]): Regular expressions fully matching the error
+            codes to retry on (e.g. "Invalid[a-zA-Z]*\\.NotFound").
+        timeout (float): Seconds after first attempt to stop retrying.
+        base_delay (float): Seconds to (roughly) wait after first attempt.
+        max_delay (float): Maximum seconds to wait between attempts.
+        label (str): Name to record attempt metrics under.
+
+    Raises:
+        ClientError: If func raised a non-retryable ClientError.
+        DeadlineExceeded: If func still raised a retryable error at timeout.
+    """
+    code_regexes = [re.compile(code) for code in codes]
+    deadline = monotonic() + timeout
+    delay = base_delay
+    attempts = 0
+    waited = 0.0
+    timed_out = False
+    try:
+        while True:
+            attempts += 1
+            try:
+                return func()
+            except ClientError as e:
+                if not retryable(e, code_regexes):
+                    raise
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    timed_out = True
+                    raise DeadlineExceeded(e, attempts)
+            pause = min(delay / 2 + uniform(0, delay / 2), remaining)
+            sleep(pause)
+            waited += pause
+            delay = min(delay * 2, max_delay)
+    finally:
+        _record(label, attempts, waited, timed_out)
+
+
+def retryable(error: ClientError, code_regexes) -> bool:
+    """return whether ClientError's code fully matches any code regex"""
+    error_code = error.response['Error']['Code']
+    return any(re.fullmatch(code_regex, error_code)
+        for code_regex in code_regexes)
+
+
+def metrics() -> Dict[str, Dict[str, float]]:
+    """return attempt totals of calls made through call, keyed by label
+
+    Returns:
+        dict: Totals for each label.
+            Label (dict):
+                'calls' (int): Number of calls made.
+                'attempts' (int): Number of attempts made across calls.
+                'waited' (float): Seconds spent waiting between attempts.
+                'timeouts' (int): Number of calls that hit their deadline.
+    """
+    with _metrics_lock:
+        return {label: dict(totals) for label, totals in _metrics.items()}
+
+
+def _record(label, attempts, waited, timed_out):
+    """add a call's attempts to label's totals"""
+    with _metrics_lock:
+        totals = _metrics.setdefault(label,
+            {'calls': 0, 'attempts': 0, 'waited': 0.0, 'timeouts': 0})
+        totals['calls'] += 1
+        totals['attempts'] += attempts
+        totals['waited'] += waited
+        totals['timeouts'] += int(timed_out)
@@ -1,4 +1,5 @@
 from queue import Queue
+from threading import BoundedSemaphore
 from threading import Thread
 
 class Threader:
@@ -7,14 +8,32 @@ class Threader:
     Attributes:
         _result_queue (Queue): Thread-safe queue that holds the results.
         _threads (list[Thread]): Threads of functions added with add_thread.
+        _semaphore (BoundedSemaphore/None): Limits concurrently running
+            functions, for APIs with low rate limits (e.g. IAM).
     """
 
-    def __init__(self):
+    def __init__(self, max_threads=None):
+        """optionally limit how many threaded functions run at once
+
+        Args:
+            max_threads (int): Maximum number of functions to run at once.
+                Unlimited if None.
+
+        Raises:
+            ValueError: If max_threads isn't a positive int or None.
+        """
+        if max_threads is not None and (
+                not isinstance(max_threads, int) or max_threads < 1):
+            raise ValueError("max_threads must be a positive int.")
+
         self._result_queue = Queue()
         self._threads = []
+        self._semaphore = None
+        if max_threads is not None:
+            self._semaphore = BoundedSemaphore(max_threads)
 
 
-    def _worker(self, func, fargs):
+    def _worker(self, index, func, fargs):
         """insert threaded function into queue to make its return retrievable
 
         The index of the thread and the threaded function's first arg are
@@ -22,8 +41,10 @@ class Threader:
 
         Args: See add_thread
         """
-        return self._result_queue.put([
-            len(self._threads), fargs[0], func(*fargs)])
+        if self._semaphore is None:
+            return self._result_queue.put([index, fargs[0], func(*fargs)])
+        with self._semaphore:
+            return self._result_queue.put([index, fargs[0], func(*fargs)])
 
 
     def add_thread(self, func, fargs):
@@ -41,7 +62,8 @@ class Threader:
         if not isinstance(fargs, tuple) or not fargs:
             raise ValueError("fargs must be a non-empty tuple.")
 
-        self._threads.append(Thread(target=self._worker, args=(func, fargs)))
+        self._threads.append(Thread(target=self._worker,
+            args=(len(self._threads), func, fargs)))
         self._threads[-1].start()
 
 
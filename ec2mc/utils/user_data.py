@@ -0,0 +1,207 @@
+"""generate cloud-config user_data from YAML instance templates"""
+
+from pathlib import PurePosixPath
+import shlex
+from ruamel import yaml
+
+from ec2mc import consts
+from ec2mc.utils import aws
+from ec2mc.utils import halt
+from ec2mc.utils import os2
+
+# Top-level cloud-config keys kept for instances created from a baked AMI.
+# Everything else (packages, runcmd, power_state, etc.) is already baked in.
+BAKED_KEYS = ("write_files", "output")
+# Instance path of the JVM settings file sourced by templates' start scripts
+JVM_SETTINGS_PATH = "/home/ec2-user/manage-scripts/jvm_settings.sh"
+# JVM flags for each template jvm gc preset
+GC_PRESETS = {
+    'g1': [
+        "-XX:+UseG1GC",
+        "-XX:+ParallelRefProcEnabled",
+        "-XX:MaxGCPauseMillis=200",
+        "-XX:+UnlockExperimentalVMOptions",
+        "-XX:+DisableExplicitGC",
+        "-XX:G1NewSizePercent=30",
+        "-XX:G1MaxNewSizePercent=40",
+        "-XX:G1HeapRegionSize=8M",
+        "-XX:G1ReservePercent=20"
+    ],
+    # ZGC requires Java 11 or later (see validate_setup)
+    'zgc': [
+        "-XX:+UnlockExperimentalVMOptions",
+        "-XX:+UseZGC"
+    ]
+}
+# write_directories added to templates with weekly OS updates
+OS_UPDATES_WRITE_DIRS = [
+    {
+        'local_dir': ["common", "os_updates", "crontabs"],
+        'instance_dir': "/etc/cron.d/"
+    },
+    {
+        'local_dir': ["common", "os_updates", "scripts"],
+        'instance_dir': "/usr/local/sbin/",
+        'chmod': "0755"
+    }
+]
+
+
+def main(template_name, template, region, *, baked=False, bake=False):
+    """add template files to user_data's write_files
+
+    Args:
+        template_name (str): Name of the YAML instance template.
+        template (dict):
+            'write_directories' (str): Info on template subdirectory(s) to
+                copy files from to user_data's write_files.
+            'artifacts' (list[dict]): Files for the instance to download
+                from region's artifact store (see _artifact_runcmd).
+            'jvm' (dict): JVM memory and GC settings for the start script
+                (see _jvm_settings_file).
+            'os_updates' (str): When to update the instance's packages.
+                "first_boot" (default) only updates on the first boot.
+                "weekly" also updates weekly, in the background (see
+                OS_UPDATES_WRITE_DIRS).
+        region (str): AWS region the instance is to be created in.
+        baked (bool): Instance is created from the template's baked AMI, so
+            only keep what isn't already baked into the AMI.
+        bake (bool): Instance is used to bake the template's AMI, so power
+            off instead of rebooting once the first boot has finished.
+
+    Returns:
+        str: YAML file string to initialize instance on first boot.
+    """
+    user_data = os2.parse_yaml(consts.USER_DATA_DIR / f"{template_name}.yaml")
+
+    if 'write_directories' in template:
+        write_files = _write_files_gen(template['write_directories'])
+        if write_files:
+            user_data.setdefault('write_files', []).extend(write_files)
+    if 'jvm' in template:
+        user_data.setdefault('write_files', []).append(
+            _jvm_settings_file(template['jvm']))
+    if template.get('os_updates') == "weekly":
+        user_data.setdefault('write_files', []).extend(
+            _write_files_gen(OS_UPDATES_WRITE_DIRS))
+        # First boot's repo_upgrade counts as the latest update
+        user_data.setdefault('runcmd', []).append(
+            "touch /var/lib/ec2mc_os_updated")
+
+    # Halt if write_files contains any duplicate paths
+    if 'write_files' in user_data:
+        write_file_paths = [write_file['path'] for write_file
+            in user_data['write_files']]
+        if len(write_file_paths) != len(set(write_file_paths)):
+            halt.err("Duplicate template write_files paths.")
+
+    # Make user_data valid cloud-config by removing additional setup info
+    del user_data['ec2mc_template_info']
+
+    if baked is True:
+        for key in list(user_data):
+            if key not in BAKED_KEYS:
+                del user_data[key]
+    elif 'artifacts' in template:
+        user_data['runcmd'] = [_artifact_runcmd(region, artifact)
+            for artifact in template['artifacts']
+        ] + user_data.get('runcmd', [])
+
+    if bake is True:
+        user_data['power_state'] = {
+            'mode': "poweroff",
+            'message': "Powering off for AMI creation",
+            'timeout': 120
+        }
+
+    user_data_str = yaml.dump(user_data, Dumper=yaml.RoundTripDumper)
+    return f"#cloud-config\n{user_data_str}"
+
+
+def _write_files_gen(write_dirs):
+    """fill out write_files list from specified directory(s)"""
+    write_files = []
+    for write_dir in write_dirs:
+        dir_path = consts.USER_DATA_DIR.joinpath(*write_dir['local_dir'])
+        for dir_file in os2.recursive_dir_files(dir_path):
+            file_path = dir_path / dir_file
+            # Convert Windows line endings to Unix line endings
+            file_bytes = file_path.read_bytes().replace(b"\r\n", b"\n")
+            write_files.append({
+                'content': file_bytes,
+                'path': str(PurePosixPath(
+                    write_dir['instance_dir'], dir_file))
+            })
+            if 'owner' in write_dir:
+                write_files[-1]['owner'] = write_dir['owner']
+            if 'chmod' in write_dir:
+                write_files[-1]['permissions'] = write_dir['chmod']
+    return write_files
+
+
+def _jvm_settings_file(jvm):
+    """return write_files entry for JVM settings sourced by start script
+
+    Args:
+        jvm (dict):
+            'memory' (str/float): Heap size (e.g. "3G"), or fraction of
+                instance's RAM (e.g. 0.75), which is resolved on instance.
+            'gc' (str): GC flags preset from GC_PRESETS.
+            'flags' (list[str]): Additional JVM flags.
+    """
+    settings = ["# Generated by ec2mc from the template's jvm settings"]
+    memory = jvm.get('memory')
+    if isinstance(memory, str):
+        settings.append(f"JVM_MEMORY={shlex.quote(memory)}")
+    elif memory is not None:
+        # Bash lacks floating point arithmetic
+        settings.append(f"JVM_MEMORY_PERCENT={max(round(memory * 100), 1)}")
+
+    # Bash array, so that each flag is passed to java as a single argument
+    flags = GC_PRESETS.get(jvm.get('gc'), []) + jvm.get('flags', [])
+    settings.append(
+        f"JVM_FLAGS=({' '.join(shlex.quote(flag) for flag in flags)})")
+
+    return {
+        'content': "\n".join(settings) + "\n",
+        'path': JVM_SETTINGS_PATH
+    }
+
+
+def template_artifacts():
+    """return artifacts described by config's YAML instance templates
+
+    Returns:
+        list[dict]: Artifacts, deduplicated by SHA-1 checksum.
+            'url' (str): Source URL of the artifact.
+            'sha1' (str): SHA-1 checksum of the artifact.
+            'path' (str): Path on instance to download artifact to.
+    """
+    template_yaml_files = os2.dir_files(consts.USER_DATA_DIR, ext=".yaml")
+
+    artifacts = {}
+    for template_yaml_file in template_yaml_files:
+        template = os2.parse_yaml(
+            consts.USER_DATA_DIR / template_yaml_file)['ec2mc_template_info']
+        for artifact in template.get('artifacts', []):
+            artifacts.setdefault(artifact['sha1'], artifact)
+    return list(artifacts.values())
+
+
+def _artifact_runcmd(region, artifact):
+    """return shell command to download and verify artifact on instance
+
+    The artifact is downloaded from the region's artifact store (S3 bucket,
+    object key being the artifact's SHA-1) through the namespace VPC's S3
+    endpoint, falling back to the artifact's source URL. If the download
+    fails or its SHA-1 checksum doesn't match, the remaining runcmd
+    commands are aborted.
+    """
+    store_url = aws.artifact_url(region, artifact['sha1'])
+    path = artifact['path']
+    return (f"mkdir -p '{PurePosixPath(path).parent}' && "
+        f"(curl -fsS -o '{path}' '{store_url}' || "
+        f"curl -fsSL -o '{path}' '{artifact['url']}') && "
+        f"echo '{artifact['sha1']}  {path}' | sha1sum -c - || "
+        f"{{ echo 'ec2mc: artifact {path} failed download or SHA-1 check' "
+        f">&2; exit 1; }}")
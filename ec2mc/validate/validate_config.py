@@ -1,3 +1,5 @@
+import json
+from time import time
 from botocore.exceptions import ClientError
 
 from ec2mc import consts
@@ -7,6 +9,10 @@ from ec2mc.utils import os2
 from ec2mc.utils.find import find_closest_region
 from ec2mc.validate import validate_perms
 
+# Seconds for which the cached list of AWS regions is reused
+REGION_LIST_TTL = 30 * 24 * 60 * 60
+
+
 def main():
     """validates existence of config file, as well as each key's value"""
     consts.CONFIG_DIR.mkdir(exist_ok=True)
@@ -27,6 +33,7 @@ def main():
     if 'use_handler' not in config_dict:
         config_dict['use_handler'] = True
     consts.USE_HANDLER = config_dict['use_handler']
+    consts.S3_ENDPOINT_URL = config_dict.get('s3_endpoint_url')
 
     if 'access_key' not in config_dict:
         if file_credentials is None:
@@ -92,21 +99,26 @@ def _validate_user(config_dict):
 def _validate_region_whitelist(config_dict):
     """validate config's region whitelist and save to consts.REGIONS tuple
 
-    Requires ec2:DescribeRegions permission.
+    Requires ec2:DescribeRegions permission if region list not cached.
+
+    Whitelisted regions are ordered fastest first by persisted latency
+    measurements. Only whitelisted regions' measurements are refreshed
+    in the background once stale (see configure_cmd for other regions).
     """
-    response = aws.ec2_client_no_validate("us-east-1").describe_regions()
-    region_names = [region['RegionName'] for region in response['Regions']]
+    region_names = _get_region_names(config_dict.get('region_whitelist', []))
 
     if 'region_whitelist' in config_dict:
         whitelist = tuple(config_dict['region_whitelist'])
         if not set(whitelist).issubset(set(region_names)):
             halt.err("Following invalid region(s) in config whitelist:",
                 *(set(whitelist) - set(region_names)))
-        consts.REGIONS = sorted(whitelist)
+        consts.REGIONS = tuple(find_closest_region.by_latency(
+            sorted(whitelist)))
+        find_closest_region.refresh_in_background(list(whitelist))
     else:
         print("Searching for closest AWS EC2 region...")
         closest_region = find_closest_region.main(region_names)
-        print(f"  Region with lowest average latency is {closest_region}.")
+        print(f"  Region with lowest latency is {closest_region}.")
 
         config_dict['region_whitelist'] = [closest_region]
         os2.save_json(config_dict, consts.CONFIG_JSON)
@@ -115,6 +127,64 @@ def _validate_region_whitelist(config_dict):
         consts.REGIONS = (closest_region,)
 
 
+def cached_region_names():
+    """return names of all AWS regions from cache, even if stale
+
+    Returns:
+        list[str]: Region names, or empty list if never cached.
+    """
+    if not consts.REGION_LIST_JSON.is_file():
+        return []
+    try:
+        return json.loads(
+            consts.REGION_LIST_JSON.read_text(encoding="utf-8"))['regions']
+    except (ValueError, KeyError, TypeError):
+        return []
+
+
+def _get_region_names(whitelist):
+    """return names of all AWS regions, using cache where possible
+
+    The region list is cached in consts.REGION_LIST_JSON for
+    REGION_LIST_TTL seconds, and refreshed early if the whitelist contains
+    a region not in it. ec2:DescribeRegions is sent to the nearest known
+    whitelisted region, falling back to the closest measured region.
+
+    Requires ec2:DescribeRegions permission if region list not cached.
+    """
+    region_cache = None
+    if consts.REGION_LIST_JSON.is_file():
+        try:
+            region_cache = json.loads(
+                consts.REGION_LIST_JSON.read_text(encoding="utf-8"))
+            if (time() - region_cache['fetched_at'] <= REGION_LIST_TTL and
+                    set(whitelist).issubset(region_cache['regions'])):
+                return region_cache['regions']
+        except (ValueError, KeyError, TypeError):
+            region_cache = None
+
+    # Regions known to exist, so that a whitelist typo isn't queried
+    known_regions = set(find_closest_region.cached_latencies(
+        stale_ok=True) or {})
+    if region_cache is not None:
+        known_regions.update(region_cache.get('regions', []))
+    query_regions = find_closest_region.by_latency(
+        sorted(set(whitelist) & known_regions))
+    if query_regions:
+        query_region = query_regions[0]
+    else:
+        query_region = find_closest_region.closest_measured("us-east-1")
+
+    response = aws.ec2_client_no_validate(query_region).describe_regions()
+    region_names = sorted(region['RegionName']
+        for region in response['Regions'])
+    os2.save_json({
+        'fetched_at': time(),
+        'regions': region_names
+    }, consts.REGION_LIST_JSON)
+    return region_names
+
+
 def _credentials_from_file():
     """return access key parsed from accessKeys.csv, or None if non-existent"""
     credentials_csv = consts.CONFIG_DIR / "accessKeys.csv"
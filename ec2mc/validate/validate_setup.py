@@ -1,3 +1,4 @@
+import re
 import shutil
 import filecmp
 from pathlib import Path
@@ -5,6 +6,7 @@ from pathlib import Path
 from ec2mc import consts
 from ec2mc.utils import os2
 from ec2mc.utils import halt
+from ec2mc.utils import user_data as user_data_gen
 
 def main():
     """validate contents of user's config's aws_setup directory"""
@@ -131,12 +133,28 @@ def _validate_instance_templates():
         os2.validate_dict(user_data, schema, template_yaml_file)
 
         template_info = user_data['ec2mc_template_info']
-        if 'write_directories' not in template_info:
-            continue
-
-        for write_dir in template_info['write_directories']:
+        if (template_info.get('jvm', {}).get('gc') == "zgc" and
+                _installs_java_8(user_data.get('packages', []))):
+            halt.err(f"The {template_name} template's zgc JVM preset "
+                "requires Java 11 or later.",
+                "  Replace its java-1.8.0 package, or use the g1 preset.")
+        write_dirs = template_info.get('write_directories', [])
+        if template_info.get('os_updates') == "weekly":
+            write_dirs = write_dirs + user_data_gen.OS_UPDATES_WRITE_DIRS
+        for write_dir in write_dirs:
             dir_path = consts.USER_DATA_DIR.joinpath(*write_dir['local_dir'])
             if not dir_path.is_dir():
                 halt.err(f"{dir_path} directory for the {template_name} "
                     "template not found.")
-    # write_files path uniqueness validated in create:_process_user_data
+    # write_files path uniqueness validated in user_data:main
+
+
+def _installs_java_8(packages):
+    """return whether cloud-config packages include Java 8 (or older)"""
+    for package in packages:
+        # Packages can be "name" or ["name", "version"]
+        if isinstance(package, list):
+            package = package[0]
+        if re.match(r"java-1\.[0-8]\.", str(package)):
+            return True
+    return False
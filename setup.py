@@ -54,9 +54,8 @@ setup(
     entry_points={'console_scripts': ["ec2mc=ec2mc.__main__:main"]},
     include_package_data=True,
     install_requires=[
-        "boto3 ~= 1.9",
+        "boto3 ~= 1.17",
         "nbtlib ~= 1.2",
-        "deepdiff ~= 3.3",
         "cryptography ~= 2.3",
         "ruamel.yaml ~= 0.15.0",
         "jsonschema ~= 2.6"
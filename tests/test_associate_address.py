@@ -0,0 +1,17 @@
+import pytest
+
+from ec2mc.commands.address_sub.associate_cmd import AssociateAddress
+
+def test_same_named_instances_resolved_by_address_region():
+    """test that instances sharing a name in two regions aren't collapsed"""
+    all_instances = {
+        ("us-east-1", "mc"): {'region': "us-east-1", 'id': "i-east"},
+        ("eu-west-2", "mc"): {'region': "eu-west-2", 'id': "i-west"}
+    }
+    address = {'region': "eu-west-2", 'ip': "203.0.113.5"}
+    assert AssociateAddress._validate_pair(
+        address, all_instances, "mc", False)['id'] == "i-west"
+
+    address = {'region': "ap-south-1", 'ip': "203.0.113.6"}
+    with pytest.raises(SystemExit):
+        AssociateAddress._validate_pair(address, all_instances, "mc", False)
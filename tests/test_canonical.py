@@ -0,0 +1,102 @@
+from ec2mc.utils import canonical
+
+def test_policy_document_order_insensitive():
+    """test that statement and action order don't affect canonical form"""
+    local_document = {
+        'Version': "2012-10-17",
+        'Statement': [
+            {
+                'Effect': "Allow",
+                'Action': ["ec2:StartInstances", "ec2:DescribeInstances"],
+                'Resource': "*"
+            },
+            {
+                'Effect': "Allow",
+                'Action': "iam:GetUser",
+                'Resource': ["*"]
+            }
+        ]
+    }
+    aws_document = {
+        'Version': "2012-10-17",
+        'Statement': [
+            {
+                'Effect': "Allow",
+                'Action': ["iam:GetUser"],
+                'Resource': "*"
+            },
+            {
+                'Effect': "Allow",
+                'Action': ["ec2:DescribeInstances", "ec2:StartInstances"],
+                'Resource': ["*"]
+            }
+        ]
+    }
+    assert canonical.equal(canonical.policy_document(local_document),
+        canonical.policy_document(aws_document))
+
+
+def test_policy_document_diff():
+    """test that differing statements are reported for display"""
+    local_document = canonical.policy_document({'Statement': [
+        {'Effect': "Allow", 'Action': "s3:GetObject", 'Resource': "*"}
+    ]})
+    aws_document = canonical.policy_document({'Statement': [
+        {'Effect': "Allow", 'Action': "s3:PutObject", 'Resource': "*"}
+    ]})
+    assert not canonical.equal(local_document, aws_document)
+
+    local_only, aws_only = canonical.diff(
+        local_document['Statement'], aws_document['Statement'])
+    assert local_only[0]['Action'] == ["s3:GetObject"]
+    assert aws_only[0]['Action'] == ["s3:PutObject"]
+
+
+def test_ip_permissions_merged_rules():
+    """test that AWS' merging of rules by port range is normalized"""
+    local_ingress = [
+        {
+            'IpProtocol': "tcp",
+            'FromPort': 22,
+            'ToPort': 22,
+            'IpRanges': [{'CidrIp': "0.0.0.0/0"}],
+            'Ipv6Ranges': [],
+            'PrefixListIds': [],
+            'UserIdGroupPairs': []
+        },
+        {
+            'IpProtocol': "6",
+            'FromPort': 22,
+            'ToPort': 22,
+            'Ipv6Ranges': [{'CidrIpv6': "::/0"}]
+        }
+    ]
+    aws_ingress = [{
+        'IpProtocol': "tcp",
+        'FromPort': 22,
+        'ToPort': 22,
+        'IpRanges': [{'CidrIp': "0.0.0.0/0"}],
+        'Ipv6Ranges': [{'CidrIpv6': "::/0"}],
+        'PrefixListIds': [],
+        'UserIdGroupPairs': []
+    }]
+    assert canonical.equal(canonical.ip_permissions(local_ingress),
+        canonical.ip_permissions(aws_ingress))
+
+
+def test_ip_permissions_port_change():
+    """test that a changed port range is detected"""
+    local_ingress = [{
+        'IpProtocol': "tcp",
+        'FromPort': 25565,
+        'ToPort': 25565,
+        'IpRanges': [{'CidrIp': "0.0.0.0/0"}]
+    }]
+    aws_ingress = [{
+        'IpProtocol': "tcp",
+        'FromPort': 25566,
+        'ToPort': 25566,
+        'IpRanges': [{'CidrIp': "0.0.0.0/0"}]
+    }]
+    assert not canonical.equal(canonical.ip_permissions(local_ingress),
+        canonical.ip_permissions(aws_ingress))
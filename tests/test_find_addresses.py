@@ -0,0 +1,91 @@
+import pytest
+
+from ec2mc.utils.find import find_addresses
+
+def test_lookup_queries_indexed_region_first(monkeypatch, tmp_path):
+    """test that IP lookup uses local index, and falls back to all regions"""
+    described_regions = []
+
+    class FakeEC2Client:
+        def __init__(self, region):
+            self._region = region
+
+        def describe_addresses(self, Filters):
+            described_regions.append(self._region)
+            ip_filter = {'Name': "public-ip", 'Values': ["1.2.3.4"]}
+            if self._region != "eu-west-2" or Filters[-1] != ip_filter:
+                return {'Addresses': []}
+            return {'Addresses': [{
+                'AllocationId': "eipalloc-1",
+                'PublicIp': "1.2.3.4",
+                'AssociationId': "eipassoc-1",
+                'InstanceId': "i-1"
+            }]}
+
+        @staticmethod
+        def describe_instances(Filters):
+            return {'Reservations': [{'Instances': [{
+                'InstanceId': "i-1",
+                'State': {'Name': "running"},
+                'Tags': [{'Key': "Name", 'Value': "server"}]
+            }]}]}
+
+    for const, value in (
+            ("ADDRESS_INDEX_JSON", tmp_path / "address_index.json"),
+            ("REGIONS", ("eu-west-2", "us-east-1", "us-west-2")),
+            ("NAMESPACE", "ec2mc")):
+        monkeypatch.setattr(
+            find_addresses.consts, const, value, raising=False)
+    monkeypatch.setattr(find_addresses.aws, "ec2_client", FakeEC2Client)
+
+    address = find_addresses.lookup("1.2.3.4")
+    assert address == {
+        'region': "eu-west-2",
+        'allocation_id': "eipalloc-1",
+        'ip': "1.2.3.4",
+        'association_id': "eipassoc-1",
+        'instance_id': "i-1",
+        'instance_name': "server"
+    }
+
+    described_regions.clear()
+    assert find_addresses.lookup("1.2.3.4") == address
+    assert described_regions == ["eu-west-2"]
+
+    assert find_addresses.lookup("5.6.7.8") is None
+    assert "5.6.7.8" not in find_addresses._load_index()
+
+
+def test_first_hit_reraises_halt(monkeypatch):
+    """test that a region probe halting doesn't leave lookup waiting"""
+    def probe_addresses(region, elastic_ip_address):
+        if region == "bad-region":
+            raise SystemExit(1)
+        return []
+
+    monkeypatch.setattr(find_addresses, "_probe_addresses", probe_addresses)
+    with pytest.raises(SystemExit):
+        find_addresses._first_hit(["us-east-1", "bad-region"], "1.2.3.4")
+
+
+def test_probe_regions_joins_by_region(monkeypatch, tmp_path):
+    """test that each region's addresses are joined to its own instances"""
+    def probe_instance_names(region):
+        return {(region, "i-1"): f"{region}-server"}
+
+    def probe_addresses(region):
+        return [{'allocation_id': f"eipalloc-{region}", 'ip': region,
+            'instance_id': "i-1"}]
+
+    for const, value in (
+            ("ADDRESS_INDEX_JSON", tmp_path / "address_index.json"),
+            ("REGIONS", ("eu-west-2", "us-east-1", "us-west-2"))):
+        monkeypatch.setattr(
+            find_addresses.consts, const, value, raising=False)
+    monkeypatch.setattr(
+        find_addresses, "_probe_instance_names", probe_instance_names)
+    monkeypatch.setattr(find_addresses, "_probe_addresses", probe_addresses)
+
+    for address in find_addresses.probe_regions():
+        assert address['ip'] == address['region']
+        assert address['instance_name'] == f"{address['region']}-server"
@@ -0,0 +1,129 @@
+import json
+import pytest
+
+from ec2mc.utils.find import find_closest_region
+
+def test_measure_eliminates_slow_regions(monkeypatch):
+    """test that only close candidates are re-probed and request timed"""
+    handshakes = {'near': 0.010, 'close': 0.012, 'far': 0.100}
+    probed = []
+
+    def probe_endpoint(region, probe_num):
+        probed.append(region)
+        return [(handshakes[region] / 2, handshakes[region] / 2)] * probe_num
+
+    def time_requests(region):
+        return handshakes[region] * 3
+
+    monkeypatch.setattr(
+        find_closest_region, "_probe_endpoint", probe_endpoint)
+    monkeypatch.setattr(find_closest_region, "_time_requests", time_requests)
+
+    latencies = find_closest_region._measure(list(handshakes))
+    assert probed.count('far') == 1
+    assert probed.count('near') == find_closest_region.MAX_ROUNDS + 1
+    assert latencies['far']['request'] is None
+    assert latencies['far']['connect'] == pytest.approx(0.050)
+    assert latencies['close']['request'] == pytest.approx(0.036)
+    assert min(latencies, key=lambda region: find_closest_region._rank_key(
+        latencies[region])) == "near"
+
+
+def test_persisted_latencies_order_regions(monkeypatch, tmp_path):
+    """test that cached measurements order regions and suggest faster ones"""
+    latency_json = tmp_path / "region_latency.json"
+    monkeypatch.setattr(
+        find_closest_region.consts, "REGION_LATENCY_JSON", latency_json)
+    assert find_closest_region.by_latency(["b", "a"]) == ["b", "a"]
+    assert find_closest_region.closest_measured("us-east-1") == "us-east-1"
+
+    latency_json.write_text(json.dumps({'regions': {
+        'a': {'connect': 0.03, 'tls': 0.03, 'request': None},
+        'b': {'connect': 0.02, 'tls': 0.02, 'request': None},
+        'c': {'connect': 0.01, 'tls': 0.01, 'request': 0.05},
+        'd': {'connect': None, 'tls': None, 'request': None}
+    }}))
+    assert find_closest_region.cached_latencies() is None
+
+    latency_json.write_text(json.dumps({'regions': {
+        'a': {'connect': 0.03, 'tls': 0.03, 'request': None,
+            'measured_at': 0},
+        'b': {'connect': 0.02, 'tls': 0.02, 'request': None,
+            'measured_at': 0},
+        'c': {'connect': 0.01, 'tls': 0.01, 'request': 0.05,
+            'measured_at': 0},
+        'd': {'connect': None, 'tls': None, 'request': None,
+            'measured_at': 0}
+    }}))
+    assert find_closest_region.cached_latencies() == {}
+    assert find_closest_region.by_latency(["e", "d", "a", "b"]) == [
+        "b", "a", "e", "d"]
+    assert find_closest_region.closest_measured("us-east-1") == "c"
+    assert find_closest_region.suggest_whitelist(["a"]) == ["c", "b"]
+    assert find_closest_region.suggest_whitelist(["c"]) == []
+
+
+def test_unreachable_regions(monkeypatch, tmp_path):
+    """test that unreachable regions are eliminated, or fall back to cache"""
+    latency_json = tmp_path / "region_latency.json"
+    monkeypatch.setattr(
+        find_closest_region.consts, "REGION_LATENCY_JSON", latency_json)
+    reachable = {'near': True, 'down': False}
+
+    def probe_endpoint(region, probe_num):
+        if not reachable[region]:
+            return [None] * probe_num
+        return [(0.005, 0.005)] * probe_num
+
+    monkeypatch.setattr(
+        find_closest_region, "_probe_endpoint", probe_endpoint)
+    monkeypatch.setattr(
+        find_closest_region, "_time_requests", lambda region: 0.03)
+
+    assert find_closest_region.main(["down", "near"]) == "near"
+    assert find_closest_region.region_latencies(
+        ["down", "near"], refresh=True)['down']['connect'] is None
+
+    # Nothing reachable, so previous measurements are kept and reused
+    reachable['near'] = False
+    latencies = find_closest_region.region_latencies(
+        ["down", "near"], refresh=True)
+    assert latencies['near']['connect'] == pytest.approx(0.005)
+    assert find_closest_region._measure_and_save(["down", "near"]) is None
+
+    # Earlier measurement of a now unreachable region is kept when merging
+    reachable['down'] = True
+    latencies = find_closest_region.region_latencies(
+        ["down", "near"], refresh=True)
+    assert latencies['near']['connect'] is None
+    cached = find_closest_region.cached_latencies()
+    assert cached['down']['connect'] == pytest.approx(0.005)
+    assert cached['near']['connect'] == pytest.approx(0.005)
+
+    reachable['down'] = False
+    latency_json.unlink()
+    with pytest.raises(SystemExit):
+        find_closest_region.region_latencies(["down", "near"])
+
+
+def test_refresh_in_background(monkeypatch, tmp_path):
+    """test that only given stale regions are re-measured, in a daemon"""
+    monkeypatch.setattr(find_closest_region.consts, "REGION_LATENCY_JSON",
+        tmp_path / "region_latency.json")
+    probed = []
+
+    def probe_endpoint(region, probe_num):
+        probed.append(region)
+        return [(0.005, 0.005)] * probe_num
+
+    monkeypatch.setattr(
+        find_closest_region, "_probe_endpoint", probe_endpoint)
+    monkeypatch.setattr(
+        find_closest_region, "_time_requests", lambda region: 0.03)
+
+    thread = find_closest_region.refresh_in_background(["listed"])
+    assert thread.daemon
+    thread.join()
+    assert set(probed) == {"listed"}
+    assert find_closest_region.is_fresh(["listed"])
+    assert find_closest_region.refresh_in_background(["listed"]) is None
@@ -0,0 +1,70 @@
+from ec2mc.utils import iam_snapshot
+
+class FakeIAMClient:
+    """returns one page of account authorization details"""
+
+    def __init__(self):
+        self.users = [
+            {
+                'UserName': "player",
+                'Path': "/ec2mc/",
+                'GroupList': ["basic_users"],
+                'AttachedManagedPolicies': []
+            },
+            {
+                'UserName': "setup_user",
+                'Path': "/",
+                'GroupList': ["setup_users"],
+                'AttachedManagedPolicies': [
+                    {'PolicyArn': "arn:aws:iam::1:policy/ec2mc/setup"}]
+            }
+        ]
+
+    def get_paginator(self, _):
+        return self
+
+    def paginate(self, Filter):
+        return [{
+            'UserDetailList': self.users,
+            'GroupDetailList': [
+                {'GroupName': name, 'Path': "/ec2mc/",
+                    'AttachedManagedPolicies': []}
+                for name in ("basic_users", "setup_users")
+            ],
+            'Policies': [{
+                'PolicyName': "setup",
+                'Path': "/ec2mc/",
+                'Arn': "arn:aws:iam::1:policy/ec2mc/setup",
+                'PolicyVersionList': [
+                    {'IsDefaultVersion': True, 'Document': {}}]
+            }]
+        }]
+
+
+def test_memberships_include_users_outside_namespace(monkeypatch):
+    """test that non-namespace users count as group and policy members"""
+    monkeypatch.setattr(iam_snapshot.consts, "NAMESPACE", "ec2mc",
+        raising=False)
+    monkeypatch.setattr(iam_snapshot.aws, "iam_client", FakeIAMClient)
+
+    snapshot = iam_snapshot.IAMSnapshot()
+    assert list(snapshot.users) == ["player"]
+    assert snapshot.group_users("basic_users") == ["player"]
+    assert snapshot.group_users("setup_users") == ["setup_user"]
+    assert snapshot.policy_users("setup") == ["setup_user"]
+
+
+def test_reset_shared_reloads_snapshot(monkeypatch):
+    """test that shared snapshot reflects IAM changes after reset_shared"""
+    fake_client = FakeIAMClient()
+    monkeypatch.setattr(iam_snapshot.consts, "NAMESPACE", "ec2mc",
+        raising=False)
+    monkeypatch.setattr(iam_snapshot.aws, "iam_client", lambda: fake_client)
+    monkeypatch.setattr(iam_snapshot, "_shared_snapshot", None)
+
+    assert iam_snapshot.shared() is iam_snapshot.shared()
+    fake_client.users = fake_client.users[1:]
+    assert iam_snapshot.shared().group_users("basic_users") == ["player"]
+
+    iam_snapshot.reset_shared()
+    assert iam_snapshot.shared().group_users("basic_users") == []
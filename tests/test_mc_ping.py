@@ -0,0 +1,61 @@
+import json
+import socket
+from threading import Thread
+from time import monotonic
+
+from ec2mc.utils import mc_ping
+
+def _serve_status(server_sock, status_json):
+    """answer one server list ping like a Minecraft server would"""
+    conn, _ = server_sock.accept()
+    with conn:
+        for _ in range(2):
+            mc_ping._read_packet(conn)
+        conn.sendall(mc_ping._packet(0x00, mc_ping._string(status_json)))
+        packet_id, payload = mc_ping._read_packet(conn)
+        assert packet_id == 0x01
+        conn.sendall(mc_ping._packet(0x01, payload))
+
+
+def test_status_parses_server_list_ping():
+    """test status against a local socket speaking the ping protocol"""
+    status_json = json.dumps({
+        'version': {'name': "1.13.1", 'protocol': 401},
+        'players': {'max': 20, 'online': 3},
+        'description': {'text': "A Minecraft Server"}
+    })
+    with socket.socket() as server_sock:
+        server_sock.bind(("127.0.0.1", 0))
+        server_sock.listen(1)
+        port = server_sock.getsockname()[1]
+        server = Thread(target=_serve_status, args=(server_sock, status_json))
+        server.start()
+
+        server_status = mc_ping.wait_until_joinable(
+            "127.0.0.1", monotonic() + 10, port)
+        server.join()
+
+    assert server_status['version'] == "1.13.1"
+    assert server_status['players_online'] == 3
+    assert server_status['players_max'] == 20
+    assert server_status['latency'] >= 0
+
+
+def test_wait_until_joinable_gives_up_at_deadline():
+    """test that an unreachable server is retried until the deadline"""
+    with socket.socket() as unused_sock:
+        unused_sock.bind(("127.0.0.1", 0))
+        port = unused_sock.getsockname()[1]
+
+    start = monotonic()
+    assert mc_ping.wait_until_joinable(
+        "127.0.0.1", start + 0.5, port, interval=0.1) is None
+    assert 0.5 <= monotonic() - start < 2
+
+
+def test_varint_round_trip():
+    """test VarInt encoding, including the negative status protocol"""
+    for value in (0, 1, 127, 128, 25565, 2**31 - 1):
+        encoded = iter(mc_ping._varint(value))
+        assert mc_ping._read_varint(lambda: next(encoded)) == value
+    assert mc_ping._varint(-1) == b"\xff\xff\xff\xff\x0f"
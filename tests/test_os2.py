@@ -0,0 +1,37 @@
+import json
+import zipfile
+
+from ec2mc import consts
+from ec2mc.utils import os2
+
+def test_create_configuration_zip(tmp_path, monkeypatch):
+    """test that config zip holds setup files, config.json, and SSH key"""
+    aws_setup_dir = tmp_path / "aws_setup"
+    (aws_setup_dir / "user_data").mkdir(parents=True)
+    (aws_setup_dir / "aws_setup.json").write_text("{}")
+    (aws_setup_dir / "user_data" / "mc_template.yaml").write_text("a: 1")
+    (tmp_path / "ec2mc.pem").write_text("private key")
+
+    # Attributes normally set during config validation
+    for attr, value in (
+            ("CONFIG_DIR", tmp_path),
+            ("AWS_SETUP_DIR", aws_setup_dir),
+            ("RSA_KEY_PEM", tmp_path / "ec2mc.pem"),
+            ("RSA_KEY_PPK", tmp_path / "ec2mc.ppk"),
+            ("REGIONS", ["us-east-1"])):
+        monkeypatch.setattr(consts, attr, value, raising=False)
+
+    os2.create_configuration_zip("steve", {"key_id": "key_secret"}, True)
+
+    with zipfile.ZipFile(tmp_path / "steve_config.zip") as zip_file:
+        assert zip_file.namelist() == [
+            ".ec2mc/aws_setup/aws_setup.json",
+            ".ec2mc/aws_setup/user_data/mc_template.yaml",
+            ".ec2mc/config.json",
+            ".ec2mc/ec2mc.pem"
+        ]
+        assert json.loads(zip_file.read(".ec2mc/config.json")) == {
+            'access_key': {"key_id": "key_secret"},
+            'region_whitelist': ["us-east-1"]
+        }
+    assert not (tmp_path / "steve_config.zip.part").exists()
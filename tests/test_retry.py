@@ -0,0 +1,57 @@
+from botocore.exceptions import ClientError
+import pytest
+
+from ec2mc.utils import retry
+
+def _client_error(code):
+    return ClientError({'Error': {'Code': code, 'Message': ""}}, "Op")
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """replace sleeping with advancing a fake monotonic clock"""
+    clock = {'now': 0.0, 'sleeps': []}
+
+    def fake_sleep(seconds):
+        clock['sleeps'].append(seconds)
+        clock['now'] += seconds
+
+    monkeypatch.setattr(retry, "monotonic", lambda: clock['now'])
+    monkeypatch.setattr(retry, "sleep", fake_sleep)
+    return clock
+
+
+def test_retry_backs_off_until_success(fake_clock):
+    """test that retryable errors are retried with growing waits"""
+    errors = [_client_error("InvalidVpcID.NotFound")] * 4
+
+    def func():
+        if errors:
+            raise errors.pop()
+        return "done"
+
+    assert retry.call(func, codes=["Invalid[a-zA-Z]*\\.NotFound"],
+        label="test_success") == "done"
+    sleeps = fake_clock['sleeps']
+    assert len(sleeps) == 4
+    for attempt, pause in enumerate(sleeps):
+        assert 0.125 * 2**attempt <= pause <= 0.25 * 2**attempt
+    assert retry.metrics()['test_success']['attempts'] == 5
+
+
+def test_retry_deadline_and_codes(fake_clock):
+    """test that deadline is respected and other errors aren't retried"""
+    def func():
+        raise _client_error("InvalidInstanceID")
+
+    with pytest.raises(retry.DeadlineExceeded) as exc_info:
+        retry.call(func, codes=["InvalidInstanceID(\\..*)?"], timeout=10,
+            label="test_deadline")
+    assert fake_clock['now'] == pytest.approx(10)
+    last_error = exc_info.value.error
+    assert last_error.response['Error']['Code'] == "InvalidInstanceID"
+    assert retry.metrics()['test_deadline']['timeouts'] == 1
+
+    with pytest.raises(ClientError):
+        retry.call(func, codes=["InvalidClientTokenId"], label="test_codes")
+    assert retry.metrics()['test_codes']['attempts'] == 1
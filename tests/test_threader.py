@@ -48,3 +48,25 @@ def test_threader_add_thread_type_validation():
         threader = Threader()
         threader.add_thread(func, tuple())
     assert str(excinfo.value) == "fargs must be a non-empty tuple."
+
+
+def test_threader_max_threads():
+    """test that no more than max_threads functions run at once"""
+    running = []
+    peak_running = []
+    def func(index):
+        running.append(index)
+        peak_running.append(len(running))
+        sleep(0.05)
+        running.remove(index)
+        return index
+
+    threader = Threader(max_threads=2)
+    for index in range(6):
+        threader.add_thread(func, (index,))
+    assert threader.get_results() == [0, 1, 2, 3, 4, 5]
+    assert max(peak_running) <= 2
+
+    with pytest.raises(ValueError) as excinfo:
+        Threader(max_threads=0)
+    assert str(excinfo.value) == "max_threads must be a positive int."
@@ -0,0 +1,98 @@
+import hashlib
+import shutil
+import subprocess
+from ruamel import yaml
+
+from ec2mc.utils import user_data
+
+SRC_USER_DATA_DIR = user_data.consts.DIST_DIR / "aws_setup_src" / "user_data"
+
+def _artifact_script(monkeypatch, tmp_path, sha1):
+    """return shell script of artifact runcmd followed by a later command"""
+    for const, value in (
+            ("IAM_ARN", "arn:aws:iam::123456789012:user/ec2mc/admin"),
+            ("NAMESPACE", "ec2mc"),
+            ("S3_ENDPOINT_URL", "http://127.0.0.1:9")):
+        monkeypatch.setattr(
+            user_data.aws.consts, const, value, raising=False)
+    source = tmp_path / "source.jar"
+    source.write_bytes(b"server jar")
+    runcmd = user_data._artifact_runcmd("us-east-1", {
+        'url': source.as_uri(),
+        'sha1': sha1,
+        'path': str(tmp_path / "minecraft" / "server.jar")
+    })
+    return runcmd, f"{runcmd}\necho later command\n"
+
+
+def test_artifact_runcmd_uses_unsigned_store_url(monkeypatch, tmp_path):
+    """test that store URL holds no credentials, and source is fallback"""
+    sha1 = hashlib.sha1(b"server jar").hexdigest()
+    runcmd, script = _artifact_script(monkeypatch, tmp_path, sha1)
+    assert ("http://127.0.0.1:9/ec2mc-artifacts-123456789012-us-east-1/"
+        f"{sha1}") in runcmd
+    assert "Signature" not in runcmd and "Credential" not in runcmd
+
+    result = subprocess.run(["sh", "-c", script],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    assert result.returncode == 0
+    assert b"later command" in result.stdout
+    assert (tmp_path / "minecraft" / "server.jar").read_bytes() == (
+        b"server jar")
+
+
+def test_artifact_runcmd_aborts_on_checksum_mismatch(monkeypatch, tmp_path):
+    """test that a bad artifact stops later runcmd commands from running"""
+    _, script = _artifact_script(monkeypatch, tmp_path, "0" * 40)
+
+    result = subprocess.run(["sh", "-c", script],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    assert result.returncode == 1
+    assert b"later command" not in result.stdout
+    assert b"failed download or SHA-1 check" in result.stderr
+
+
+def test_jvm_settings_file_quotes_flags():
+    """test that sourced settings pass each flag as one unexpanded arg"""
+    settings_file = user_data._jvm_settings_file({
+        'memory': "3G",
+        'gc': "zgc",
+        'flags': ["-Dname=a b", "-Dcmd=$(touch pwned)"]
+    })
+    assert settings_file['path'] == user_data.JVM_SETTINGS_PATH
+
+    result = subprocess.run(["bash", "-c",
+        settings_file['content'] +
+        'echo "$JVM_MEMORY"; printf "%s\\n" "${JVM_FLAGS[@]}"'],
+        stdout=subprocess.PIPE, universal_newlines=True)
+    assert result.stdout.splitlines() == ["3G"] + (
+        user_data.GC_PRESETS['zgc'] + ["-Dname=a b", "-Dcmd=$(touch pwned)"])
+
+    assert "JVM_MEMORY_PERCENT=70\n" in user_data._jvm_settings_file(
+        {'memory': 0.7})['content']
+
+
+def test_weekly_os_updates_rendered(monkeypatch, tmp_path):
+    """test that weekly os_updates adds its files and first boot stamp"""
+    monkeypatch.setattr(user_data.consts, "USER_DATA_DIR", tmp_path,
+        raising=False)
+    (tmp_path / "weekly.yaml").write_text(
+        "ec2mc_template_info: {}\nruncmd:\n- echo first boot\n")
+    shutil.copytree(SRC_USER_DATA_DIR / "common" / "os_updates",
+        tmp_path / "common" / "os_updates")
+
+    rendered = user_data.main(
+        "weekly", {'os_updates': "weekly"}, "us-east-1")
+    assert rendered.startswith("#cloud-config\n")
+    cloud_config = yaml.safe_load(rendered)
+    assert {write_file['path']: write_file.get('permissions')
+        for write_file in cloud_config['write_files']} == {
+        "/etc/cron.d/ec2mc_os_updates": None,
+        "/usr/local/sbin/ec2mc_os_update": "0755"
+    }
+    assert cloud_config['runcmd'] == [
+        "echo first boot", "touch /var/lib/ec2mc_os_updated"]
+
+    cloud_config = yaml.safe_load(user_data.main(
+        "weekly", {'os_updates': "first_boot"}, "us-east-1"))
+    assert 'write_files' not in cloud_config
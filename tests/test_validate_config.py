@@ -0,0 +1,40 @@
+import json
+
+from ec2mc.validate import validate_config
+
+def test_region_list_cached(monkeypatch, tmp_path):
+    """test that region list is only fetched if whitelist has unknown region"""
+    queried_regions = []
+
+    class FakeEC2Client:
+        def __init__(self, region):
+            queried_regions.append(region)
+
+        @staticmethod
+        def describe_regions():
+            return {'Regions': [{'RegionName': name}
+                for name in ("us-east-1", "eu-west-2", "eu-north-1")]}
+
+    for const, file_name in (
+            ("REGION_LIST_JSON", "regions.json"),
+            ("REGION_LATENCY_JSON", "region_latency.json")):
+        monkeypatch.setattr(
+            validate_config.consts, const, tmp_path / file_name)
+    monkeypatch.setattr(
+        validate_config.aws, "ec2_client_no_validate", FakeEC2Client)
+
+    (tmp_path / "regions.json").write_text(json.dumps({
+        'fetched_at': 0,
+        'regions': ["eu-west-2", "us-east-1"]
+    }))
+    monkeypatch.setattr(validate_config, "time", lambda: 100)
+    assert validate_config._get_region_names(["eu-west-2"]) == [
+        "eu-west-2", "us-east-1"]
+    assert not queried_regions
+
+    assert validate_config._get_region_names(
+        ["eu-west-2", "eu-north-1"]) == [
+        "eu-north-1", "eu-west-2", "us-east-1"]
+    assert queried_regions == ["eu-west-2"]
+    assert json.loads((tmp_path / "regions.json").read_text())[
+        'fetched_at'] == 100